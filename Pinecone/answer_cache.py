@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Semantic answer cache for query_interface.py
+
+Users often ask the same question in different words. Each generated answer is
+stored with the question's embedding, the IDs of the chunks retrieved for it
+and the chat model. A later question gets the stored answer without a chat
+completion when
+- the same model is asked,
+- exactly the same chunks were retrieved with the same context settings
+  (top-k, context token budget), and
+- its embedding is within ANSWER_CACHE_THRESHOLD cosine similarity of the
+  cached question.
+
+Entries expire after a TTL, the least recently used ones are evicted beyond a
+maximum count, and embed_folder.py deletes every answer built on a chunk it
+re-ingests or removes. One SQLite file per searched index/namespace pair, or per
+set of pairs when several are searched together.
+"""
+
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+import time
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from embedding_cache import pack_vector, unpack_vector
+
+
+SQLITE_MAX_PARAMS = 900  # Stay below SQLite's bound-parameter limit per statement
+
+
+def answer_cache_path(root: str, index_name: str, namespace: Optional[str]) -> str:
+    """Location of the answer cache for an index/namespace pair."""
+    def slug(name: str) -> str:
+        return re.sub(r'[^A-Za-z0-9._-]+', '-', name).strip('-.') or 'default'
+    return os.path.join(root, f"{slug(index_name)}__{slug(namespace or 'default')}.sqlite")
+
+
+def sources_cache_path(root: str, sources: List[Tuple[str, Optional[str]]]) -> str:
+    """Location of the answer cache for a set of searched index/namespace pairs (order-independent)."""
+    paths = sorted({answer_cache_path(root, index_name, namespace) for index_name, namespace in sources})
+    if len(paths) == 1:
+        return paths[0]
+    return os.path.join(root, "+".join(os.path.splitext(os.path.basename(path))[0] for path in paths) + ".sqlite")
+
+
+def chunk_set_key(chunk_ids: List[str], context_key: str = "") -> str:
+    """Order-independent identifier of a set of retrieved chunks (and the context settings used)."""
+    key = "\n".join(sorted(set(chunk_ids)))
+    if context_key:
+        key += "\n#" + context_key
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+class AnswerCache:
+    """SQLite store of generated answers, matched by question similarity and retrieved chunks."""
+
+    def __init__(self, path: str, threshold: float = 0.95, ttl_seconds: float = 86400,
+                 max_entries: int = 1000):
+        """
+        Args:
+            path (str): SQLite database file
+            threshold (float): Minimum cosine similarity between questions to reuse an answer
+            ttl_seconds (float): Age after which an answer is no longer served (0 = never expires)
+            max_entries (int): Answers kept; least recently used ones are evicted beyond it
+        """
+        self.path = path
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "invalidated": 0}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " id INTEGER PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " chunk_key TEXT NOT NULL,"
+            " embedding BLOB NOT NULL,"
+            " answer TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answer_chunks ("
+            " answer_id INTEGER NOT NULL,"
+            " chunk_id TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_lookup ON answers(model, chunk_key)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_last_used ON answers(last_used)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_answer_chunks_chunk ON answer_chunks(chunk_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_answer_chunks_answer ON answer_chunks(answer_id)")
+        self._conn.commit()
+
+    def lookup(self, query_embedding: List[float], chunk_ids: List[str], model: str,
+               context_key: str = "") -> Optional[str]:
+        """
+        Cached answer for a similar question over the same chunks, or None.
+
+        `context_key` identifies the settings the context was built with (top-k,
+        context token budget); only answers stored with the same key match.
+        """
+        now = time.time()
+        oldest = now - self.ttl_seconds if self.ttl_seconds > 0 else 0.0
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, embedding, answer FROM answers WHERE model = ? AND chunk_key = ? AND created_at >= ?",
+                (model, chunk_set_key(chunk_ids, context_key), oldest)
+            ).fetchall()
+
+            best_id, best_answer, best_score = None, None, self.threshold
+            if rows:
+                query = np.asarray(query_embedding, dtype=np.float32)
+                query = query / (np.linalg.norm(query) or 1.0)
+                for answer_id, blob, answer in rows:
+                    cached = unpack_vector(blob)
+                    score = float(query @ cached) / (float(np.linalg.norm(cached)) or 1.0)
+                    if score >= best_score:
+                        best_id, best_answer, best_score = answer_id, answer, score
+
+            if best_id is None:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE answers SET last_used = ? WHERE id = ?", (now, best_id))
+            self._conn.commit()
+            self.stats["hits"] += 1
+            return best_answer
+
+    def store(self, query_embedding: List[float], chunk_ids: List[str], model: str, answer: str,
+              context_key: str = ""):
+        """Remember an answer and evict expired / least recently used ones."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO answers (model, chunk_key, embedding, answer, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (model, chunk_set_key(chunk_ids, context_key), pack_vector(query_embedding), answer, now, now)
+            )
+            self._conn.executemany(
+                "INSERT INTO answer_chunks (answer_id, chunk_id) VALUES (?, ?)",
+                [(cursor.lastrowid, chunk_id) for chunk_id in set(chunk_ids)]
+            )
+            self.stats["writes"] += 1
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        """Drop expired answers and the least recently used ones beyond max_entries (caller holds the lock)."""
+        doomed = []
+        if self.ttl_seconds > 0:
+            doomed.extend(row[0] for row in self._conn.execute(
+                "SELECT id FROM answers WHERE created_at < ?", (now - self.ttl_seconds,)))
+        count = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0] - len(doomed)
+        if count > self.max_entries:
+            doomed.extend(row[0] for row in self._conn.execute(
+                "SELECT id FROM answers WHERE created_at >= ? ORDER BY last_used LIMIT ?",
+                (now - self.ttl_seconds if self.ttl_seconds > 0 else 0.0, count - self.max_entries)))
+        self._delete(doomed)
+        self.stats["evictions"] += len(doomed)
+
+    def _delete(self, answer_ids: List[int]):
+        """Remove answers and their chunk links (caller holds the lock)."""
+        rows = [(answer_id,) for answer_id in answer_ids]
+        self._conn.executemany("DELETE FROM answers WHERE id = ?", rows)
+        self._conn.executemany("DELETE FROM answer_chunks WHERE answer_id = ?", rows)
+
+    def invalidate_chunks(self, chunk_ids: List[str]) -> int:
+        """Delete every answer built on any of these chunks; returns how many were dropped."""
+        unique_ids = list(dict.fromkeys(chunk_ids))
+        if not unique_ids:
+            return 0
+        with self._lock:
+            doomed = set()
+            for start in range(0, len(unique_ids), SQLITE_MAX_PARAMS):
+                batch = unique_ids[start:start + SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                doomed.update(row[0] for row in self._conn.execute(
+                    f"SELECT DISTINCT answer_id FROM answer_chunks WHERE chunk_id IN ({placeholders})", batch))
+            self._delete(sorted(doomed))
+            self._conn.commit()
+            self.stats["invalidated"] += len(doomed)
+            return len(doomed)
+
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache."""
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
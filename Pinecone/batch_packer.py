@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Token-budget batch packing for embedding requests
+
+Groups texts into requests by a target token budget instead of a fixed count,
+so long chunks no longer push a request over the API limit while short ones
+no longer waste it. Inputs longer than the model's per-input limit are split
+into token windows whose embeddings are averaged back into one vector.
+"""
+
+from typing import List, Dict, Tuple, Optional
+
+import numpy as np
+
+
+def split_oversize(texts: List[str], encoding, max_input_tokens: int,
+                   known_counts: Optional[List[Optional[int]]] = None) -> Tuple[List[str], List[int], List[int]]:
+    """
+    Tokenize each text once and split the ones over the per-input limit.
+
+    Args:
+        texts (List[str]): Texts to embed
+        encoding: tiktoken encoding (loaded once by the caller)
+        max_input_tokens (int): Per-input token limit of the embedding model
+        known_counts (List[Optional[int]], optional): Token counts already known
+            (e.g. from token-window chunking); those texts are not tokenized again
+
+    Returns:
+        (inputs, owners, token_counts): request inputs, the index of the text each
+        input came from, and the token count of each input
+    """
+    inputs: List[str] = []
+    owners: List[int] = []
+    token_counts: List[int] = []
+    for owner, text in enumerate(texts):
+        known = known_counts[owner] if known_counts else None
+        if known is not None and known <= max_input_tokens:
+            inputs.append(text)
+            owners.append(owner)
+            token_counts.append(max(known, 1))
+            continue
+        tokens = encoding.encode(text)
+        if len(tokens) <= max_input_tokens:
+            inputs.append(text)
+            owners.append(owner)
+            token_counts.append(max(len(tokens), 1))
+            continue
+        for start in range(0, len(tokens), max_input_tokens):
+            window = tokens[start:start + max_input_tokens]
+            inputs.append(encoding.decode(window))
+            owners.append(owner)
+            token_counts.append(len(window))
+    return inputs, owners, token_counts
+
+
+def pack_batches(token_counts: List[int], max_tokens: int, max_items: int) -> List[List[int]]:
+    """
+    Pack inputs (in order) into batches under a token budget and item cap.
+
+    Returns:
+        List of batches, each a list of input indices
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for i, tokens in enumerate(token_counts):
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def packing_report(token_counts: List[int], batches: List[List[int]], max_tokens: int) -> Dict:
+    """Summarize how well the batches use the token budget."""
+    total_tokens = sum(token_counts)
+    return {
+        "inputs": len(token_counts),
+        "batches": len(batches),
+        "tokens": total_tokens,
+        "efficiency": total_tokens / (len(batches) * max_tokens) if batches else 0.0,
+    }
+
+
+def merge_split_embeddings(owners: List[int], token_counts: List[int], embeddings: List,
+                           num_texts: int) -> List:
+    """
+    Combine per-input embeddings back into one vector per original text.
+
+    Split texts get the token-weighted average of their windows, re-normalized to
+    unit length. A text is None if any of its windows failed.
+    """
+    merged: List = [None] * num_texts
+    parts: Dict[int, List[Tuple[np.ndarray, int]]] = {}
+    failed = set()
+    for owner, tokens, embedding in zip(owners, token_counts, embeddings):
+        if embedding is None:
+            failed.add(owner)
+        else:
+            parts.setdefault(owner, []).append((embedding, tokens))
+
+    for owner, windows in parts.items():
+        if owner in failed:
+            continue
+        if len(windows) == 1:
+            merged[owner] = windows[0][0]
+            continue
+        vectors = np.asarray([embedding for embedding, _ in windows], dtype=np.float32)
+        weights = np.asarray([weight for _, weight in windows], dtype=np.float32)
+        average = weights @ vectors
+        merged[owner] = average / (np.linalg.norm(average) or 1.0)
+    return merged
@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+"""
+Ingestion Benchmark for embed_folder.py
+
+Runs `process_folder` end to end against a synthetic corpus with local
+stand-ins for the OpenAI embeddings endpoint and the Pinecone index, so the
+pipeline's throughput can be measured without API keys or cost.
+
+- Synthetic corpus: PDF, DOCX, MD and TXT files at several sizes
+- Fake OpenAI / Pinecone with configurable latency and error injection
+- Reports files/s, chunks/s, peak RSS and per-stage time for each scenario
+- Results can be saved as JSON and compared against a previous run
+
+Each scenario runs in a fresh process so peak RSS is measured per scenario.
+Pipeline settings (EXTRACT_WORKERS, OPENAI_EMBED_CONCURRENCY, ...) are read
+from the environment as usual, so tuning choices can be compared directly:
+
+    uv run python benchmark.py --sizes small medium --modes batch streaming
+    PINECONE_UPSERT_WORKERS=8 uv run python benchmark.py --baseline results.json
+"""
+
+import os
+import sys
+import json
+import base64
+import time
+import zlib
+import queue
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import contextlib
+import multiprocessing
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Dict, Optional, Callable
+
+try:
+    import resource  # POSIX only
+except ImportError:
+    resource = None
+
+
+# Words per generated document
+CORPUS_SIZES = {
+    "small": 600,
+    "medium": 6_000,
+    "large": 60_000,
+}
+CORPUS_TYPES = ("pdf", "docx", "md", "txt")
+BENCH_INDEX = "bench-index"
+BENCH_NAMESPACE = "bench"
+
+VOCABULARY = (
+    "battery motor inverter charging vehicle range torque software update autopilot sensor "
+    "camera radar neural network training inference latency throughput pipeline workflow "
+    "automation trigger webhook node credential schedule retry queue worker cluster shard "
+    "replica index vector embedding chunk overlap token model prompt context answer source "
+    "meeting agenda action owner deadline review budget forecast roadmap milestone release"
+).split()
+
+
+# =========================
+# Synthetic corpus
+# =========================
+
+def _sentences(rng: random.Random, words: int) -> List[str]:
+    """Random sentences totalling roughly `words` words."""
+    sentences = []
+    remaining = words
+    while remaining > 0:
+        n = min(remaining, rng.randint(6, 20))
+        sentence = " ".join(rng.choice(VOCABULARY) for _ in range(n))
+        sentences.append(sentence.capitalize() + ".")
+        remaining -= n
+    return sentences
+
+
+def _paragraphs(rng: random.Random, words: int) -> List[str]:
+    sentences = _sentences(rng, words)
+    paragraphs = []
+    i = 0
+    while i < len(sentences):
+        n = rng.randint(3, 8)
+        paragraphs.append(" ".join(sentences[i:i + n]))
+        i += n
+    return paragraphs
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: Path, paragraphs: List[str], lines_per_page: int = 48, line_width: int = 90):
+    """Write a minimal text PDF (Helvetica, one content stream per page)."""
+    lines: List[str] = []
+    for paragraph in paragraphs:
+        line = ""
+        for word in paragraph.split():
+            if len(line) + len(word) + 1 > line_width:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}".strip()
+        lines.append(line)
+        lines.append("")
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[""]]
+
+    objects: List[bytes] = []
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for page_lines, page_id in zip(pages, page_ids):
+        body = "BT /F1 10 Tf 14 TL 50 760 Td\n" + "".join(f"({_pdf_escape(l)}) Tj T*\n" for l in page_lines) + "ET"
+        stream = body.encode('latin-1')
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+def write_docx(path: Path, paragraphs: List[str]):
+    from docx import Document
+    document = Document()
+    for i, paragraph in enumerate(paragraphs):
+        if i % 10 == 0:
+            document.add_heading(f"Section {i // 10 + 1}", level=2)
+        document.add_paragraph(paragraph)
+    document.save(str(path))
+
+
+def write_markdown(path: Path, paragraphs: List[str]):
+    parts = []
+    for i, paragraph in enumerate(paragraphs):
+        if i % 10 == 0:
+            parts.append(f"## Section {i // 10 + 1}")
+        parts.append(paragraph)
+    path.write_text("\n\n".join(parts) + "\n", encoding='utf-8')
+
+
+def write_text(path: Path, paragraphs: List[str]):
+    path.write_text("\n\n".join(paragraphs) + "\n", encoding='utf-8')
+
+
+CORPUS_WRITERS: Dict[str, Callable[[Path, List[str]], None]] = {
+    "pdf": write_pdf,
+    "docx": write_docx,
+    "md": write_markdown,
+    "txt": write_text,
+}
+
+
+def generate_corpus(root: Path, size: str, files_per_type: int, types=CORPUS_TYPES, seed: int = 0) -> List[Path]:
+    """
+    Write a deterministic synthetic corpus.
+
+    Args:
+        root (Path): Output folder (created if missing)
+        size (str): Key of CORPUS_SIZES
+        files_per_type (int): Documents generated per file type
+        types: File types to generate
+        seed (int): Random seed (same seed -> byte-identical text)
+
+    Returns:
+        List of generated file paths
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    words = CORPUS_SIZES[size]
+    paths = []
+    for file_type in types:
+        for i in range(files_per_type):
+            rng = random.Random(f"{seed}-{size}-{file_type}-{i}")
+            path = root / f"{size}_{file_type}_{i:03d}.{file_type}"
+            CORPUS_WRITERS[file_type](path, _paragraphs(rng, words))
+            paths.append(path)
+    return paths
+
+
+# =========================
+# Fake OpenAI / Pinecone
+# =========================
+
+def _injected_error(kind: str) -> Exception:
+    """An OpenAI-style API error without needing a real HTTP response."""
+    from openai import RateLimitError, APIStatusError
+    cls = RateLimitError if kind == "429" else APIStatusError
+    error = cls.__new__(cls)
+    Exception.__init__(error, f"Injected {kind} error")
+    error.status_code = 429 if kind == "429" else 503
+    error.response = None
+    error.body = None
+    return error
+
+
+class FakeEmbeddings:
+    """Stand-in for `client.embeddings` returning deterministic pseudo-random vectors."""
+
+    def __init__(self, latency: float, jitter: float, error_rate: float, rate_limit_rate: float, seed: int):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _roll(self) -> float:
+        with self._lock:
+            self.calls += 1
+            return self._rng.random()
+
+    def create(self, model: str, input, dimensions: int = 1536, **kwargs):
+        import numpy as np
+
+        texts = [input] if isinstance(input, str) else list(input)
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        roll = self._roll()
+        if roll < self.rate_limit_rate:
+            raise _injected_error("429")
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise _injected_error("503")
+
+        data = []
+        for i, text in enumerate(texts):
+            vector = np.random.default_rng(zlib.crc32(text.encode('utf-8'))).standard_normal(dimensions)
+            vector /= np.linalg.norm(vector)
+            vector = vector.astype('<f4')
+            if kwargs.get("encoding_format") == "base64":
+                data.append(SimpleNamespace(index=i, embedding=base64.b64encode(vector.tobytes()).decode('ascii')))
+            else:
+                data.append(SimpleNamespace(index=i, embedding=vector.tolist()))
+        return SimpleNamespace(data=data, model=model)
+
+
+class FakeOpenAI:
+    """Minimal OpenAI client look-alike (only the embeddings endpoint)."""
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.01, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, seed: int = 0):
+        self.embeddings = FakeEmbeddings(latency, jitter, error_rate, rate_limit_rate, seed)
+
+    def with_options(self, **kwargs):
+        return self
+
+
+class FakeIndex:
+    """Pinecone Index look-alike that only counts what it receives."""
+
+    def __init__(self, latency: float, error_rate: float, seed: int):
+        self.latency = latency
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.ids = set()
+        self.upsert_requests = 0
+        self.upsert_seconds = 0.0  # summed over concurrent workers
+
+    def upsert(self, vectors: List[Dict], namespace: Optional[str] = None, **kwargs):
+        started = time.perf_counter()
+        time.sleep(self.latency)
+        with self._lock:
+            failed = self._rng.random() < self.error_rate
+            self.upsert_requests += 1
+            self.upsert_seconds += time.perf_counter() - started
+            if failed:
+                raise RuntimeError("Injected upsert error")
+            self.ids.update(v["id"] for v in vectors)
+        return {"upserted_count": len(vectors)}
+
+    def delete(self, ids: Optional[List[str]] = None, namespace: Optional[str] = None, **kwargs):
+        with self._lock:
+            self.ids.difference_update(ids or [])
+
+    def describe_index_stats(self, **kwargs):
+        return {"total_vector_count": len(self.ids)}
+
+
+class FakePinecone:
+    """Pinecone client look-alike with a single in-memory index."""
+
+    def __init__(self, latency: float = 0.02, error_rate: float = 0.0, seed: int = 0):
+        self.index = FakeIndex(latency, error_rate, seed)
+
+    def list_indexes(self):
+        return SimpleNamespace(names=lambda: [BENCH_INDEX])
+
+    def Index(self, name: str) -> FakeIndex:
+        return self.index
+
+
+# =========================
+# Measurement
+# =========================
+
+def _peak_rss_mb() -> Dict[str, Optional[float]]:
+    """Peak resident set size of this process and of its (extraction) children."""
+    if resource is None:
+        return {"main": None, "workers": None}
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KiB elsewhere
+    return {
+        "main": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor,
+        "workers": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / divisor,
+    }
+
+
+class StageTimer:
+    """Accumulates wall time spent inside wrapped pipeline functions."""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    def wrap(self, stage: str, fn: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - started)
+        return timed
+
+    def wrap_iter(self, stage: str, fn: Callable) -> Callable:
+        """Time a generator function by the time spent producing each item."""
+        def timed(*args, **kwargs):
+            iterator = iter(fn(*args, **kwargs))
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    self.add(stage, time.perf_counter() - started)
+                    return
+                self.add(stage, time.perf_counter() - started)
+                yield item
+        return timed
+
+
+def run_scenario(settings: Dict) -> Dict:
+    """Run one benchmark scenario (called in a fresh process)."""
+    os.environ["PINECONE_MANIFEST_DIR"] = settings["state_dir"]
+    os.environ["OPENAI_EMBED_CACHE_PATH"] = os.path.join(settings["state_dir"], "embeddings.sqlite")
+    os.environ["PINECONE_METRICS_DIR"] = os.path.join(settings["state_dir"], "metrics")
+    if not settings["cache"]:
+        os.environ["OPENAI_EMBED_CACHE"] = "false"
+
+    import embed_folder
+
+    timer = StageTimer()
+    embed_folder.extract_changed_files = timer.wrap_iter("extract", embed_folder.extract_changed_files)
+    embed_folder.prepare_chunks = timer.wrap("chunk", embed_folder.prepare_chunks)
+    embed_folder.create_embeddings_batch = timer.wrap("embed", embed_folder.create_embeddings_batch)
+
+    openai_client = FakeOpenAI(
+        latency=settings["embed_latency"],
+        jitter=settings["embed_latency"] * 0.2,
+        error_rate=settings["embed_error_rate"],
+        rate_limit_rate=settings["rate_limit_rate"],
+        seed=settings["seed"],
+    )
+    pc = FakePinecone(latency=settings["upsert_latency"], error_rate=settings["upsert_error_rate"], seed=settings["seed"])
+
+    output = open(os.devnull, 'w', encoding='utf-8') if not settings["verbose"] else sys.stdout
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        outcome = embed_folder.process_folder(settings["folder"], openai_client, pc, BENCH_INDEX, BENCH_NAMESPACE,
+                                              streaming=settings["mode"] == "streaming")
+    elapsed = time.perf_counter() - started
+    if output is not sys.stdout:
+        output.close()
+
+    stages = dict(timer.seconds)
+    stages["upsert"] = pc.index.upsert_seconds
+    chunks = len(pc.index.ids)
+    files = outcome.get("processed_files", 0) - outcome.get("failed_files", 0)
+    result = {
+        "elapsed": elapsed,
+        "files": files,
+        "chunks": chunks,
+        "files_per_second": files / elapsed,
+        "chunks_per_second": chunks / elapsed,
+        "peak_rss_mb": _peak_rss_mb(),
+        "stages": stages,
+        "embed_requests": openai_client.embeddings.calls,
+        "upsert_requests": pc.index.upsert_requests,
+        "status": outcome["status"],
+    }
+    # A failed or partial run is not comparable with a complete one
+    if outcome["status"] != "ok" or outcome.get("failed_files"):
+        result["error"] = (f"run {outcome['status']}: {files}/{settings['files']} files ingested, "
+                           f"{outcome.get('failed_files', 0)} failed")
+    return result
+
+
+def _scenario_entry(settings: Dict, results: multiprocessing.Queue):
+    try:
+        results.put(run_scenario(settings))
+    except Exception as e:
+        results.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def run_in_subprocess(settings: Dict) -> Dict:
+    """Run a scenario in a fresh interpreter so RSS and module state don't leak between runs."""
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_scenario_entry, args=(settings, results))
+    process.start()
+    while True:
+        try:
+            result = results.get(timeout=1.0)
+            break
+        except queue.Empty:
+            if process.is_alive():
+                continue
+        # The child is gone: take a result it queued just before exiting, else report how it died
+        try:
+            result = results.get(timeout=1.0)
+        except queue.Empty:
+            process.join()
+            return {"error": f"benchmark process died (exit code {process.exitcode})"}
+        break
+    process.join()
+    return result
+
+
+# =========================
+# Reporting
+# =========================
+
+def _scenario_name(size: str, mode: str) -> str:
+    return f"{size}/{mode}"
+
+
+def print_report(results: Dict[str, Dict], baseline: Optional[Dict[str, Dict]] = None):
+    """Print a summary table (with % change against a baseline if given)."""
+    print()
+    print(f"{'Scenario':<20}{'Files':>7}{'Chunks':>8}{'Time s':>9}{'Files/s':>10}{'Chunks/s':>11}{'RSS MB':>9}"
+          f"{'Extract':>9}{'Chunk':>8}{'Embed':>8}{'Upsert*':>9}")
+    print("-" * 108)
+    for name, r in results.items():
+        if "error" in r:
+            print(f"{name:<20}❌ {r['error']}")
+            continue
+        rss = r["peak_rss_mb"]["main"]
+        stages = r["stages"]
+        print(f"{name:<20}{r['files']:>7}{r['chunks']:>8}{r['elapsed']:>9.2f}{r['files_per_second']:>10.2f}"
+              f"{r['chunks_per_second']:>11.1f}{(f'{rss:.0f}' if rss else 'n/a'):>9}"
+              f"{stages.get('extract', 0):>9.2f}{stages.get('chunk', 0):>8.2f}"
+              f"{stages.get('embed', 0):>8.2f}{stages.get('upsert', 0):>9.2f}")
+        previous = (baseline or {}).get(name)
+        if previous and "error" not in previous:
+            deltas = []
+            for key, label in (("files_per_second", "files/s"), ("chunks_per_second", "chunks/s")):
+                if previous[key]:
+                    deltas.append(f"{label} {100 * (r[key] - previous[key]) / previous[key]:+.1f}%")
+            if previous["peak_rss_mb"]["main"] and rss:
+                deltas.append(f"RSS {100 * (rss - previous['peak_rss_mb']['main']) / previous['peak_rss_mb']['main']:+.1f}%")
+            print(f"{'':<20}vs baseline: {', '.join(deltas)}")
+    print("-" * 108)
+    print("* Upsert time is summed over concurrent upsert workers; stages overlap in streaming mode.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embed_folder.py ingestion with fake OpenAI/Pinecone")
+    parser.add_argument("--sizes", nargs="+", choices=sorted(CORPUS_SIZES), default=["small", "medium"],
+                        help="Document sizes to generate (default: small medium)")
+    parser.add_argument("--types", nargs="+", choices=CORPUS_TYPES, default=list(CORPUS_TYPES),
+                        help="File types to generate (default: all)")
+    parser.add_argument("--files-per-type", type=int, default=5, help="Documents per file type and size")
+    parser.add_argument("--modes", nargs="+", choices=["batch", "streaming"], default=["batch", "streaming"],
+                        help="Pipeline modes to run")
+    parser.add_argument("--embed-latency-ms", type=float, default=80.0, help="Fake embedding request latency")
+    parser.add_argument("--embed-error-rate", type=float, default=0.0, help="Fraction of embedding requests failing with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of embedding requests failing with 429")
+    parser.add_argument("--upsert-latency-ms", type=float, default=30.0, help="Fake upsert request latency")
+    parser.add_argument("--upsert-error-rate", type=float, default=0.0, help="Fraction of upsert requests failing")
+    parser.add_argument("--cache", action="store_true", help="Keep the embedding cache enabled (fresh per scenario)")
+    parser.add_argument("--corpus-dir", help="Reuse/keep the generated corpus in this folder")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against results JSON from a previous run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Show embed_folder.py output")
+    args = parser.parse_args()
+
+    print("⏱️  Ingestion Benchmark (fake OpenAI / Pinecone)")
+    print("=" * 60)
+
+    work_dir = Path(tempfile.mkdtemp(prefix="embed-bench-"))
+    corpus_root = Path(args.corpus_dir) if args.corpus_dir else work_dir / "corpus"
+    results: Dict[str, Dict] = {}
+    try:
+        for size in args.sizes:
+            folder = corpus_root / size
+            if folder.exists() and args.corpus_dir:
+                files = [p for p in folder.iterdir() if p.is_file()]
+                print(f"📁 Reusing {len(files)} {size} file(s) in {folder}")
+            else:
+                print(f"🔄 Generating {args.files_per_type} {size} file(s) per type in {folder}...")
+                files = generate_corpus(folder, size, args.files_per_type, args.types, args.seed)
+            corpus_mb = sum(p.stat().st_size for p in files) / (1024 * 1024)
+
+            for mode in args.modes:
+                name = _scenario_name(size, mode)
+                print(f"🚀 Running {name} ({len(files)} files, {corpus_mb:.1f} MB)...")
+                state_dir = work_dir / "state" / name.replace("/", "_")
+                state_dir.mkdir(parents=True, exist_ok=True)
+                results[name] = run_in_subprocess({
+                    "folder": str(folder),
+                    "files": len(files),
+                    "mode": mode,
+                    "state_dir": str(state_dir),
+                    "cache": args.cache,
+                    "embed_latency": args.embed_latency_ms / 1000.0,
+                    "embed_error_rate": args.embed_error_rate,
+                    "rate_limit_rate": args.rate_limit_rate,
+                    "upsert_latency": args.upsert_latency_ms / 1000.0,
+                    "upsert_error_rate": args.upsert_error_rate,
+                    "seed": args.seed,
+                    "verbose": args.verbose,
+                })
+                results[name]["corpus_mb"] = corpus_mb
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get("results")
+    print_report(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "args": vars(args), "results": results}, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
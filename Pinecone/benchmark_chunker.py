@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Chunker Benchmark
+
+Measures chunking throughput (chars/s) of
+- the LangChain RecursiveCharacterTextSplitter, built per call (previous chunk_text)
+- the LangChain splitter built once
+- the offset-based TextChunker (chunker.py, used by chunk_text now)
+- simple_chunk_text (the fallback splitter)
+
+and the share of texts the native chunker splits exactly like LangChain.
+Text comes from the synthetic corpus generator in benchmark.py, or from your
+own documents with --folder.
+
+    uv run python benchmark_chunker.py --sizes 10000 100000 1000000
+    uv run python benchmark_chunker.py --folder C:\\path\\to\\documents
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+from typing import List, Dict, Callable
+
+from chunker import TextChunker, SEPARATORS
+from benchmark import _paragraphs
+
+
+def langchain_splitter(chunk_size: int, chunk_overlap: int):
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=list(SEPARATORS),
+        keep_separator=True,
+    )
+
+
+def build_methods(chunk_size: int, chunk_overlap: int) -> Dict[str, Callable[[str], List[str]]]:
+    """Chunking methods under test, each returning stripped, non-empty chunks."""
+    from embed_folder import simple_chunk_text
+
+    shared_splitter = langchain_splitter(chunk_size, chunk_overlap)
+    chunker = TextChunker(chunk_size, chunk_overlap)
+
+    def langchain_per_call(text: str) -> List[str]:
+        chunks = langchain_splitter(chunk_size, chunk_overlap).split_text(text)
+        return [chunk.strip() for chunk in chunks if chunk.strip()]
+
+    def langchain_shared(text: str) -> List[str]:
+        return [chunk.strip() for chunk in shared_splitter.split_text(text) if chunk.strip()]
+
+    return {
+        "LangChain (per call)": langchain_per_call,
+        "LangChain (shared)": langchain_shared,
+        "TextChunker offsets": chunker.split_offsets,
+        "TextChunker strings": chunker.split,
+        "simple_chunk_text": lambda text: simple_chunk_text(text, chunk_size, chunk_overlap),
+    }
+
+
+def synthetic_text(chars: int, seed: int = 0) -> str:
+    """Prose with paragraphs, line breaks and the odd oversize paragraph."""
+    rng = random.Random(seed)
+    paragraphs = _paragraphs(rng, chars // 6 + 1)
+    for i in range(0, len(paragraphs), 7):
+        paragraphs[i] = paragraphs[i].replace(". ", ".\n")
+    for i in range(3, len(paragraphs), 11):
+        paragraphs[i] = " ".join(paragraphs[i:i + 4])  # oversize paragraph -> line/word level splits
+    return "\n\n".join(paragraphs)[:chars]
+
+
+def load_folder_texts(folder: str) -> List[str]:
+    """Extract the text of every supported document in a folder."""
+    from embed_folder import discover_files, process_file
+    texts = []
+    for file_path in discover_files(Path(folder)):
+        info = process_file(file_path)
+        if info and info.get('content'):
+            texts.append(info['content'])
+    return texts
+
+
+def time_method(method: Callable[[str], List], texts: List[str], repeat: int) -> float:
+    """Best-of-`repeat` seconds to chunk every text."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in texts:
+            method(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def agreement(texts: List[str], chunk_size: int, chunk_overlap: int) -> float:
+    """Fraction of texts whose native chunks equal LangChain's, in the same order."""
+    splitter = langchain_splitter(chunk_size, chunk_overlap)
+    chunker = TextChunker(chunk_size, chunk_overlap)
+    matched = 0
+    for text in texts:
+        reference = [chunk.strip() for chunk in splitter.split_text(text) if chunk.strip()]
+        matched += chunker.split(text) == reference
+    return matched / len(texts) if texts else 1.0
+
+
+def run(label: str, texts: List[str], chunk_size: int, chunk_overlap: int, repeat: int):
+    total_chars = sum(len(text) for text in texts)
+    print(f"\n📄 {label}: {len(texts)} text(s), {total_chars:,} chars "
+          f"(chunk size {chunk_size}, overlap {chunk_overlap})")
+    print(f"   {'Method':<24}{'Chunks':>8}{'Seconds':>10}{'Chars/s':>16}{'Speedup':>10}")
+
+    methods = build_methods(chunk_size, chunk_overlap)
+    baseline = None
+    for name, method in methods.items():
+        chunks = sum(len(method(text)) for text in texts)
+        seconds = time_method(method, texts, repeat)
+        baseline = baseline or seconds
+        print(f"   {name:<24}{chunks:>8}{seconds:>10.4f}{total_chars / max(seconds, 1e-9):>16,.0f}"
+              f"{baseline / max(seconds, 1e-9):>9.1f}x")
+    print(f"   ✅ Texts chunked identically to LangChain: {agreement(texts, chunk_size, chunk_overlap):.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text chunkers (chars/s)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000],
+                        help="Synthetic document sizes in characters")
+    parser.add_argument("--docs", type=int, default=5, help="Synthetic documents per size")
+    parser.add_argument("--folder", help="Benchmark on the documents in this folder instead")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=120)
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per method (best is reported)")
+    args = parser.parse_args()
+
+    print("✂️  Chunker Benchmark")
+    print("=" * 60)
+
+    if args.folder:
+        texts = load_folder_texts(args.folder)
+        if not texts:
+            print(f"❌ No extractable documents found in {args.folder}")
+            sys.exit(1)
+        run(args.folder, texts, args.chunk_size, args.chunk_overlap, args.repeat)
+        return
+
+    for size in args.sizes:
+        texts = [synthetic_text(size, seed) for seed in range(args.docs)]
+        run(f"Synthetic {size:,} chars", texts, args.chunk_size, args.chunk_overlap, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
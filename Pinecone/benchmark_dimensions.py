@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Embedding Dimension Benchmark
+
+Compares shortened text-embedding-3 vectors (256/512/768/1024) with the
+1536-d baseline on your own documents:
+- recall@k: share of the 1536-d top-k chunks the shorter vectors also retrieve
+- storage: bytes per vector and for the whole corpus
+- query latency: top-k search in a local vector index (vector_store.py) per dimension
+
+Chunks and queries are embedded once at full size (through the embedding
+cache). Shorter vectors are derived by truncating and re-normalizing, which is
+how the API shortens text-embedding-3 embeddings; --native requests every
+dimension from the API instead.
+
+Queries come from --queries (one per line) or are sampled from the chunks.
+
+    uv run python benchmark_dimensions.py --folder C:\\path\\to\\documents
+    uv run python benchmark_dimensions.py --folder docs --queries questions.txt --dims 256 512 768 --k 5 10
+    uv run python benchmark_dimensions.py --fake   # synthetic text + fake embeddings (plumbing check only)
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from vector_store import LocalVectorClient
+from benchmark import FakeOpenAI, _paragraphs
+
+BASELINE_DIMENSIONS = 1536
+
+
+def load_chunks(folder: Optional[str], max_chunks: int, seed: int) -> List[str]:
+    """Chunk texts of a folder (as embed_folder.py would index them), or synthetic ones."""
+    import embed_folder
+    if not folder:
+        text = "\n\n".join(_paragraphs(random.Random(seed), max_chunks * 150))
+        return embed_folder.chunk_text(text)[:max_chunks]
+
+    chunks: List[str] = []
+    for file_path in embed_folder.discover_files(Path(folder)):
+        info = embed_folder.process_file(str(file_path))
+        if info:
+            chunks.extend(record["chunk"] for record in embed_folder.prepare_chunks(info, file_path))
+        if len(chunks) >= max_chunks:
+            break
+    return chunks[:max_chunks]
+
+
+def sample_queries(chunks: List[str], count: int, seed: int) -> List[str]:
+    """Use one sentence of randomly picked chunks as a pseudo-query."""
+    rng = random.Random(seed)
+    queries = []
+    for chunk in rng.sample(chunks, min(count, len(chunks))):
+        sentences = [s.strip() for s in chunk.replace("\n", " ").split(". ") if len(s.split()) >= 6]
+        queries.append(rng.choice(sentences) if sentences else chunk[:200])
+    return queries
+
+
+def embed(client, texts: List[str], dimensions: int) -> List[Optional[List[float]]]:
+    """Embed texts through the ingestion path (batching, retries, cache) at a given dimension."""
+    import embed_folder
+    embed_folder.EMBED_DIMENSIONS = dimensions  # read at call time by create_embeddings_batch
+    return embed_folder.create_embeddings_batch(client, texts)
+
+
+def shorten(matrix: np.ndarray, dimensions: int) -> np.ndarray:
+    """Truncate embeddings to `dimensions` and re-normalize them to unit length."""
+    short = matrix[:, :dimensions]
+    norms = np.linalg.norm(short, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (short / norms).astype(np.float32)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> List[List[int]]:
+    """Exact cosine top-k (rows are unit vectors) - the ground truth."""
+    scores = queries @ corpus.T
+    return [list(np.argsort(-row)[:k]) for row in scores]
+
+
+def measure(corpus: np.ndarray, queries: np.ndarray, truth: List[List[int]], ks: List[int], workdir: str) -> Dict:
+    """Index the vectors in a local vector store and time top-k queries against it."""
+    dimensions = corpus.shape[1]
+    client = LocalVectorClient(workdir)
+    client.create_index(f"dim-{dimensions}", dimension=dimensions)
+    index = client.Index(f"dim-{dimensions}")
+    for start in range(0, len(corpus), 1000):
+        index.upsert(vectors=[{"id": str(start + i), "values": row} for i, row in enumerate(corpus[start:start + 1000])])
+
+    top_k = max(ks)
+    latencies = []
+    recalls = {k: [] for k in ks}
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        result = index.query(vector=query, top_k=top_k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        retrieved = [int(match.id) for match in result.matches]
+        for k in ks:
+            recalls[k].append(len(set(retrieved[:k]) & set(expected[:k])) / min(k, len(expected)))
+
+    return {
+        "dimensions": dimensions,
+        "recall": {str(k): float(np.mean(values)) for k, values in recalls.items()},
+        "bytes_per_vector": dimensions * 4,
+        "corpus_mb": len(corpus) * dimensions * 4 / (1024 * 1024),
+        "query_p50_ms": float(np.percentile(latencies, 50)),
+        "query_p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def print_report(results: List[Dict], ks: List[int], chunks: int, queries: int):
+    print(f"\n📊 {chunks} chunks, {queries} queries (recall against the {BASELINE_DIMENSIONS}-d top-k)")
+    recall_headers = "".join(f"{'Recall@' + str(k):>11}" for k in ks)
+    print(f"   {'Dims':>6}{recall_headers}{'Bytes/vec':>11}{'Corpus MB':>11}{'p50 ms':>9}{'p95 ms':>9}")
+    for result in results:
+        recalls = "".join(f"{result['recall'][str(k)]:>11.3f}" for k in ks)
+        print(f"   {result['dimensions']:>6}{recalls}{result['bytes_per_vector']:>11,}"
+              f"{result['corpus_mb']:>11.2f}{result['query_p50_ms']:>9.3f}{result['query_p95_ms']:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recall, storage and latency of shortened embeddings")
+    parser.add_argument("--folder", help="Documents to benchmark on (synthetic text if omitted)")
+    parser.add_argument("--queries", help="File with one query per line (sampled from the chunks if omitted)")
+    parser.add_argument("--num-queries", type=int, default=100, help="Queries to sample when --queries is not given")
+    parser.add_argument("--dims", nargs="+", type=int, default=[256, 512, 768, 1024])
+    parser.add_argument("--k", nargs="+", type=int, default=[5, 10], help="Recall cut-offs")
+    parser.add_argument("--max-chunks", type=int, default=5000)
+    parser.add_argument("--native", action="store_true",
+                        help="Request each dimension from the API instead of truncating 1536-d vectors")
+    parser.add_argument("--fake", action="store_true", help="Use fake embeddings (no API key, no cost)")
+    parser.add_argument("--output", help="Save results as JSON")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("📐 Embedding Dimension Benchmark")
+    print("=" * 60)
+
+    import embed_folder
+    embed_folder.load_environment()
+    if args.fake:
+        client = FakeOpenAI(latency=0.0, jitter=0.0)
+    else:
+        from openai import OpenAI
+        if not os.getenv("OPENAI_API_KEY"):
+            print("❌ OPENAI_API_KEY is not set (use --fake for a dry run)")
+            sys.exit(1)
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    chunks = load_chunks(args.folder, args.max_chunks, args.seed)
+    if not chunks:
+        print(f"❌ No chunks to benchmark in {args.folder}")
+        sys.exit(1)
+    if args.queries:
+        with open(args.queries, 'r', encoding='utf-8') as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = sample_queries(chunks, args.num_queries, args.seed)
+
+    def embed_matrix(texts: List[str], dimensions: int) -> np.ndarray:
+        embeddings = embed(client, texts, dimensions)
+        if any(embedding is None for embedding in embeddings):
+            print("❌ Some embeddings failed - rerun (successful ones are cached)")
+            sys.exit(1)
+        return shorten(np.asarray(embeddings, dtype=np.float32), dimensions)
+
+    print(f"\n🔄 Embedding {len(chunks)} chunks and {len(queries)} queries at {BASELINE_DIMENSIONS} dimensions...")
+    full_corpus = embed_matrix(chunks, BASELINE_DIMENSIONS)
+    full_queries = embed_matrix(queries, BASELINE_DIMENSIONS)
+    ks = sorted(set(args.k))
+    truth = exact_top_k(full_corpus, full_queries, max(ks))
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="dims-bench-") as workdir:
+        for dimensions in sorted(set(args.dims) | {BASELINE_DIMENSIONS}):
+            if dimensions == BASELINE_DIMENSIONS:
+                corpus, query_vectors = full_corpus, full_queries
+            elif args.native:
+                print(f"🔄 Embedding at {dimensions} dimensions...")
+                corpus, query_vectors = embed_matrix(chunks, dimensions), embed_matrix(queries, dimensions)
+            else:
+                corpus, query_vectors = shorten(full_corpus, dimensions), shorten(full_queries, dimensions)
+            results.append(measure(corpus, query_vectors, truth, ks, workdir))
+
+    print_report(results, ks, len(chunks), len(queries))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"chunks": len(chunks), "queries": len(queries), "results": results}, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
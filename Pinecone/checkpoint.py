@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Checkpoint journal for long ingestion runs
+
+An append-only binary journal written while embed_folder.py runs. It records
+- extracted files and their chunks (IDs, text and per-chunk metadata)
+- embeddings, as raw float32 vectors
+- upsert acknowledgements
+so `embed_folder.py --resume` can pick up exactly where a crashed or
+interrupted run stopped, without paying for the same embeddings twice.
+
+Record layout: 1-byte type, 4-byte little-endian payload length, payload.
+A torn record at the end of the file (crash mid-write) is ignored.
+"""
+
+import os
+import json
+import struct
+import threading
+from typing import List, Dict, Optional, Set
+
+import numpy as np
+
+
+RECORD_HEADER = struct.Struct('<cI')
+RECORD_FILE = b'F'       # JSON: {"path", "state", "info", "records"}
+RECORD_EMBEDDING = b'E'  # uint16 id length, id bytes, float32 values
+RECORD_UPSERTED = b'U'   # JSON: list of acknowledged vector IDs
+
+
+class CheckpointJournal:
+    """Append-only journal of ingestion progress for one index/namespace."""
+
+    def __init__(self, path: str, resume: bool = False):
+        """
+        Args:
+            path (str): Journal file location
+            resume (bool): Load the existing journal and keep appending to it;
+                otherwise any previous journal is discarded
+        """
+        self.path = path
+        # State of the previous run (only populated when resuming)
+        self.files: Dict[str, Dict] = {}
+        self.embeddings: Dict[str, np.ndarray] = {}
+        self.upserted: Set[str] = set()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if resume and os.path.exists(path):
+            self._load()
+        self._file = open(path, 'ab' if resume else 'wb')
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            kind, length = RECORD_HEADER.unpack_from(data, offset)
+            start = offset + RECORD_HEADER.size
+            if start + length > len(data):
+                break  # torn write at the tail
+            payload = data[start:start + length]
+            offset = start + length
+
+            if kind == RECORD_FILE:
+                entry = json.loads(payload.decode('utf-8'))
+                self.files[entry["path"]] = entry
+            elif kind == RECORD_EMBEDDING:
+                (id_len,) = struct.unpack_from('<H', payload, 0)
+                vector_id = payload[2:2 + id_len].decode('utf-8')
+                self.embeddings[vector_id] = np.frombuffer(payload, dtype='<f4', offset=2 + id_len)
+            elif kind == RECORD_UPSERTED:
+                self.upserted.update(json.loads(payload.decode('utf-8')))
+
+        if offset < len(data):
+            # Drop the torn tail so new records start on a clean boundary
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+
+    def _append(self, records: List[bytes]):
+        with self._lock:
+            for record in records:
+                self._file.write(record)
+            self._file.flush()
+
+    @staticmethod
+    def _record(kind: bytes, payload: bytes) -> bytes:
+        return RECORD_HEADER.pack(kind, len(payload)) + payload
+
+    def record_file(self, path: str, state: Dict, info: Dict, records: List[Dict]):
+        """Journal an extracted, chunked file."""
+        entry = {
+            "path": path,
+            "state": {k: state[k] for k in ("size", "mtime", "sha256")},
+            "info": info,
+            "records": [{k: v for k, v in record.items() if k not in ("info", "file_state")} for record in records],
+        }
+        self._append([self._record(RECORD_FILE, json.dumps(entry, ensure_ascii=False).encode('utf-8'))])
+
+    def record_embeddings(self, vector_ids: List[str], embeddings: List[Optional[np.ndarray]]):
+        """Journal embeddings (failed ones are skipped)."""
+        records = []
+        for vector_id, embedding in zip(vector_ids, embeddings):
+            if embedding is None:
+                continue
+            id_bytes = vector_id.encode('utf-8')
+            payload = struct.pack('<H', len(id_bytes)) + id_bytes + np.asarray(embedding, dtype='<f4').tobytes()
+            records.append(self._record(RECORD_EMBEDDING, payload))
+        if records:
+            self._append(records)
+
+    def record_upserted(self, vector_ids: List[str]):
+        """Journal an upsert acknowledgement."""
+        self._append([self._record(RECORD_UPSERTED, json.dumps(vector_ids).encode('utf-8'))])
+
+    def resumable_records(self, path: str, sha256: str) -> Optional[List[Dict]]:
+        """Chunk records for a file journaled by a previous run, if the file is unchanged since."""
+        entry = self.files.get(path)
+        if not entry or entry["state"]["sha256"] != sha256:
+            return None
+        return [dict(record, info=entry["info"]) for record in entry["records"]]
+
+    def close(self, remove: bool = False):
+        """Close the journal; remove it once the run has fully completed."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Offset-based text chunker
+
+Produces exactly the chunks of the LangChain RecursiveCharacterTextSplitter
+that embed_folder.py used to build per call (same separators, keep_separator=True,
+whitespace stripped, empty chunks dropped), so chunk IDs of existing corpora do
+not change. The splitter's algorithm is followed step by step:
+
+- a segment is split at every occurrence of the first separator it contains
+  (paragraphs, lines, words, punctuation, characters), keeping the separator
+  at the start of the following piece
+- pieces shorter than chunk_size are merged left to right; when the next piece
+  does not fit, a chunk is emitted and whole pieces are dropped from its start
+  until the rest fits the overlap
+- longer pieces are split again with the next separators
+
+but on (start, end) offsets into the text instead of lists of substrings: no
+regex splits, no joins, and callers copy only the chunks they keep. Splitting
+on a separator a segment does not contain yields the segment itself, which is
+what skipping that separator does, so segment ends can be found lazily.
+
+Build one TextChunker and reuse it; get_chunker() caches them per setting.
+split_stream() chunks text that arrives in parts (PDF pages) while holding
+only about two chunks of it.
+
+TokenChunker is the token-window alternative: it tokenizes a document once and
+derives chunk boundaries, overlap, per-chunk token counts and the document's
+total token count from that single tokenization.
+"""
+
+from collections import deque
+from functools import lru_cache
+from typing import List, Tuple, Sequence, Iterable, Iterator, Optional, Callable
+
+
+SEPARATORS = (
+    "\n\n",    # Double newline (paragraphs)
+    "\n",      # Single newline (lines)
+    " ",       # Space (words)
+    ".",       # Period
+    ",",       # Comma
+    "\u200b",  # Zero-width space
+    "\uff0c",  # Full-width comma
+    "\u3001",  # Ideographic comma
+    "\uff0e",  # Full-width period
+    "\u3002",  # Ideographic period
+    "",        # Last resort - split by character
+)
+
+
+class _TextBuffer:
+    """A text held in memory as a whole (split_offsets)."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def find(self, sep: str, start: int, stop: int) -> int:
+        return self.text.find(sep, start, stop)
+
+    def end_before(self, limit: int) -> Optional[int]:
+        """End of the text if it is before `limit`, else None."""
+        return len(self.text) if len(self.text) < limit else None
+
+    def horizon(self, limit: int) -> int:
+        """How far to look for a segment's end when `limit` is needed (all of an in-memory text)."""
+        return len(self.text) + 1
+
+    def char(self, index: int) -> str:
+        return self.text[index]
+
+    def slice(self, start: int, end: int) -> str:
+        return self.text[start:end]
+
+    def discard(self, position: int):
+        pass
+
+
+class _StreamBuffer(_TextBuffer):
+    """The joined text of parts that are read as lookups reach them, with the consumed prefix dropped."""
+
+    def __init__(self, parts: Iterable[str], joiner: str):
+        super().__init__("")
+        self.parts = iter(parts)
+        self.joiner = joiner
+        self.base = 0  # Offset of text[0] in the joined text
+        self.first = True
+        self.exhausted = False
+
+    def _load(self, stop: int):
+        while not self.exhausted and self.base + len(self.text) < stop:
+            part = next(self.parts, None)
+            if part is None:
+                self.exhausted = True
+            elif self.first:
+                self.text, self.first = self.text + part, False
+            else:
+                self.text += self.joiner + part
+
+    def find(self, sep: str, start: int, stop: int) -> int:
+        self._load(stop)
+        found = self.text.find(sep, start - self.base, stop - self.base)
+        return found + self.base if found != -1 else -1
+
+    def end_before(self, limit: int) -> Optional[int]:
+        self._load(limit)
+        end = self.base + len(self.text)
+        return end if self.exhausted and end < limit else None
+
+    def horizon(self, limit: int) -> int:
+        return limit  # Never read further than the chunk being built needs
+
+    def char(self, index: int) -> str:
+        return self.text[index - self.base]
+
+    def slice(self, start: int, end: int) -> str:
+        return self.text[start - self.base:end - self.base]
+
+    def discard(self, position: int):
+        # Text before `position` is never looked at again (dropped in halves to keep copying linear)
+        if position - self.base > len(self.text) // 2:
+            self.text = self.text[position - self.base:]
+            self.base = position
+
+
+class _SegmentEnd:
+    """End of a piece being split further: the next occurrence of its separator, or its parent's end."""
+
+    def __init__(self, buffer: _TextBuffer, sep: str, scan: int, parent: Callable[[int], Optional[int]]):
+        self.buffer = buffer
+        self.sep = sep
+        self.scan = scan  # No occurrence of `sep` starts in [piece start, scan) past this point
+        self.parent = parent
+        self.found: Optional[int] = None
+
+    def __call__(self, limit: int) -> Optional[int]:
+        """The piece's end if it is before `limit`, else None."""
+        parent_end = self.parent(limit)
+        if self.found is None and self.scan < limit:
+            # Only separators that end inside the parent segment count
+            stop = limit - 1 + len(self.sep) if parent_end is None else min(limit - 1 + len(self.sep), parent_end)
+            found = self.buffer.find(self.sep, self.scan, stop)
+            if found == -1:
+                self.scan = limit
+            else:
+                self.found = found
+        if self.found is not None and self.found < limit:
+            return self.found
+        return parent_end
+
+    def at_separator(self, end: int) -> bool:
+        """Whether the piece ended at its separator (not at its parent's end)."""
+        return end == self.found and self.parent(end + 1) is None
+
+
+class TextChunker:
+    """Reusable RecursiveCharacterTextSplitter-equivalent chunker returning character offsets."""
+
+    def __init__(self, chunk_size: int, chunk_overlap: int, separators: Sequence[str] = SEPARATORS):
+        """
+        Args:
+            chunk_size (int): Maximum chunk length in characters
+            chunk_overlap (int): Maximum overlap between consecutive chunks in characters
+            separators: Separators in priority order ("" = split anywhere)
+        """
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = tuple(sep for sep in separators if sep)
+        self.split_characters = "" in separators
+
+    @staticmethod
+    def _trim(buffer: _TextBuffer, start: int, end: int) -> Tuple[int, int]:
+        while start < end and buffer.char(start).isspace():
+            start += 1
+        while end > start and buffer.char(end - 1).isspace():
+            end -= 1
+        return start, end
+
+    def _split_segment(self, buffer: _TextBuffer, start: int, level: int,
+                       segment_end: Callable[[int], Optional[int]]):
+        """
+        Chunk the segment starting at `start` on separator `level` (LangChain's _split_text).
+
+        `segment_end(limit)` is the segment's end if it is before `limit`. Yields trimmed,
+        non-empty (start, end) chunks and returns the segment's end.
+        """
+        size, overlap = self.chunk_size, self.chunk_overlap
+        sep = self.separators[level] if level < len(self.separators) else None
+        group: deque = deque()  # Pieces of the chunk being merged (LangChain's current_doc)
+        total = 0
+
+        def emit():
+            s, e = self._trim(buffer, group[0][0], group[-1][1])
+            return (s, e) if s < e else None
+
+        find, discard = buffer.find, buffer.discard
+        end = None  # The segment's end, once known
+        pos = scan = start
+        while True:
+            discard(group[0][0] if group else pos)
+            limit = pos + size  # A piece is merged if it ends before this
+            if end is None:
+                end = segment_end(buffer.horizon(limit))
+            if end is not None and end <= pos:
+                break
+            piece_end, at_end, oversize = None, False, False
+            if sep is not None:
+                stop = limit - 1 + len(sep) if end is None else min(limit - 1 + len(sep), end)
+                match = find(sep, scan, stop)
+                if match != -1:
+                    if match == pos:
+                        scan = pos + len(sep)  # Empty piece before a separator at the segment start
+                        continue
+                    piece_end = match
+                elif end is not None and end < limit:
+                    piece_end, at_end = end, True
+                else:
+                    oversize = True
+            elif self.split_characters:
+                piece_end, at_end = pos + 1, end == pos + 1
+                oversize = size <= 1
+            elif end is not None and end < limit:
+                piece_end, at_end = end, True
+            else:
+                oversize = True
+
+            if not oversize:
+                # LangChain's _merge_splits, one piece at a time
+                length = piece_end - pos
+                if total + length > size and group:
+                    chunk = emit()
+                    if chunk:
+                        yield chunk
+                    while total > overlap or (total + length > size and total > 0):
+                        first_start, first_end = group.popleft()
+                        total -= first_end - first_start
+                group.append((pos, piece_end))
+                total += length
+                pos = piece_end
+                if at_end:
+                    break
+                scan = pos + (len(sep) if sep is not None else 0)
+                continue
+
+            # Oversize piece: close the merged run, then split the piece on its own
+            if group:
+                chunk = emit()
+                if chunk:
+                    yield chunk
+                group.clear()
+                total = 0
+            if sep is None:
+                # Nothing left to split on: the piece is a chunk as it is
+                if self.split_characters:
+                    piece_end = pos + 1
+                else:
+                    while end is None:
+                        limit += size
+                        end = segment_end(limit)
+                    piece_end, at_end = end, True
+                s, e = self._trim(buffer, pos, piece_end)
+                if s < e:
+                    yield s, e
+                pos = scan = piece_end
+                if at_end:
+                    break
+                continue
+            piece = _SegmentEnd(buffer, sep, scan, segment_end)
+            piece_end = yield from self._split_segment(buffer, pos, level + 1, piece)
+            if not piece.at_separator(piece_end):
+                return piece_end
+            pos, scan = piece_end, piece_end + len(sep)
+
+        if group:
+            chunk = emit()
+            if chunk:
+                yield chunk
+        return pos
+
+    def split_offsets(self, text: str) -> List[Tuple[int, int]]:
+        """Chunk `text`, returning trimmed (start, end) offsets of non-empty chunks."""
+        buffer = _TextBuffer(text)
+        return list(self._split_segment(buffer, 0, 0, buffer.end_before))
+
+    def split(self, text: str) -> List[str]:
+        """Chunk `text`, returning the chunk strings."""
+        return [text[s:e] for s, e in self.split_offsets(text)]
+
+    def split_stream(self, parts: Iterable[str], joiner: str = "\n") -> Iterator[Tuple[int, int, str]]:
+        """
+        Chunk text that arrives in parts (e.g. PDF pages) without holding all of it.
+
+        Produces the same chunks as split_offsets(joiner.join(parts)): every lookup
+        made for a chunk stays within about chunk_size characters past its start, so
+        only that much text (plus the part being added) is buffered and chunks carry
+        on across part boundaries.
+
+        Yields:
+            (start, end, chunk): offsets into the joined text and the chunk string
+        """
+        buffer = _StreamBuffer(parts, joiner)
+        for start, end in self._split_segment(buffer, 0, 0, buffer.end_before):
+            yield start, end, buffer.slice(start, end)
+
+
+@lru_cache(maxsize=None)
+def get_chunker(chunk_size: int, chunk_overlap: int) -> TextChunker:
+    """Shared chunker for a size/overlap setting (built once per process)."""
+    return TextChunker(chunk_size, chunk_overlap)
+
+
+# UTF-8 continuation bytes (0x80-0xBF): deleting them from a byte string leaves one byte per character
+_UTF8_CONTINUATION = bytes(range(0x80, 0xC0))
+
+
+def _char_length(data: bytes) -> int:
+    """Number of characters in a UTF-8 byte string (without decoding it)."""
+    return len(data.translate(None, _UTF8_CONTINUATION))
+
+
+class TokenChunker:
+    """Token-window chunker: tokenizes a document once and reuses the tokens for everything."""
+
+    def __init__(self, encoding, chunk_tokens: int, overlap_tokens: int, snap_fraction: float = 0.2):
+        """
+        Args:
+            encoding: tiktoken encoding
+            chunk_tokens (int): Maximum tokens per chunk
+            overlap_tokens (int): Tokens shared by consecutive chunks
+            snap_fraction (float): Fraction of the window, from its end, searched
+                for a line or word boundary to end the chunk on
+        """
+        if overlap_tokens >= chunk_tokens:
+            raise ValueError(f"overlap_tokens ({overlap_tokens}) must be smaller than chunk_tokens ({chunk_tokens})")
+        self.encoding = encoding
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.snap_tokens = int(chunk_tokens * snap_fraction)
+
+    def _token_bytes(self, token: int) -> bytes:
+        return self.encoding.decode_single_token_bytes(token)
+
+    def _window_end(self, tokens: List[int], start: int) -> int:
+        """End of the window starting at `start`, moved back to a line or word boundary if one is near."""
+        end = min(start + self.chunk_tokens, len(tokens))
+        if end == len(tokens):
+            return end
+        lowest = max(start + 1, end - self.snap_tokens)
+        for prefix in (b"\n", b" "):
+            for i in range(end, lowest - 1, -1):
+                if self._token_bytes(tokens[i]).startswith(prefix):
+                    return i
+        return end
+
+    def split(self, text: str) -> Tuple[List[Tuple[int, int, int]], int]:
+        """
+        Chunk `text` into token windows.
+
+        Returns:
+            (spans, total_tokens): (char start, char end, token count) per chunk,
+            whitespace-trimmed, and the token count of the whole document
+        """
+        tokens = self.encoding.encode(text, disallowed_special=())
+        spans: List[Tuple[int, int, int]] = []
+        # Character position of token boundaries, advanced incrementally (each token decoded once)
+        position_token, position_char = 0, 0
+
+        def char_offset(index: int) -> int:
+            nonlocal position_token, position_char
+            if index > position_token:
+                position_char += _char_length(self.encoding.decode_bytes(tokens[position_token:index]))
+            elif index < position_token:
+                position_char -= _char_length(self.encoding.decode_bytes(tokens[index:position_token]))
+            position_token = index
+            return position_char
+
+        start = 0
+        while start < len(tokens):
+            end = self._window_end(tokens, start)
+            # Drop whitespace-only tokens at the edges so counts match the trimmed text
+            s, e = start, end
+            while s < e and self._token_bytes(tokens[s]).isspace():
+                s += 1
+            while e > s and self._token_bytes(tokens[e - 1]).isspace():
+                e -= 1
+            if s < e:
+                char_start = char_offset(s)
+                char_end = char_offset(e)
+                # A token may still carry leading/trailing whitespace (" word")
+                while char_start < char_end and text[char_start].isspace():
+                    char_start += 1
+                while char_end > char_start and text[char_end - 1].isspace():
+                    char_end -= 1
+                if char_start < char_end:
+                    spans.append((char_start, min(char_end, len(text)), e - s))
+            if end >= len(tokens):
+                break
+            start = max(start + 1, end - self.overlap_tokens)
+        return spans, len(tokens)
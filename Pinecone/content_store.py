@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Local compressed chunk content store
+
+With PINECONE_CONTENT_STORE enabled, embed_folder.py keeps chunk text out of
+the vector metadata: each chunk is written here, zlib-compressed and keyed by
+its vector ID, and Pinecone only receives small filterable fields. Upsert
+requests and query responses shrink accordingly, and chunks never need to be
+truncated to fit the metadata limit.
+
+query_interface.py fetches the text of all matches with one batched lookup.
+One SQLite file per index/namespace pair.
+"""
+
+import os
+import re
+import zlib
+import sqlite3
+import threading
+from typing import List, Dict, Optional, Iterable, Tuple
+
+
+SQLITE_MAX_PARAMS = 900  # Stay below SQLite's bound-parameter limit per statement
+COMPRESSION_LEVEL = 6
+
+
+def content_store_path(root: str, index_name: str, namespace: Optional[str]) -> str:
+    """Location of the content store for an index/namespace pair."""
+    def slug(name: str) -> str:
+        return re.sub(r'[^A-Za-z0-9._-]+', '-', name).strip('-.') or 'default'
+    return os.path.join(root, f"{slug(index_name)}__{slug(namespace or 'default')}.sqlite")
+
+
+class ContentStore:
+    """SQLite table of zlib-compressed chunk texts keyed by vector ID."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stats: Dict[str, int] = {"writes": 0, "raw_bytes": 0, "stored_bytes": 0}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS content ("
+            " id TEXT PRIMARY KEY,"
+            " data BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def put_many(self, items: Iterable[Tuple[str, str]]):
+        """Store (vector ID, text) pairs, replacing existing entries."""
+        rows = []
+        for vector_id, text in items:
+            raw = text.encode('utf-8')
+            data = zlib.compress(raw, COMPRESSION_LEVEL)
+            rows.append((vector_id, data))
+            self.stats["raw_bytes"] += len(raw)
+            self.stats["stored_bytes"] += len(data)
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO content (id, data) VALUES (?, ?)", rows)
+            self._conn.commit()
+            self.stats["writes"] += len(rows)
+
+    def get_many(self, ids: List[str]) -> Dict[str, str]:
+        """Look up the text of several vectors at once (missing IDs are left out)."""
+        found: Dict[str, str] = {}
+        unique_ids = list(dict.fromkeys(ids))
+        with self._lock:
+            for start in range(0, len(unique_ids), SQLITE_MAX_PARAMS):
+                batch = unique_ids[start:start + SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT id, data FROM content WHERE id IN ({placeholders})", batch
+                ).fetchall()
+                found.update((vector_id, zlib.decompress(data).decode('utf-8')) for vector_id, data in rows)
+        return found
+
+    def delete_many(self, ids: List[str]):
+        """Remove the text of deleted vectors."""
+        if not ids:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM content WHERE id = ?", [(vector_id,) for vector_id in ids])
+            self._conn.commit()
+
+    def compression_ratio(self) -> float:
+        """Raw / stored bytes of the texts written by this process."""
+        return self.stats["raw_bytes"] / self.stats["stored_bytes"] if self.stats["stored_bytes"] else 0.0
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -108,7 +108,7 @@ def main():
     # Default configuration
     default_config = {
         "index_name": os.getenv("PINECONE_INDEX_NAME"),
-        "dimension": 1536,  # OpenAI text-embedding-ada-002 dimension
+        "dimension": int(os.getenv("OPENAI_EMBED_DIMENSIONS", "1536")),  # text-embedding-3 (shortened: 256/512/768/1024)
         "metric": "cosine",
         "cloud": "aws",
         "region": "us-east-1"
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate chunk detection for embed_folder.py
+
+Folders often hold many copies of the same boilerplate (headers, disclaimers,
+slightly edited versions of one PDF). Embedding and storing every copy wastes
+API calls and index space, so the chunking stage checks each chunk against the
+chunks already seen in the run:
+
+- each chunk is reduced to a MinHash signature over its word shingles
+- signatures are bucketed with LSH (banding), so a lookup only compares the
+  few chunks that share a band instead of every chunk seen so far
+- a candidate counts as a duplicate when the estimated Jaccard similarity of
+  the two shingle sets reaches the threshold
+
+A duplicate is not embedded or uploaded; it points at the vector ID of the first
+(canonical) chunk with the same content.
+
+Signatures can be saved next to the manifest and loaded by the next run, so an
+incremental run also finds duplicates of chunks in files it does not re-read.
+"""
+
+import os
+import zlib
+import threading
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple, Iterable
+
+import numpy as np
+
+
+NUM_PERM = 128           # MinHash permutations (signature length)
+SHINGLE_WORDS = 3        # Words per shingle
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _false_rates(threshold: float, bands: int, rows: int) -> Tuple[float, float]:
+    """Probability mass of false positives (below threshold) and false negatives (above) for a banding."""
+    below = np.linspace(0.0, threshold, 200)
+    above = np.linspace(threshold, 1.0, 200)
+    false_positive = np.mean(1 - (1 - below ** rows) ** bands) * threshold
+    false_negative = np.mean((1 - above ** rows) ** bands) * (1 - threshold)
+    return float(false_positive), float(false_negative)
+
+
+@lru_cache(maxsize=None)
+def optimal_bands(threshold: float, num_perm: int = NUM_PERM) -> Tuple[int, int]:
+    """(bands, rows per band) minimising false positives + false negatives for a threshold."""
+    best, best_error = (1, num_perm), float('inf')
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positive, false_negative = _false_rates(threshold, bands, rows)
+            if false_positive + false_negative < best_error:
+                best, best_error = (bands, rows), false_positive + false_negative
+    return best
+
+
+class NearDuplicateDetector:
+    """MinHash + LSH index of the chunks seen so far."""
+
+    def __init__(self, threshold: float, num_perm: int = NUM_PERM, shingle_words: int = SHINGLE_WORDS, seed: int = 1):
+        """
+        Args:
+            threshold (float): Jaccard similarity (0-1] of word shingles at which chunks are duplicates
+            num_perm (int): MinHash signature length
+            shingle_words (int): Words per shingle
+            seed (int): Seed of the hash permutations
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_words = shingle_words
+        self.seed = seed
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(self.bands)]
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.duplicates = 0
+
+    def _shingles(self, text: str) -> np.ndarray:
+        words = text.lower().split()
+        if len(words) <= self.shingle_words:
+            shingles = {" ".join(words)} if words else set()
+        else:
+            shingles = {" ".join(words[i:i + self.shingle_words]) for i in range(len(words) - self.shingle_words + 1)}
+        return np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of a text (None if it has no words)."""
+        hashes = self._shingles(text)
+        if hashes.size == 0:
+            return None
+        # (a * x + b) mod p, truncated to 32 bits - every product fits in uint64
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def check(self, key: str, text: str) -> Optional[str]:
+        """
+        Look up a chunk, indexing it as canonical if it is new.
+
+        Args:
+            key (str): Vector ID of the chunk
+            text (str): Chunk text
+
+        Returns:
+            Optional[str]: Vector ID of the canonical chunk this one duplicates, or None
+        """
+        signature = self.signature(text)
+        with self._lock:
+            self.checked += 1
+            if signature is None:
+                return None
+            band_keys = self._band_keys(signature)
+
+            seen = set()
+            for buckets, band_key in zip(self._buckets, band_keys):
+                for candidate in buckets.get(band_key, ()):
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    if np.mean(self._signatures[candidate] == signature) >= self.threshold:
+                        self.duplicates += 1
+                        return candidate
+
+            self._index(key, signature, band_keys)
+            return None
+
+    def _index(self, key: str, signature: np.ndarray, band_keys: List[bytes]):
+        self._signatures[key] = signature
+        for buckets, band_key in zip(self._buckets, band_keys):
+            buckets.setdefault(band_key, []).append(key)
+
+    def _params(self) -> np.ndarray:
+        return np.array([self.threshold, self.num_perm, self.shingle_words, self.seed], dtype=np.float64)
+
+    def save(self, path: str, keys: Iterable[str]):
+        """
+        Write the signatures of `keys` (the canonical chunks now in the index) atomically.
+
+        Keys the detector has no signature for are left out.
+        """
+        with self._lock:
+            kept = [key for key in dict.fromkeys(keys) if key in self._signatures]
+            signatures = (np.stack([self._signatures[key] for key in kept]) if kept
+                          else np.zeros((0, self.num_perm), dtype=np.uint32))
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, params=self._params(), keys=np.array(kept, dtype=str), signatures=signatures)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str, keys: Iterable[str]) -> int:
+        """
+        Index the saved signatures of `keys` as canonical chunks.
+
+        Args:
+            path (str): File written by save()
+            keys (Iterable[str]): Vector IDs still in the index and not replaced by this run
+
+        Returns:
+            int: Number of signatures loaded (0 if the file is missing, unreadable or
+                written with other detector settings)
+        """
+        if not os.path.exists(path):
+            return 0
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if not np.array_equal(data["params"], self._params()):
+                    return 0
+                stored_keys, signatures = data["keys"].tolist(), data["signatures"]
+        except Exception as e:
+            print(f"⚠️  Could not read duplicate signatures {path}: {e} (checking this run's chunks only)")
+            return 0
+        wanted = set(keys)
+        loaded = 0
+        with self._lock:
+            for key, signature in zip(stored_keys, signatures):
+                if key in wanted and key not in self._signatures:
+                    self._index(key, signature, self._band_keys(signature))
+                    loaded += 1
+        return loaded
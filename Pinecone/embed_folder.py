@@ -10,26 +10,74 @@ Folder Embedding Script for Pinecone
 import os
 import sys
 import json
+import argparse
 import hashlib
 import re
+import time
+import queue
+import threading
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Iterator, Callable
 from datetime import datetime
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from bisect import bisect_right
 
 from dotenv import load_dotenv
+import numpy as np
 import tiktoken
 
 # OpenAI and Pinecone
 from openai import OpenAI
 from pinecone import Pinecone
 
-# Text splitting
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+# Text splitting (offset-based, same chunks as RecursiveCharacterTextSplitter)
+from chunker import get_chunker, TokenChunker
 
 # File processing
 import pypdf
 from docx import Document
 
+# Incremental re-indexing
+from manifest import IngestManifest, file_content_hash
+
+# Concurrent, rate-limited embedding
+from embedding_engine import EmbeddingEngine
+
+# Persistent embedding cache
+from embedding_cache import EmbeddingCache
+
+# Token-budget batch packing
+from batch_packer import split_oversize, pack_batches, packing_report, merge_split_embeddings
+
+# Parallel, retrying, resumable upserts
+from upserter import ParallelUpserter
+
+# Checkpoint journal (--resume)
+from checkpoint import CheckpointJournal
+
+# Process-pool document extraction
+from parallel_extract import extract_files, default_worker_count
+
+# Pluggable vector store (Pinecone or local memory-mapped index)
+from vector_store import get_vector_client
+
+# Watch mode (watchdog events or polling)
+from watch_folder import FolderWatcher
+
+# Local compressed chunk text store (keeps content out of vector metadata)
+from content_store import ContentStore, content_store_path
+
+# Answers cached by query_interface.py (invalidated when their chunks change)
+from answer_cache import AnswerCache
+
+# Near-duplicate chunk suppression (MinHash + LSH)
+from dedup import NearDuplicateDetector
+
+# Per-stage timing/resource metrics (JSON lines + end-of-run summary)
+from run_metrics import RunMetrics, metrics_paths, timed, timed_iter, print_run_summary
+
 # Optional transliteration (nice-to-have)
 try:
     from unidecode import unidecode  # pip install Unidecode
@@ -49,14 +97,87 @@ NAMESPACE  = os.getenv("PINECONE_NAMESPACE", "tesla")     # ASCII only; comment
 
 # OpenAI Embedding Configuration (matching the interface settings)
 EMBED_MODEL = "text-embedding-3-small"
-EMBED_DIMENSIONS = 1536  # Vector dimensions
-EMBED_BATCH_SIZE = 128   # Batch size for processing
+# Shortened text-embedding-3 vectors (256/512/768/1024) trade a little recall for smaller,
+# faster indexes - the index and query_interface.py must use the same value
+EMBED_DIMENSIONS = int(os.getenv("OPENAI_EMBED_DIMENSIONS", "1536"))  # Vector dimensions
+EMBED_BATCH_SIZE = 512   # Max inputs per request (token budget below decides the actual packing)
+EMBED_BATCH_TOKENS = int(os.getenv("OPENAI_EMBED_BATCH_TOKENS", "50000"))   # Target tokens per request
+EMBED_MAX_INPUT_TOKENS = 8191  # Per-input limit of text-embedding-3 models; longer inputs are split
 EMBED_TIMEOUT = 300000   # Timeout in milliseconds (300 seconds)
+EMBED_CONCURRENCY = int(os.getenv("OPENAI_EMBED_CONCURRENCY", "4"))      # Requests in flight
+EMBED_RPM = int(os.getenv("OPENAI_EMBED_RPM", "3000"))                   # Requests per minute budget
+EMBED_TPM = int(os.getenv("OPENAI_EMBED_TPM", "1000000"))                # Tokens per minute budget
+EMBED_MAX_RETRIES = int(os.getenv("OPENAI_EMBED_MAX_RETRIES", "6"))      # Attempts per request on 429/5xx
 
 # Recursive Character Text Splitter Configuration (matching the interface settings)
 CHUNK_SIZE = 1000        # Chunk size in characters
 CHUNK_OVERLAP = 120      # Chunk overlap in characters
 
+# Token-window chunking (PINECONE_CHUNK_MODE=tokens): each document is tokenized once and
+# that tokenization gives chunk boundaries, overlap, per-chunk and document token counts
+CHUNK_MODE = os.getenv("PINECONE_CHUNK_MODE", "chars").strip().lower()      # "chars" or "tokens"
+CHUNK_TOKENS = int(os.getenv("PINECONE_CHUNK_TOKENS", "256"))               # Tokens per chunk
+CHUNK_TOKEN_OVERLAP = int(os.getenv("PINECONE_CHUNK_TOKEN_OVERLAP", "32"))  # Tokens shared by neighbours
+
+# Near-duplicate suppression: chunks whose word-shingle Jaccard similarity to an earlier chunk
+# reaches the threshold point at that chunk's vector instead of being embedded (0 = off)
+DEDUP_THRESHOLD = float(os.getenv("PINECONE_DEDUP_THRESHOLD", "0"))
+
+# Incremental re-indexing (skip unchanged files, delete stale vectors)
+INCREMENTAL = os.getenv("PINECONE_INCREMENTAL", "true").strip().lower() in ("1", "true", "yes")
+MANIFEST_DIR = os.getenv("PINECONE_MANIFEST_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".manifests"))
+
+# Streaming pipeline (extract -> chunk -> embed -> upsert with bounded queues)
+STREAMING = os.getenv("PINECONE_STREAMING", "false").strip().lower() in ("1", "true", "yes")
+PIPELINE_QUEUE_SIZE = int(os.getenv("PINECONE_PIPELINE_QUEUE_SIZE", "4"))  # Documents/batches buffered per stage
+
+# Persistent embedding cache (SQLite, keyed by model + dimensions + text)
+EMBED_CACHE = os.getenv("OPENAI_EMBED_CACHE", "true").strip().lower() in ("1", "true", "yes")
+EMBED_CACHE_PATH = os.getenv("OPENAI_EMBED_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "embeddings.sqlite"))
+EMBED_CACHE_MAX_MB = int(os.getenv("OPENAI_EMBED_CACHE_MAX_MB", "2048"))  # LRU eviction beyond this size
+
+# Parallel extraction (PDF/DOCX parsing on a process pool)
+EXTRACT_WORKERS = int(os.getenv("PINECONE_EXTRACT_WORKERS", str(default_worker_count())))  # 1 = no pool
+EXTRACT_TIMEOUT = float(os.getenv("PINECONE_EXTRACT_TIMEOUT", "300"))   # Seconds per file / page range
+PDF_PAGES_PER_TASK = int(os.getenv("PINECONE_PDF_PAGES_PER_TASK", "100"))  # Split large PDFs (0 = never)
+
+# Page streaming: PDFs at least PDF_STREAM_MIN_MB are read page by page straight into the
+# chunker instead of being joined into one string (character chunking only)
+PDF_STREAMING = os.getenv("PINECONE_PDF_STREAMING", "false").strip().lower() in ("1", "true", "yes")
+PDF_STREAM_MIN_MB = float(os.getenv("PINECONE_PDF_STREAM_MIN_MB", "10"))
+
+UPSERT_BATCH_SIZE = 100  # Vectors per Pinecone upsert request
+UPSERT_WORKERS = int(os.getenv("PINECONE_UPSERT_WORKERS", "4"))          # Upsert requests in flight
+UPSERT_MAX_RETRIES = int(os.getenv("PINECONE_UPSERT_MAX_RETRIES", "5"))  # Attempts per batch
+
+# Content store: chunk text goes to a local compressed SQLite file keyed by vector ID instead
+# of metadata["content"], so vectors carry only small fields (query_interface.py reads it back)
+CONTENT_STORE = os.getenv("PINECONE_CONTENT_STORE", "false").strip().lower() in ("1", "true", "yes")
+CONTENT_STORE_DIR = os.getenv("PINECONE_CONTENT_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".content"))
+
+# Semantic answer cache of query_interface.py - answers built on re-ingested or removed chunks are dropped
+ANSWER_CACHE_DIR = os.getenv("ANSWER_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "answers"))
+
+# Watch mode (embed_folder.py --watch): debounced re-sync of changed files
+WATCH_BACKEND = os.getenv("PINECONE_WATCH_BACKEND", "auto").strip().lower()   # auto, watchdog or polling
+WATCH_DEBOUNCE = float(os.getenv("PINECONE_WATCH_DEBOUNCE", "2"))              # Quiet seconds before syncing
+WATCH_MAX_DELAY = float(os.getenv("PINECONE_WATCH_MAX_DELAY", "30"))           # Longest wait during event bursts
+WATCH_POLL_INTERVAL = float(os.getenv("PINECONE_WATCH_POLL_INTERVAL", "5"))    # Seconds between polling scans
+WATCH_FULL_SYNC_MINUTES = float(os.getenv("PINECONE_WATCH_FULL_SYNC_MINUTES", "60"))  # 0 = never
+
+# Multi-corpus ingestion (ingest_many / --job): folders processed at the same time.
+# Concurrent jobs share one embedding thread pool and rate limiter; extraction workers are split between them.
+INGEST_PARALLEL = int(os.getenv("PINECONE_INGEST_PARALLEL", "2"))
+
+# Run metrics: wall/CPU time, items and bytes per stage, compared with the previous run
+METRICS = os.getenv("PINECONE_METRICS", "true").strip().lower() in ("1", "true", "yes")
+METRICS_DIR = os.getenv("PINECONE_METRICS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".metrics"))
+
+# Vector store backend: "pinecone" (hosted) or "local" (memory-mapped NumPy index on disk)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone").strip().lower()
+LOCAL_VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".vectors"))
+SUPPORTED_EXTENSIONS = {'.pdf', '.docx', '.doc', '.txt', '.md', '.rtf'}
+
 def load_environment():
     """Load environment variables from .env file if it exists."""
     env_file = os.path.join(os.path.dirname(__file__), '.env')
@@ -68,7 +189,7 @@ def load_environment():
 
 
 def initialize_clients() -> Tuple[Optional[OpenAI], Optional[Pinecone]]:
-    """Initialize OpenAI and Pinecone clients."""
+    """Initialize OpenAI and vector store (Pinecone or local) clients."""
     try:
         openai_api_key = os.getenv('OPENAI_API_KEY')
         pinecone_api_key = os.getenv('PINECONE_API_KEY')
@@ -76,15 +197,18 @@ def initialize_clients() -> Tuple[Optional[OpenAI], Optional[Pinecone]]:
         if not openai_api_key:
             print("❌ Error: OPENAI_API_KEY not found!")
             return None, None
-        if not pinecone_api_key:
+        if VECTOR_BACKEND == "pinecone" and not pinecone_api_key:
             print("❌ Error: PINECONE_API_KEY not found!")
             return None, None
 
         print("🔄 Initializing OpenAI client...")
         openai_client = OpenAI(api_key=openai_api_key)
 
-        print("🔄 Initializing Pinecone client...")
-        pinecone_client = Pinecone(api_key=pinecone_api_key)
+        if VECTOR_BACKEND == "local":
+            print(f"🔄 Opening local vector store at {LOCAL_VECTOR_STORE_PATH}...")
+        else:
+            print("🔄 Initializing Pinecone client...")
+        pinecone_client = get_vector_client(VECTOR_BACKEND, pinecone_api_key, LOCAL_VECTOR_STORE_PATH)
 
         return openai_client, pinecone_client
     except Exception as e:
@@ -92,53 +216,67 @@ def initialize_clients() -> Tuple[Optional[OpenAI], Optional[Pinecone]]:
         return None, None
 
 
+@lru_cache(maxsize=None)
+def get_tokenizer(model: str = EMBED_MODEL):
+    """Load the tiktoken encoding for a model once and reuse it."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+@lru_cache(maxsize=None)
+def try_get_tokenizer(model: str = EMBED_MODEL):
+    """The model's tokenizer, or None when it cannot be loaded (e.g. the BPE file is not cached offline)."""
+    try:
+        return get_tokenizer(model)
+    except Exception as e:
+        print(f"⚠️  Tokenizer for {model} unavailable ({e}), estimating token counts")
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count used when no tokenizer is available."""
+    return int(len(text.split()) * 1.3)
+
+
 def count_tokens(text: str, model: str = EMBED_MODEL) -> int:
     """Count tokens for the given model (rough fallback if needed)."""
+    encoding = try_get_tokenizer(model)
+    if encoding is None:
+        return estimate_tokens(text)
     try:
-        encoding = tiktoken.encoding_for_model(model)
         return len(encoding.encode(text))
     except Exception:
-        return int(len(text.split()) * 1.3)
+        return estimate_tokens(text)
+
+
+@lru_cache(maxsize=None)
+def get_token_chunker(chunk_tokens: int = CHUNK_TOKENS, overlap_tokens: int = CHUNK_TOKEN_OVERLAP,
+                      model: str = EMBED_MODEL) -> TokenChunker:
+    """Shared token-window chunker for the embedding model's tokenizer."""
+    return TokenChunker(get_tokenizer(model), chunk_tokens, overlap_tokens)
 
 
 def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> List[str]:
-    """Split text using Recursive Character Text Splitter with configurable parameters."""
+    """Split text with the shared separator-priority chunker (RecursiveCharacterTextSplitter rules)."""
+    return [text[start:end] for start, end in chunk_offsets(text, chunk_size, chunk_overlap)]
+
+
+def chunk_offsets(text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> List[Tuple[int, int]]:
+    """(start, end) character offsets of the chunks of `text`, without copying it."""
     try:
-        # Create the recursive character text splitter with specified parameters
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,  # Use character count
-            separators=[
-                "\n\n",    # Double newline (paragraphs)
-                "\n",      # Single newline (lines)
-                " ",       # Space (words)
-                ".",       # Period
-                ",",       # Comma
-                "\u200b",  # Zero-width space
-                "\uff0c",  # Full-width comma
-                "\u3001",  # Ideographic comma
-                "\uff0e",  # Full-width period
-                "\u3002",  # Ideographic period
-                "",        # Last resort - split by character
-            ],
-            keep_separator=True,
-        )
-        
-        # Split the text
-        chunks = text_splitter.split_text(text)
-        
-        # Filter out empty chunks
-        chunks = [chunk.strip() for chunk in chunks if chunk.strip()]
-        
-        return chunks
-        
+        return get_chunker(chunk_size, chunk_overlap).split_offsets(text)
     except Exception as e:
-        print(f"⚠️  Warning: Error with RecursiveCharacterTextSplitter: {e}")
+        print(f"⚠️  Warning: Error chunking text: {e}")
         print("   Falling back to simple text splitting...")
-        
-        # Fallback: Simple splitting if RecursiveCharacterTextSplitter fails
-        return simple_chunk_text(text, chunk_size, chunk_overlap)
+        offsets = []
+        position = 0
+        for chunk in simple_chunk_text(text, chunk_size, chunk_overlap):
+            start = text.find(chunk, position)
+            offsets.append((start, start + len(chunk)))
+            position = start + 1
+        return offsets
 
 
 def simple_chunk_text(text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> List[str]:
@@ -182,12 +320,24 @@ def simple_chunk_text(text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: in
     return [chunk for chunk in chunks if chunk.strip()]
 
 
+def iter_pdf_pages(file_path: str, start_page: int = 0, end_page: Optional[int] = None) -> Iterator[str]:
+    """Yield the text of a range of PDF pages one page at a time (raises on error)."""
+    with open(file_path, 'rb') as f:
+        reader = pypdf.PdfReader(f)
+        page_count = len(reader.pages)
+        for page_number in range(start_page, page_count if end_page is None else min(end_page, page_count)):
+            yield reader.pages[page_number].extract_text() or ""
+
+
+def read_pdf_pages(file_path: str, start_page: int = 0, end_page: Optional[int] = None) -> str:
+    """Extract text from a range of PDF pages (raises on error)."""
+    return "\n".join(iter_pdf_pages(file_path, start_page, end_page))
+
+
 def read_pdf_file(file_path: str) -> str:
     """Extract text from PDF file."""
     try:
-        with open(file_path, 'rb') as f:
-            reader = pypdf.PdfReader(f)
-            return "\n".join(page.extract_text() or "" for page in reader.pages).strip()
+        return read_pdf_pages(file_path).strip()
     except Exception as e:
         print(f"❌ Error reading PDF {file_path}: {e}")
         return ""
@@ -219,32 +369,31 @@ def read_text_file(file_path: str) -> str:
         return ""
 
 
-def process_file(file_path: str) -> Optional[Dict]:
-    """Process a single file and extract its content."""
+def process_file(file_path: str, content: Optional[str] = None) -> Optional[Dict]:
+    """
+    Process a single file and extract its content.
+
+    If `content` is given (e.g. PDF page ranges extracted in parallel and joined),
+    the file is not read again.
+    """
     p = Path(file_path)
     if not p.exists():
         print(f"❌ File not found: {p}")
         return None
 
-    info = {
-        'filename': p.name,
-        'filepath': str(p),
-        'size': p.stat().st_size,
-        'modified': datetime.fromtimestamp(p.stat().st_mtime).isoformat(),
-        'extension': p.suffix.lower(),
-        'content': "",
-        'type': ""
-    }
+    info = base_file_info(p)
     print(f"📄 Processing: {info['filename']}")
+    # Measured here because extraction usually runs in a worker process (see run_metrics.py)
+    started, cpu_started = time.perf_counter(), time.thread_time()
 
     if info['extension'] == '.pdf':
-        info['content'] = read_pdf_file(str(p))
+        info['content'] = read_pdf_file(str(p)) if content is None else content
         info['type'] = 'pdf'
     elif info['extension'] in ['.docx', '.doc']:
-        info['content'] = read_docx_file(str(p))
+        info['content'] = read_docx_file(str(p)) if content is None else content
         info['type'] = 'word'
     elif info['extension'] in ['.txt', '.md', '.rtf']:
-        info['content'] = read_text_file(str(p))
+        info['content'] = read_text_file(str(p)) if content is None else content
         info['type'] = 'text'
     else:
         print(f"⚠️  Unsupported file type: {info['extension']}")
@@ -256,13 +405,119 @@ def process_file(file_path: str) -> Optional[Dict]:
 
     info['word_count'] = len(info['content'].split())
     info['char_count'] = len(info['content'])
-    info['token_count'] = count_tokens(info['content'])
+    extracted, cpu_extracted = time.perf_counter(), time.thread_time()
+    if CHUNK_MODE == "tokens":
+        # One tokenization serves the chunk windows and the document total
+        info['chunk_spans'], info['token_count'] = get_token_chunker().split(info['content'])
+    else:
+        info['token_count'] = count_tokens(info['content'])
+    info['timings'] = {
+        "extract": (extracted - started, cpu_extracted - cpu_started),
+        "tokenize": (time.perf_counter() - extracted, time.thread_time() - cpu_extracted),
+    }
     print(f"   📊 Extracted: {info['word_count']} words, {info['token_count']} tokens")
     return info
 
 
-def create_embedding(client: OpenAI, text: str, model: str = EMBED_MODEL) -> Optional[List[float]]:
-    """Create embedding using OpenAI API with configured parameters."""
+def base_file_info(p: Path) -> Dict:
+    """File-level fields shared by every chunk of a document."""
+    stat = p.stat()
+    return {
+        'filename': p.name,
+        'filepath': str(p),
+        'size': stat.st_size,
+        'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+        'extension': p.suffix.lower(),
+        'content': "",
+        'type': ""
+    }
+
+
+def streams_pages(file_path: Path) -> bool:
+    """Whether a file is a PDF large enough to be chunked page by page (PINECONE_PDF_STREAMING)."""
+    if not PDF_STREAMING or CHUNK_MODE == "tokens" or file_path.suffix.lower() != '.pdf':
+        return False
+    try:
+        return file_path.stat().st_size >= PDF_STREAM_MIN_MB * 1024 * 1024
+    except OSError:
+        return False
+
+
+def process_pdf_stream(file_path: str) -> Optional[Dict]:
+    """
+    Prepare a PDF for page streaming: only file fields are read here, the pages
+    are extracted one at a time while the document is chunked (iter_chunk_records).
+    Word/char/token counts are filled in as the pages go by.
+    """
+    p = Path(file_path)
+    if not p.exists():
+        print(f"❌ File not found: {p}")
+        return None
+
+    info = base_file_info(p)
+    del info['content']
+    info.update({'type': 'pdf', 'page_stream': True, 'pages': 0, 'word_count': 0, 'char_count': 0, 'token_count': 0})
+    print(f"📄 Streaming pages: {info['filename']}")
+    return info
+
+
+def iter_page_chunks(info: Dict, file_path: str) -> Iterator[Tuple[int, int, str, Tuple[int, int]]]:
+    """
+    Chunk a PDF page by page, carrying chunks across page boundaries.
+
+    Yields:
+        (start, end, chunk, (first page, last page)): offsets into the joined page
+        text and the 1-based pages the chunk spans
+    """
+    page_starts: List[int] = []  # Offset of each page in the joined text
+
+    def pages() -> Iterator[str]:
+        offset = 0
+        for text in iter_pdf_pages(file_path):
+            page_starts.append(offset)
+            offset += len(text) + 1
+            info['char_count'] += len(text)
+            info['word_count'] += len(text.split())
+            info['token_count'] += count_tokens(text)
+            yield text
+
+    try:
+        for start, end, chunk in get_chunker(CHUNK_SIZE, CHUNK_OVERLAP).split_stream(pages()):
+            yield start, end, chunk, (bisect_right(page_starts, start), bisect_right(page_starts, end - 1))
+    except Exception as e:
+        print(f"❌ Error reading PDF {file_path}: {e}")
+        info['stream_error'] = str(e)
+    info['pages'] = len(page_starts)
+    print(f"   📊 Streamed {info['pages']} page(s): {info['word_count']} words, {info['token_count']} tokens")
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Return the shared on-disk embedding cache (None if disabled or unavailable)."""
+    global _embedding_cache, EMBED_CACHE
+    if not EMBED_CACHE:
+        return None
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            try:
+                _embedding_cache = EmbeddingCache(EMBED_CACHE_PATH, max_bytes=EMBED_CACHE_MAX_MB * 1024 * 1024)
+            except Exception as e:
+                print(f"⚠️  Embedding cache unavailable ({e}), continuing without it")
+                EMBED_CACHE = False
+                return None
+        return _embedding_cache
+
+
+def create_embedding(client: OpenAI, text: str, model: str = EMBED_MODEL) -> Optional[np.ndarray]:
+    """Create embedding using OpenAI API with configured parameters (a float32 array, like the batch path)."""
+    cache = get_embedding_cache()
+    if cache:
+        cached = cache.get_many(model, EMBED_DIMENSIONS, [text])[0]
+        if cached is not None:
+            return cached
     try:
         # Create embedding with specified dimensions and timeout
         resp = client.embeddings.create(
@@ -271,7 +526,10 @@ def create_embedding(client: OpenAI, text: str, model: str = EMBED_MODEL) -> Opt
             dimensions=EMBED_DIMENSIONS,
             # timeout=EMBED_TIMEOUT / 1000.0  # Convert milliseconds to seconds
         )
-        return resp.data[0].embedding
+        embedding = np.asarray(resp.data[0].embedding, dtype=np.float32)
+        if cache:
+            cache.put_many(model, EMBED_DIMENSIONS, [text], [embedding])
+        return embedding
     except Exception as e:
         print(f"❌ Error creating embedding: {e}")
         return None
@@ -299,89 +557,828 @@ def generate_chunk_id(content: str, file_path: str, chunk_index: int) -> str:
     return f"{safe_stem}_{chunk_index}_{content_hash}"
 
 
+def get_upsert_progress_path(index_name: str, namespace: Optional[str]) -> str:
+    """Progress file recording acknowledged upsert batches for an index/namespace pair."""
+    return _state_file_path(index_name, namespace, ".upserts")
+
+
+def get_journal_path(index_name: str, namespace: Optional[str]) -> str:
+    """Checkpoint journal location for an index/namespace pair."""
+    return _state_file_path(index_name, namespace, ".journal")
+
+
+def open_journal(index_name: str, namespace: Optional[str], resume: bool) -> CheckpointJournal:
+    """Start a new checkpoint journal, or continue the previous one when resuming."""
+    journal = CheckpointJournal(get_journal_path(index_name, namespace), resume=resume)
+    if resume:
+        if journal.files:
+            print(f"⏯️  Resuming: {len(journal.files)} file(s), {len(journal.embeddings)} embedding(s) and "
+                  f"{len(journal.upserted)} acknowledged vector(s) recovered from the journal")
+        else:
+            print("ℹ️  No checkpoint journal to resume from - starting a fresh run")
+    return journal
+
+
+def create_upserter(pc: Pinecone, index_name: str, namespace: Optional[str] = None,
+                    metrics: Optional[RunMetrics] = None) -> ParallelUpserter:
+    """Parallel upserter for an index, resuming from any interrupted previous upload."""
+    return ParallelUpserter(
+        pc.Index(index_name),
+        namespace=namespace,
+        max_workers=UPSERT_WORKERS,
+        max_retries=UPSERT_MAX_RETRIES,
+        progress_path=get_upsert_progress_path(index_name, namespace),
+        metrics=metrics,
+    )
+
+
+def print_upsert_report(report: Dict):
+    """Print throughput and failure counts of an upsert run."""
+    print(f"   📤 Upserted {report['vectors']} vectors in {report['batches']} batch(es), "
+          f"{report['elapsed']:.1f}s ({report['vectors_per_second']:.0f} vectors/s)")
+    if report["skipped_batches"]:
+        print(f"   ⏭️  {report['skipped_batches']} batch(es) already uploaded by an interrupted run")
+    if report["retries"]:
+        print(f"   🔁 Retries: {report['retries']}")
+    if report["failed_batches"]:
+        print(f"   ❌ Failed batches: {report['failed_batches']} ({len(report['failed_ids'])} vectors)")
+
+
+def upsert_vectors(pc: Pinecone, index_name: str, vectors: List[Dict], namespace: Optional[str] = None,
+                   on_batch_done: Optional[Callable[[List[Dict], bool], None]] = None,
+                   metrics: Optional[RunMetrics] = None) -> Dict:
+    """Upload vectors with parallel, retried, resumable batches and return the upsert report."""
+    print(f"🔄 Connecting to Pinecone index '{index_name}'...")
+
+    # sanity: ensure IDs are ASCII
+    for v in vectors[:3]:
+        if not all(ord(c) < 128 for c in v['id']):
+            raise ValueError(f"Non-ASCII ID detected: {v['id']}")
+
+    upserter = create_upserter(pc, index_name, namespace, metrics=metrics)
+    total = len(vectors)
+    total_batches = (total + UPSERT_BATCH_SIZE - 1) // UPSERT_BATCH_SIZE
+    print(f"📤 Uploading {total} vectors in {total_batches} batch(es), {UPSERT_WORKERS} in parallel...")
+    try:
+        for start in range(0, total, UPSERT_BATCH_SIZE):
+            upserter.submit(vectors[start:start + UPSERT_BATCH_SIZE], on_done=on_batch_done)
+        report = upserter.wait()
+    finally:
+        upserter.close()
+
+    if not report["failed_batches"]:
+        upserter.progress.clear()
+    print_upsert_report(report)
+    return report
+
+
 def upload_to_pinecone(pc: Pinecone, index_name: str, vectors: List[Dict], namespace: Optional[str] = None) -> bool:
     """Upload vectors to Pinecone index."""
     try:
-        print(f"🔄 Connecting to Pinecone index '{index_name}'...")
+        report = upsert_vectors(pc, index_name, vectors, namespace=namespace)
+        if report["failed_batches"]:
+            print(f"❌ {len(report['failed_ids'])} of {len(vectors)} vectors failed to upload to '{index_name}'")
+            return False
+        print(f"✅ Successfully uploaded {len(vectors)} vectors to '{index_name}'")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error uploading to Pinecone: {e}")
+        return False
+
+
+def index_dimension(index) -> Optional[int]:
+    """Vector dimension of an index (Pinecone or local), if it reports one."""
+    stats = index.describe_index_stats()
+    if isinstance(stats, dict):
+        return stats.get("dimension")
+    return getattr(stats, "dimension", None)
+
+
+def ensure_index(pc: Pinecone, index_name: str) -> bool:
+    """
+    Check that an index exists and matches OPENAI_EMBED_DIMENSIONS.
+
+    Local indexes are created on first use; Pinecone indexes must be created with create_index.py.
+    """
+    try:
+        indexes = pc.list_indexes().names()
+        if index_name not in indexes and VECTOR_BACKEND == "local":
+            # Local indexes are just directories - create on first use
+            pc.create_index(name=index_name, dimension=EMBED_DIMENSIONS, metric="cosine")
+            print(f"✅ Created local index '{index_name}'")
+        elif index_name not in indexes:
+            print(f"❌ Index '{index_name}' not found!")
+            print(f"Available indexes: {', '.join(indexes) if indexes else 'None'}")
+            print("Please create the index first using create_index.py")
+            return False
+        else:
+            print(f"✅ Found index '{index_name}'")
+        dimension = index_dimension(pc.Index(index_name))
+        if dimension and dimension != EMBED_DIMENSIONS:
+            print(f"❌ Index '{index_name}' has dimension {dimension}, "
+                  f"but OPENAI_EMBED_DIMENSIONS is {EMBED_DIMENSIONS}")
+            print("   Set OPENAI_EMBED_DIMENSIONS to match, or create an index with create_index.py")
+            return False
+        return True
+    except Exception as e:
+        print(f"❌ Error checking indexes: {e}")
+        return False
+
+
+def delete_from_pinecone(pc: Pinecone, index_name: str, ids: List[str], namespace: Optional[str] = None) -> bool:
+    """Delete vectors by ID from Pinecone index."""
+    if not ids:
+        return True
+    try:
         index = pc.Index(index_name)
 
-        # sanity: ensure IDs are ASCII
-        for v in vectors[:3]:
-            if not all(ord(c) < 128 for c in v['id']):
-                raise ValueError(f"Non-ASCII ID detected: {v['id']}")
-
-        # batch upload
-        batch_size = 100
-        total = len(vectors)
-        for start in range(0, total, batch_size):
-            batch = vectors[start:start + batch_size]
-            print(f"📤 Uploading batch {start // batch_size + 1}/{(total + batch_size - 1) // batch_size} ({len(batch)} vectors)...")
+        # Pinecone accepts up to 1000 IDs per delete request
+        batch_size = 1000
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
             if namespace:
-                index.upsert(vectors=batch, namespace=namespace)
+                index.delete(ids=batch, namespace=namespace)
             else:
-                index.upsert(vectors=batch)
+                index.delete(ids=batch)
 
-        print(f"✅ Successfully uploaded {total} vectors to '{index_name}'")
+        print(f"🗑️  Deleted {len(ids)} stale vectors from '{index_name}'")
         return True
 
     except Exception as e:
-        print(f"❌ Error uploading to Pinecone: {e}")
+        print(f"❌ Error deleting from Pinecone: {e}")
         return False
 
 
-def create_embeddings_batch(client: OpenAI, texts: List[str], model: str = EMBED_MODEL) -> List[Optional[List[float]]]:
-    """Create embeddings for multiple texts in batches for efficiency."""
-    embeddings = []
-    
-    # Process texts in batches according to configured batch size
-    for i in range(0, len(texts), EMBED_BATCH_SIZE):
-        batch = texts[i:i + EMBED_BATCH_SIZE]
-        batch_size = len(batch)
-        
+def _state_file_path(index_name: str, namespace: Optional[str], suffix: str) -> str:
+    """Location of a per index/namespace state file (manifest, journal, ...)."""
+    filename = f"{_ascii_slug(index_name)}__{_ascii_slug(namespace or 'default')}{suffix}"
+    return os.path.join(MANIFEST_DIR, filename)
+
+
+@lru_cache(maxsize=None)
+def get_content_store(index_name: str, namespace: Optional[str]) -> Optional[ContentStore]:
+    """Content store of an index/namespace (None unless PINECONE_CONTENT_STORE is on)."""
+    if not CONTENT_STORE:
+        return None
+    return ContentStore(content_store_path(CONTENT_STORE_DIR, index_name, namespace))
+
+
+def invalidate_answers(chunk_ids: List[str]):
+    """
+    Drop cached answers of the query interface that were built on these chunks.
+
+    Every answer cache is checked, not only the one of this index/namespace: a query
+    interface searching several sources (PINECONE_SEARCH_SOURCES) keeps its answers in
+    a cache of that set of sources. Vector IDs embed a hash of the chunk text, so this
+    only drops answers that used these exact chunks.
+    """
+    if not chunk_ids or not os.path.isdir(ANSWER_CACHE_DIR):
+        return
+    for name in sorted(os.listdir(ANSWER_CACHE_DIR)):
+        if not name.endswith(".sqlite"):
+            continue
+        path = os.path.join(ANSWER_CACHE_DIR, name)
         try:
-            print(f"   🔄 Creating embeddings for batch of {batch_size} texts...")
-            resp = client.embeddings.create(
+            cache = AnswerCache(path)
+            dropped = cache.invalidate_chunks(chunk_ids)
+            cache.close()
+            if dropped:
+                print(f"🧹 Dropped {dropped} cached answer(s) built on changed chunks ({name})")
+        except Exception as e:
+            print(f"⚠️  Could not invalidate cached answers in {path}: {e}")
+
+
+def store_content(index_name: str, namespace: Optional[str], records: List[Dict]):
+    """Write the text of chunks about to be upserted to the content store (if enabled)."""
+    store = get_content_store(index_name, namespace)
+    if store:
+        store.put_many((record["vector_id"], record["chunk"]) for record in records)
+
+
+def print_content_store_stats(index_name: str, namespace: Optional[str]):
+    """Print what the content store took out of the vector metadata in this run."""
+    store = get_content_store(index_name, namespace)
+    if not store or not store.stats["writes"]:
+        return
+    print(f"   🗃️  Content store: {store.stats['writes']} chunk texts kept out of metadata "
+          f"({store.stats['raw_bytes'] / (1024 * 1024):.2f} MB, "
+          f"{store.compression_ratio():.1f}x compressed) in {store.path}")
+
+
+def get_manifest_path(index_name: str, namespace: Optional[str]) -> str:
+    """Manifest file location for an index/namespace pair."""
+    return _state_file_path(index_name, namespace, ".json")
+
+
+def get_dedup_path(index_name: str, namespace: Optional[str]) -> str:
+    """Location of the near-duplicate signatures of the chunks in the manifest."""
+    return _state_file_path(index_name, namespace, ".dedup.npz")
+
+
+_embedding_engines: Dict[Tuple[int, str], Tuple[OpenAI, EmbeddingEngine]] = {}  # keeps the client alive so its id stays unique
+_embedding_engines_lock = threading.Lock()
+
+
+def get_embedding_engine(client: OpenAI, model: str = EMBED_MODEL) -> EmbeddingEngine:
+    """Return the shared embedding engine (thread pool + rate limiter) for a client/model."""
+    key = (id(client), model)
+    with _embedding_engines_lock:
+        engine = _embedding_engines[key][1] if key in _embedding_engines else None
+        if engine is None:
+            engine = EmbeddingEngine(
+                client,
                 model=model,
-                input=batch,
                 dimensions=EMBED_DIMENSIONS,
-                # timeout=EMBED_TIMEOUT / 1000.0  # Convert milliseconds to seconds
+                max_workers=EMBED_CONCURRENCY,
+                requests_per_minute=EMBED_RPM,
+                tokens_per_minute=EMBED_TPM,
+                max_retries=EMBED_MAX_RETRIES,
+                token_counter=lambda text: count_tokens(text, model),
             )
-            
-            # Extract embeddings from response
-            batch_embeddings = [data.embedding for data in resp.data]
-            embeddings.extend(batch_embeddings)
-            
-        except Exception as e:
-            print(f"   ❌ Error creating batch embeddings: {e}")
-            # Add None for each failed embedding in the batch
-            embeddings.extend([None] * batch_size)
-    
-    return embeddings
+            _embedding_engines[key] = (client, engine)
+        return engine
+
+
+def print_embedding_stats(client: OpenAI, model: str = EMBED_MODEL):
+    """Print request/rate-limit counters of the shared embedding engine."""
+    engine = _embedding_engines[(id(client), model)][1] if (id(client), model) in _embedding_engines else None
+    stats = engine.stats if engine else {"requests": 0, "tokens": 0, "rate_limited": 0, "retries": 0, "failed_requests": 0}
+    print(f"   📡 Embedding requests: {stats['requests']} ({stats['tokens']} tokens), "
+          f"{stats['rate_limited']} rate-limited, {stats['retries']} retries, {stats['failed_requests']} failed")
+    cache = get_embedding_cache()
+    if cache:
+        print(f"   💾 Embedding cache: {cache.stats['hits']} hits, {cache.stats['misses']} misses "
+              f"({cache.hit_rate():.0%} hit rate), {cache.stats['evictions']} evicted")
+
+
+def create_embeddings_batch(client: OpenAI, texts: List[str], model: str = EMBED_MODEL,
+                            token_counts: Optional[List[Optional[int]]] = None,
+                            metrics: Optional[RunMetrics] = None) -> List[Optional[np.ndarray]]:
+    """
+    Create embeddings for multiple texts in concurrent, rate-limited batches (input order preserved).
+
+    Embeddings are float32 arrays (rows of the engine's response buffer or cache blobs);
+    they are converted to lists only when a batch is sent to the vector store.
+
+    `token_counts` (known per-text counts, e.g. from token-window chunking) skips re-tokenizing those texts.
+    """
+    if not texts:
+        return []
+
+    # Serve what we can from the cache, and embed each distinct missing text once
+    cache = get_embedding_cache()
+    with timed(metrics if cache else None, "embed_cache") as counts:
+        embeddings = cache.get_many(model, EMBED_DIMENSIONS, texts) if cache else [None] * len(texts)
+        cached = sum(1 for embedding in embeddings if embedding is not None)
+        counts.update(items=len(texts), hits=cached)
+    missing = list(dict.fromkeys(text for text, embedding in zip(texts, embeddings) if embedding is None))
+    if cached:
+        print(f"   💾 Embedding cache: {cached}/{len(texts)} texts served without an API call")
+    if not missing:
+        return embeddings
+
+    # Tokenize once: split oversize inputs, then pack requests by token budget
+    # (without a tokenizer the counts are estimated and oversize inputs are sent as they are)
+    known_counts = dict(zip(texts, token_counts)) if token_counts else {}
+    encoding = try_get_tokenizer(model)
+    with timed(metrics, "tokenize", kind="embed_inputs") as counts:
+        if encoding is not None:
+            inputs, owners, token_counts = split_oversize(missing, encoding, EMBED_MAX_INPUT_TOKENS,
+                                                          [known_counts.get(text) for text in missing])
+        else:
+            inputs, owners = missing, list(range(len(missing)))
+            token_counts = [max(known_counts.get(text) or estimate_tokens(text), 1) for text in missing]
+        batches = pack_batches(token_counts, EMBED_BATCH_TOKENS, EMBED_BATCH_SIZE)
+        counts.update(items=len(missing), tokens=sum(token_counts))
+    report = packing_report(token_counts, batches, EMBED_BATCH_TOKENS)
+    if len(inputs) > len(missing):
+        split_texts = sum(1 for windows in Counter(owners).values() if windows > 1)
+        print(f"   ✂️  Split {split_texts} oversize text(s) into {EMBED_MAX_INPUT_TOKENS}-token windows")
+    print(f"   🔄 Creating embeddings for {len(missing)} texts ({report['tokens']} tokens) in "
+          f"{report['batches']} batch(es), {report['efficiency']:.0%} packing efficiency, "
+          f"up to {EMBED_CONCURRENCY} in flight...")
+
+    engine = get_embedding_engine(client, model)
+    input_embeddings = engine.embed_batches(
+        [[inputs[i] for i in batch] for batch in batches],
+        [sum(token_counts[i] for i in batch) for batch in batches],
+        metrics=metrics,
+    )
+    new_embeddings = merge_split_embeddings(owners, token_counts, input_embeddings, len(missing))
+    if cache:
+        cache.put_many(model, EMBED_DIMENSIONS, missing, new_embeddings)
+
+    by_text = dict(zip(missing, new_embeddings))
+    return [embedding if embedding is not None else by_text.get(text) for text, embedding in zip(texts, embeddings)]
+
+
+def discover_files(root: Path) -> List[Path]:
+    """Recursive, unique, sorted list of supported files under root."""
+    return sorted({
+        p.resolve()
+        for p in root.rglob('*')
+        if p.is_file() and p.suffix.lower() in SUPPORTED_EXTENSIONS
+    })
+
+
+def collect_files(root: Path, manifest: IngestManifest, paths: Optional[List[str]] = None) -> Tuple[List[Path], List[str]]:
+    """
+    Files to check for changes, and tracked files that no longer exist.
+
+    Without `paths` the whole folder is scanned. With `paths` only those files and
+    directories are looked at - a missing directory removes every tracked file under it.
+    """
+    if paths is None:
+        files = discover_files(root)
+        current_paths = {str(f) for f in files}
+        return files, [path for path in manifest.tracked_files() if path not in current_paths]
+
+    files: set = set()
+    removed: set = set()
+    tracked = manifest.tracked_files()
+    for path in paths:
+        p = Path(path).resolve()
+        if p.is_dir():
+            files.update(discover_files(p))
+            # Files tracked under a directory that no longer hold them (moved out, deleted)
+            present = {str(f) for f in files}
+            removed.update(t for t in tracked if t.startswith(str(p) + os.sep) and t not in present)
+        elif p.is_file():
+            if p.suffix.lower() in SUPPORTED_EXTENSIONS:
+                files.add(p)
+        else:
+            removed.update(t for t in tracked if t == str(p) or t.startswith(str(p) + os.sep))
+    return sorted(files), sorted(removed)
+
+
+def open_manifest(index_name: str, namespace: Optional[str]) -> IngestManifest:
+    """Load the incremental manifest for an index/namespace pair."""
+    return IngestManifest(
+        get_manifest_path(index_name, namespace),
+        settings={
+            "embed_model": EMBED_MODEL,
+            "embed_dimensions": EMBED_DIMENSIONS,
+            "chunk_size": CHUNK_SIZE,
+            "chunk_overlap": CHUNK_OVERLAP,
+            **({"chunk_mode": "tokens", "chunk_tokens": CHUNK_TOKENS, "chunk_token_overlap": CHUNK_TOKEN_OVERLAP}
+               if CHUNK_MODE == "tokens" else {}),
+            **({"dedup_threshold": DEDUP_THRESHOLD} if DEDUP_THRESHOLD > 0 else {}),
+            **({"content_store": True} if CONTENT_STORE else {}),
+        },
+        reset=not INCREMENTAL,
+    )
+
+
+def iter_changed_files(files: List[Path], manifest: IngestManifest, summary: Dict) -> Iterator[Tuple[Path, Dict]]:
+    """Yield (file path, file state) for files that are new or changed since the last run."""
+    for file_path in files:
+        try:
+            stat = file_path.stat()
+            sha256 = manifest.check_file(str(file_path), stat.st_size, stat.st_mtime)
+        except OSError as e:
+            print(f"❌ Error reading {file_path}: {e}")
+            continue
+        if sha256 is None:
+            summary["skipped_files"] += 1
+            continue
 
+        yield file_path, new_file_state(stat, sha256)
+
+
+def detect_changes(files: List[Path], manifest: IngestManifest, summary: Dict,
+                   metrics: Optional[RunMetrics] = None) -> Dict[Path, Dict]:
+    """Files that are new or changed since the last run, mapped to their state (stat + content hash)."""
+    with timed(metrics, "change_detection") as counts:
+        changed_files = dict(iter_changed_files(files, manifest, summary))
+        counts.update(items=len(files), nbytes=sum(state["size"] for state in changed_files.values()),
+                      changed=len(changed_files))
+    return changed_files
+
+
+def new_file_state(stat: os.stat_result, sha256: str) -> Dict:
+    """Per-run state of a file being (re-)embedded."""
+    return {
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "sha256": sha256,
+        "chunk_ids": [],
+        "duplicates": {},  # vector ID of a suppressed chunk -> vector ID of its canonical chunk
+        "failed": False,
+    }
+
+
+def add_dependent_files(manifest: IngestManifest, changed_files: Dict[Path, Dict],
+                        removed_paths: List[str], summary: Dict):
+    """
+    Re-index unchanged files whose duplicate chunks point at vectors that this run replaces or deletes.
+
+    Their chunks are checked again, so they either find a new canonical chunk or are embedded themselves.
+    """
+    dependents = manifest.dependent_files([str(path) for path in changed_files] + removed_paths)
+    for path in dependents:
+        file_path = Path(path)
+        try:
+            changed_files[file_path] = new_file_state(file_path.stat(), file_content_hash(path))
+        except OSError as e:
+            print(f"❌ Error reading {file_path}: {e}")
+            continue
+        summary["skipped_files"] -= 1
+    if dependents:
+        print(f"♻️  Re-indexing {len(dependents)} unchanged file(s) that share duplicate chunks with changed files")
 
-def process_folder(folder_path: str, openai_client: OpenAI, pc: Pinecone, index_name: str, namespace: Optional[str]):
-    """Process all files in a folder and upload embeddings to Pinecone."""
+
+def create_dedup_detector() -> Optional[NearDuplicateDetector]:
+    """Near-duplicate detector for one run (None when suppression is off)."""
+    if DEDUP_THRESHOLD <= 0:
+        return None
+    return NearDuplicateDetector(DEDUP_THRESHOLD)
+
+
+def load_dedup_signatures(detector: Optional[NearDuplicateDetector], manifest: IngestManifest,
+                          index_name: str, namespace: Optional[str], replaced_paths: List[str]):
+    """
+    Let this run's chunks match the canonical chunks of files it does not re-index.
+
+    Signatures saved by earlier runs are loaded for the chunk IDs of every tracked file
+    except `replaced_paths` (changed, dependent and removed files), whose vectors this run replaces.
+    """
+    if detector is None:
+        return
+    replaced = set(replaced_paths)
+    keys = {chunk_id for path in manifest.tracked_files() if path not in replaced
+            for chunk_id in manifest.get_chunk_ids(path)}
+    loaded = detector.load(get_dedup_path(index_name, namespace), keys) if keys else 0
+    if loaded:
+        print(f"♻️  Checking for duplicates of {loaded} chunk(s) from unchanged files")
+
+
+def save_dedup_signatures(detector: Optional[NearDuplicateDetector], manifest: IngestManifest,
+                          index_name: str, namespace: Optional[str]):
+    """Save the signatures of the canonical chunks now recorded in the manifest for the next run."""
+    if detector is None:
+        return
+    path = get_dedup_path(index_name, namespace)
+    try:
+        detector.save(path, (chunk_id for file_path in manifest.tracked_files()
+                             for chunk_id in manifest.get_chunk_ids(file_path)))
+    except Exception as e:
+        print(f"⚠️  Could not save duplicate signatures {path}: {e}")
+
+
+def suppress_duplicate(detector: Optional[NearDuplicateDetector], record: Dict, state: Dict, summary: Dict) -> bool:
+    """
+    Check a chunk against the chunks seen so far in the run.
+
+    Returns:
+        bool: True if the chunk is a near-duplicate - it is recorded as pointing at the
+            canonical vector and must not be embedded or uploaded
+    """
+    if detector is None:
+        return False
+    canonical_id = detector.check(record["vector_id"], record["chunk"])
+    if canonical_id is None:
+        return False
+    state["duplicates"][record["vector_id"]] = canonical_id
+    summary["duplicate_chunks"] += 1
+    # Index space of the vector that is not stored: float32 values + the content metadata
+    summary["duplicate_bytes"] += EMBED_DIMENSIONS * 4 + len(record["stored_content"].encode('utf-8'))
+    return True
+
+
+def fail_orphaned_duplicates(pending_files: Dict[str, Dict]):
+    """Files whose duplicates point at a chunk that was not uploaded are retried next run too."""
+    owner = {chunk_id: path for path, state in pending_files.items() for chunk_id in state["chunk_ids"]}
+    changed = True
+    while changed:
+        changed = False
+        for state in pending_files.values():
+            if state["failed"]:
+                continue
+            if any(pending_files[owner[canonical_id]]["failed"]
+                   for canonical_id in state["duplicates"].values() if canonical_id in owner):
+                state["failed"] = True
+                changed = True
+
+
+def print_dedup_savings(summary: Dict):
+    """Print what near-duplicate suppression saved in this run."""
+    if not summary["duplicate_chunks"]:
+        return
+    print(f"   ♻️  Near-duplicate chunks suppressed: {summary['duplicate_chunks']} "
+          f"(threshold {DEDUP_THRESHOLD:g})")
+    print(f"       Embeddings saved: {summary['duplicate_chunks']}, "
+          f"index space saved: ~{summary['duplicate_bytes'] / (1024 * 1024):.2f} MB")
+
+
+def record_extraction(metrics: Optional[RunMetrics], info: Dict):
+    """Record the extraction and tokenization timings process_file measured for a document."""
+    if not metrics or 'timings' not in info:
+        return
+    wall, cpu = info['timings']['extract']
+    metrics.record("extract", wall, cpu, items=1, nbytes=info['size'], kind=info['type'], chars=info['char_count'])
+    wall, cpu = info['timings']['tokenize']
+    metrics.record("tokenize", wall, cpu, items=1, kind="document", tokens=info['token_count'])
+
+
+def extract_changed_files(changed_files: Dict[Path, Dict], metrics: Optional[RunMetrics] = None,
+                          max_workers: Optional[int] = None) -> Iterator[Tuple[Path, Optional[Dict]]]:
+    """
+    Extract changed files on the process pool, yielding (path, info) as each completes.
+
+    Page-streamed PDFs come last: they are read later, page by page, while being chunked.
+    `max_workers` overrides PINECONE_EXTRACT_WORKERS (e.g. to split the cores between concurrent jobs).
+    """
+    max_workers = max_workers or EXTRACT_WORKERS
+    streamed = [file_path for file_path in changed_files if streams_pages(file_path)]
+    pooled = [file_path for file_path in changed_files if file_path not in streamed]
+    if pooled and max_workers > 1:
+        print(f"\n⚙️  Extracting {len(pooled)} file(s) with {max_workers} worker processes...")
+    for file_path, info in extract_files(
+        pooled,
+        max_workers=max_workers,
+        timeout=EXTRACT_TIMEOUT,
+        pages_per_task=PDF_PAGES_PER_TASK,
+    ):
+        print("\n" + "=" * 60)
+        if info:
+            print(f"📄 Extracted: {info['filename']}")
+            record_extraction(metrics, info)
+        yield file_path, info
+    for file_path in streamed:
+        print("\n" + "=" * 60)
+        yield file_path, process_pdf_stream(str(file_path))
+
+
+def file_level_info(info: Dict) -> Dict:
+    """File fields of an extracted document, without its text or chunk windows."""
+    return {k: v for k, v in info.items() if k not in ('content', 'chunk_spans', 'timings')}
+
+
+def prepare_chunks(info: Dict, file_path: Path) -> List[Dict]:
+    """Chunk an extracted document and build the per-chunk records used for embedding."""
+    records = list(iter_chunk_records(info, file_path))
+    if info.get('page_stream'):
+        print(f"📝 Split into {len(records)} chunk(s)")
+    return records
+
+
+def chunk_kind(info: Dict) -> str:
+    return "pdf_stream" if info.get('page_stream') else info.get('type') or "unknown"
+
+
+def timed_prepare_chunks(info: Dict, file_path: Path, metrics: Optional[RunMetrics] = None) -> List[Dict]:
+    """prepare_chunks, recorded as a "chunk" stage event of the file's type (page-streamed PDFs include reading)."""
+    with timed(metrics, "chunk", kind=chunk_kind(info)) as counts:
+        records = prepare_chunks(info, file_path)
+        counts.update(items=len(records), chars=info.get('char_count', 0))
+    return records
+
+
+def iter_chunk_records(info: Dict, file_path: Path) -> Iterator[Dict]:
+    """
+    Chunk a document lazily, yielding the per-chunk records used for embedding.
+
+    Page-streamed PDFs (process_pdf_stream) are read here one page at a time, so
+    only a few chunks of their text are in memory at once.
+    """
+    if info.get('page_stream'):
+        # No text to drop - the counts on `info` fill in as the pages are read
+        file_info = info
+        chunks = ((start, end, chunk, None, pages) for start, end, chunk, pages in iter_page_chunks(info, str(file_path)))
+        total_chunks = None  # unknown until the last page
+    else:
+        content = info['content']
+        if info.get('chunk_spans') is not None:
+            spans = info['chunk_spans']  # token windows computed at extraction
+        else:
+            spans = [(start, end, None) for start, end in chunk_offsets(content)]
+        print(f"📝 Split into {len(spans)} chunk(s)")
+        # Keep file-level fields only - the full text is not needed past this point
+        file_info = file_level_info(info)
+        chunks = ((start, end, content[start:end], token_count, None) for start, end, token_count in spans)
+        total_chunks = len(spans)
+
+    for chunk_idx, (start, end, chunk, token_count, pages) in enumerate(chunks):
+        vector_id = generate_chunk_id(chunk, str(file_path), chunk_idx)
+
+        # Calculate available space for content (Pinecone has ~40KB metadata limit)
+        max_content_size = 38000  # bytes
+        full_content = chunk
+
+        # Truncate content only if it exceeds metadata limit (the content store holds it whole)
+        if not CONTENT_STORE and len(full_content.encode('utf-8')) > max_content_size:
+            truncated = full_content.encode('utf-8')[:max_content_size].decode('utf-8', errors='ignore')
+            last_space = truncated.rfind(' ')
+            if last_space > max_content_size * 0.8:
+                truncated = truncated[:last_space]
+            stored_content = truncated + "... [TRUNCATED]"
+            content_truncated = True
+        else:
+            stored_content = full_content
+            content_truncated = False
+
+        record = {
+            "vector_id": vector_id,
+            "info": file_info,
+            "chunk_idx": chunk_idx,
+            "total_chunks": total_chunks,
+            "char_start": start,
+            "char_end": end,
+            "token_count": token_count,
+            "stored_content": stored_content,
+            "content_truncated": content_truncated,
+            "chunk": chunk
+        }
+        if pages:
+            record["page"], record["page_end"] = pages
+        yield record
+
+
+def build_vector(metadata: Dict, embedding: np.ndarray) -> Dict:
+    """Build the Pinecone vector payload for an embedded chunk."""
+    vector = {
+        "id": metadata["vector_id"],
+        "values": embedding,
+        "metadata": {
+            "filename": metadata["info"]['filename'],
+            "filepath": metadata["info"]['filepath'],
+            "file_type": metadata["info"]['type'],
+            "file_size": metadata["info"]['size'],
+            "file_modified": metadata["info"]['modified'],
+            "chunk_index": metadata["chunk_idx"],
+            "word_count": len(metadata["chunk"].split()),
+            "char_count": len(metadata["chunk"]),
+            "processed_at": datetime.now().isoformat()
+        }
+    }
+    if not CONTENT_STORE:
+        vector["metadata"]["content"] = metadata["stored_content"]
+        vector["metadata"]["content_truncated"] = metadata["content_truncated"]
+    # Position of the chunk in the extracted document text (absent in journals of older runs)
+    if "char_start" in metadata:
+        vector["metadata"]["char_start"] = metadata["char_start"]
+        vector["metadata"]["char_end"] = metadata["char_end"]
+    if metadata.get("token_count") is not None:
+        vector["metadata"]["token_count"] = metadata["token_count"]
+    # Page-streamed PDFs: pages the chunk spans (their chunk total is not known up front)
+    if metadata.get("page") is not None:
+        vector["metadata"]["page"] = metadata["page"]
+        vector["metadata"]["page_end"] = metadata["page_end"]
+    if metadata["total_chunks"] is not None:
+        vector["metadata"]["total_chunks"] = metadata["total_chunks"]
+    return vector
+
+
+def sync_manifest(manifest: IngestManifest, pc: Pinecone, index_name: str, namespace: Optional[str],
+                  pending_files: Dict[str, Dict], removed_paths: List[str], metrics: Optional[RunMetrics] = None,
+                  detector: Optional[NearDuplicateDetector] = None):
+    """Delete stale vectors, record the uploaded files in the manifest and save their duplicate signatures."""
+    with timed(metrics, "manifest_sync") as counts:
+        counts["items"] = len(pending_files) + len(removed_paths)
+        _sync_manifest(manifest, pc, index_name, namespace, pending_files, removed_paths, counts, detector)
+
+
+def _sync_manifest(manifest: IngestManifest, pc: Pinecone, index_name: str, namespace: Optional[str],
+                   pending_files: Dict[str, Dict], removed_paths: List[str], counts: Dict,
+                   detector: Optional[NearDuplicateDetector]):
+    stale_ids: List[str] = []
+    for path in removed_paths:
+        stale_ids.extend(manifest.get_chunk_ids(path))
+
+    uploaded = {path: entry for path, entry in pending_files.items() if not entry["failed"]}
+    for path, entry in uploaded.items():
+        new_ids = set(entry["chunk_ids"])
+        stale_ids.extend(cid for cid in manifest.get_chunk_ids(path) if cid not in new_ids)
+
+    # Never delete an ID that another (still present) file also produced
+    live_ids = {cid for entry in uploaded.values() for cid in entry["chunk_ids"]}
+    for path in manifest.tracked_files():
+        if path not in uploaded and path not in removed_paths:
+            live_ids.update(manifest.get_chunk_ids(path))
+    stale_ids = sorted(set(stale_ids) - live_ids)
+    counts["deleted"] = len(stale_ids)
+
+    # Answers built on re-ingested or removed chunks no longer match what the index holds
+    invalidate_answers(stale_ids + [cid for entry in uploaded.values() for cid in entry["chunk_ids"]])
+
+    if not delete_from_pinecone(pc, index_name, stale_ids, namespace=namespace):
+        # Keep the old entries so the deletion is retried next run
+        print("⚠️  Manifest not updated for removed/edited files")
+        return
+    content_store = get_content_store(index_name, namespace)
+    if content_store:
+        content_store.delete_many(stale_ids)
+
+    for path in removed_paths:
+        manifest.remove(path)
+    for path, entry in uploaded.items():
+        manifest.update(path, entry["size"], entry["mtime"], entry["sha256"], entry["chunk_ids"],
+                        duplicates=entry.get("duplicates"))
+
+    try:
+        manifest.save()
+        print(f"📒 Manifest updated: {manifest.path}")
+    except Exception as e:
+        print(f"⚠️  Could not save manifest {manifest.path}: {e}")
+        return
+    save_dedup_signatures(detector, manifest, index_name, namespace)
+
+
+def run_result(status: str, **counts) -> Dict:
+    """
+    Outcome of a process_folder run.
+
+    Args:
+        status (str): "ok", "up_to_date", "partial" (some files failed and are retried next run),
+            "failed" or "empty" (no supported files)
+        **counts: files, processed_files, chunks, uploaded, removed, failed_files
+    """
+    return {"status": status, **counts}
+
+
+def open_run_metrics(index_name: str, namespace: Optional[str], mode: str, scope: str) -> Optional[RunMetrics]:
+    """
+    Start collecting stage metrics for a run (None when PINECONE_METRICS is off).
+
+    Runs are compared with the previous run of the same mode ("batch"/"streaming")
+    and scope ("full" folder scan or "partial" watch-mode sync).
+    """
+    if not METRICS:
+        return None
+    events_path, runs_path = metrics_paths(METRICS_DIR, index_name, namespace)
+    try:
+        return RunMetrics(events_path, runs_path, compare_on=("mode", "scope"),
+                          index=index_name, namespace=namespace or "", mode=mode, scope=scope)
+    except OSError as e:
+        print(f"⚠️  Run metrics disabled: {e}")
+        return None
+
+
+def finish_run_metrics(metrics: Optional[RunMetrics]):
+    """Save the run summary and print the stage table against the previous run."""
+    if not metrics:
+        return
+    summary = metrics.finish()
+    if summary["stages"]:
+        print_run_summary(summary, metrics.previous, metrics.events_path)
+
+
+def process_folder(folder_path: str, openai_client: OpenAI, pc: Pinecone, index_name: str, namespace: Optional[str],
+                   streaming: bool = STREAMING, resume: bool = False, paths: Optional[List[str]] = None,
+                   extract_workers: Optional[int] = None, embedding_stats: bool = True) -> Dict:
+    """
+    Process all files in a folder and upload embeddings to Pinecone.
+
+    `paths` (files or directories under the folder, e.g. from watch mode) limits the
+    run to those paths: changed ones are re-embedded, missing ones are deleted.
+    `extract_workers` overrides PINECONE_EXTRACT_WORKERS for this run.
+    `embedding_stats=False` leaves out the embedding engine counters (when the engine is
+    shared by concurrent runs they are not this run's own).
+    Stage timings are written to PINECONE_METRICS_DIR and summarized at the end.
+
+    Returns:
+        Dict: run_result() with the status and file/chunk counts of the run
+    """
+    metrics = open_run_metrics(index_name, namespace, "streaming" if streaming else "batch",
+                               "full" if paths is None else "partial")
+    try:
+        if streaming:
+            return process_folder_streaming(folder_path, openai_client, pc, index_name, namespace, resume=resume,
+                                            paths=paths, metrics=metrics, extract_workers=extract_workers,
+                                            embedding_stats=embedding_stats)
+        return process_folder_batch(folder_path, openai_client, pc, index_name, namespace, resume=resume,
+                                    paths=paths, metrics=metrics, extract_workers=extract_workers,
+                                    embedding_stats=embedding_stats)
+    finally:
+        finish_run_metrics(metrics)
+
+
+def process_folder_batch(folder_path: str, openai_client: OpenAI, pc: Pinecone, index_name: str,
+                         namespace: Optional[str], resume: bool = False, paths: Optional[List[str]] = None,
+                         metrics: Optional[RunMetrics] = None, extract_workers: Optional[int] = None,
+                         embedding_stats: bool = True) -> Dict:
+    """Batch variant of process_folder: extract and chunk everything, then embed, then upsert."""
     root = Path(folder_path)
     if not root.exists():
         print(f"❌ Folder not found: {root}")
-        return
+        return run_result("failed")
 
     print(f"📁 Processing folder: {root}")
 
-    # Recursive, unique file list
-    supported_ext = {'.pdf', '.docx', '.doc', '.txt', '.md', '.rtf'}
-    files = sorted({
-        p.resolve()
-        for p in root.rglob('*')
-        if p.is_file() and p.suffix.lower() in supported_ext
-    })
-
-    if not files:
+    # Incremental mode: compare against what the last run uploaded
+    manifest = open_manifest(index_name, namespace)
+    with timed(metrics, "discover") as counts:
+        files, removed_paths = collect_files(root, manifest, paths)
+        counts.update(items=len(files), removed=len(removed_paths))
+    if not files and not removed_paths:
         print(f"❌ No supported files found in {root}")
-        print(f"   Supported: {', '.join(sorted(supported_ext))}")
-        return
+        print(f"   Supported: {', '.join(sorted(SUPPORTED_EXTENSIONS))}")
+        return run_result("empty")
 
     print(f"📊 Found {len(files)} file(s) to process")
+    pending_files: Dict[str, Dict] = {}  # file path -> stat/hash of files being (re-)embedded
+    summary = {"skipped_files": 0, "duplicate_chunks": 0, "duplicate_bytes": 0}
 
     all_vectors: List[Dict] = []
     processed_files = 0
@@ -390,112 +1387,141 @@ def process_folder(folder_path: str, openai_client: OpenAI, pc: Pinecone, index_
     all_chunks_for_batch = []  # Store all chunks for batch processing
     all_metadata = []  # Store corresponding metadata
 
-    for file_path in files:
-        print("\n" + "=" * 60)
-        info = process_file(str(file_path))
-        if not info:
-            continue
-
-        chunks = chunk_text(info['content'])
-        print(f"📝 Split into {len(chunks)} chunk(s)")
-
-        # Prepare chunks and metadata for batch processing
-        for chunk_idx, chunk in enumerate(chunks):
-            vector_id = generate_chunk_id(chunk, str(file_path), chunk_idx)
-            
-            # Calculate available space for content (Pinecone has ~40KB metadata limit)
-            max_content_size = 38000  # bytes
-            full_content = chunk
-            
-            # Truncate content only if it exceeds metadata limit
-            if len(full_content.encode('utf-8')) > max_content_size:
-                truncated = full_content.encode('utf-8')[:max_content_size].decode('utf-8', errors='ignore')
-                last_space = truncated.rfind(' ')
-                if last_space > max_content_size * 0.8:
-                    truncated = truncated[:last_space]
-                stored_content = truncated + "... [TRUNCATED]"
-                content_truncated = True
-            else:
-                stored_content = full_content
-                content_truncated = False
-
-            # Store chunk and metadata for batch processing
-            all_chunks_for_batch.append(chunk)
-            all_metadata.append({
-                "vector_id": vector_id,
-                "info": info,
-                "chunk_idx": chunk_idx,
-                "total_chunks": len(chunks),
-                "stored_content": stored_content,
-                "content_truncated": content_truncated,
-                "chunk": chunk
-            })
-            
-            total_chunks += 1
-            if content_truncated:
-                truncated_chunks += 1
-
+    journal = open_journal(index_name, namespace, resume)
+    changed_files = detect_changes(files, manifest, summary, metrics)
+    add_dependent_files(manifest, changed_files, removed_paths, summary)
+    detector = create_dedup_detector()
+    load_dedup_signatures(detector, manifest, index_name, namespace,
+                          [str(path) for path in changed_files] + removed_paths)
+
+    # Files already extracted and chunked by an interrupted run come from the journal
+    prepared: List[Tuple[Path, Dict, List[Dict]]] = []
+    for file_path, state in list(changed_files.items()):
+        records = journal.resumable_records(str(file_path), state["sha256"])
+        if records is not None:
+            prepared.append((file_path, state, records))
+            del changed_files[file_path]
+    if prepared:
+        print(f"⏯️  Reusing chunks of {len(prepared)} file(s) from the journal")
+
+    def extracted_files() -> Iterator[Tuple[Path, Dict, List[Dict]]]:
+        yield from prepared
+        for file_path, info in extract_changed_files(changed_files, metrics, extract_workers):
+            if not info:
+                continue
+            records = timed_prepare_chunks(info, file_path, metrics)
+            if info.get('stream_error'):
+                continue  # not recorded in the manifest, so the file is retried next run
+            journal.record_file(str(file_path), changed_files[file_path],
+                                file_level_info(info), records)
+            yield file_path, changed_files[file_path], records
+
+    prepared_records: List[Dict] = []
+    for file_path, state, records in extracted_files():
+        pending_files[str(file_path)] = state
+        prepared_records.extend(records)
+        total_chunks += len(records)
         processed_files += 1
-        print(f"✅ Prepared {info['filename']} ({len(chunks)} chunks for batch processing)")
+        print(f"✅ Prepared {file_path.name} ({len(records)} chunks for batch processing)")
+
+    # Extraction completes out of order - sort so batches, duplicate detection
+    # and upsert resume are deterministic
+    prepared_records.sort(key=lambda record: (record["info"]["filepath"], record["chunk_idx"]))
+    for record in prepared_records:
+        state = pending_files[record["info"]["filepath"]]
+        if suppress_duplicate(detector, record, state, summary):
+            continue
+        state["chunk_ids"].append(record["vector_id"])
+        all_chunks_for_batch.append(record["chunk"])
+        all_metadata.append(record)
+        if record["content_truncated"]:
+            truncated_chunks += 1
+    del prepared_records
+
+    skipped_files = summary["skipped_files"]
+    if skipped_files:
+        print(f"\n⏭️  Skipped {skipped_files} unchanged file(s)")
+    if removed_paths:
+        print(f"🗑️  {len(removed_paths)} file(s) removed since last run")
 
     if not all_chunks_for_batch:
-        print("❌ No chunks were prepared for embedding. Check the files and try again.")
-        return
+        if skipped_files or removed_paths or summary["duplicate_chunks"]:
+            sync_manifest(manifest, pc, index_name, namespace, pending_files, removed_paths, metrics, detector)
+            print_dedup_savings(summary)
+            print("\n✅ Index is up to date - nothing new to embed")
+            status = "up_to_date"
+        else:
+            print("❌ No chunks were prepared for embedding. Check the files and try again.")
+            status = "failed"
+        journal.close(remove=True)
+        return run_result(status, files=len(files), processed_files=processed_files, chunks=total_chunks,
+                          removed=len(removed_paths))
 
     print(f"\n📊 Batch Processing Summary:")
     print(f"   📁 Files prepared: {processed_files}/{len(files)}")
-    print(f"   📄 Total chunks for embedding: {total_chunks}")
+    if skipped_files:
+        print(f"   ⏭️  Files unchanged (skipped): {skipped_files}")
+    print(f"   📄 Total chunks for embedding: {len(all_chunks_for_batch)}")
+    print_dedup_savings(summary)
     print(f"   🧠 Embedding model: {EMBED_MODEL}")
     print(f"   📐 Dimensions: {EMBED_DIMENSIONS}")
-    print(f"   📦 Batch size: {EMBED_BATCH_SIZE}")
+    print(f"   📦 Batch size: up to {EMBED_BATCH_SIZE} inputs / {EMBED_BATCH_TOKENS} tokens")
     print(f"   ⏱️  Timeout: {EMBED_TIMEOUT}ms")
     if truncated_chunks > 0:
         print(f"   ⚠️  Chunks with truncated content: {truncated_chunks}/{total_chunks}")
 
-    # Create embeddings in batches
-    print(f"\n🔄 Creating embeddings for {len(all_chunks_for_batch)} chunks...")
-    embeddings = create_embeddings_batch(openai_client, all_chunks_for_batch)
+    # Create embeddings in batches (skipping those already paid for by an interrupted run)
+    embeddings = [journal.embeddings.get(metadata["vector_id"]) for metadata in all_metadata]
+    to_embed = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if len(to_embed) < len(embeddings):
+        print(f"⏯️  {len(embeddings) - len(to_embed)} embedding(s) recovered from the journal")
+    if to_embed:
+        print(f"\n🔄 Creating embeddings for {len(to_embed)} chunks...")
+    try:
+        new_embeddings = create_embeddings_batch(openai_client, [all_chunks_for_batch[i] for i in to_embed],
+                                                 token_counts=[all_metadata[i].get("token_count") for i in to_embed],
+                                                 metrics=metrics)
+    except Exception as e:
+        print(f"❌ Error creating embeddings: {e}")
+        journal.close()
+        return run_result("failed", files=len(files), processed_files=processed_files, chunks=total_chunks)
+    journal.record_embeddings([all_metadata[i]["vector_id"] for i in to_embed], new_embeddings)
+    for i, embedding in zip(to_embed, new_embeddings):
+        embeddings[i] = embedding
+
+    # Chunk text goes to the content store before its vector becomes searchable
+    store_content(index_name, namespace, [metadata for metadata, embedding in zip(all_metadata, embeddings)
+                                          if embedding is not None])
 
     # Create vectors with embeddings
     successful_embeddings = 0
     for i, (embedding, metadata) in enumerate(zip(embeddings, all_metadata)):
         if embedding is None:
             print(f"   ⚠️  Skipping chunk {i+1} due to embedding failure")
+            # Leave the file out of the manifest so the next run retries it
+            pending_files[metadata["info"]["filepath"]]["failed"] = True
             continue
 
-        vector = {
-            "id": metadata["vector_id"],
-            "values": embedding,
-            "metadata": {
-                "filename": metadata["info"]['filename'],
-                "filepath": metadata["info"]['filepath'],
-                "file_type": metadata["info"]['type'],
-                "file_size": metadata["info"]['size'],
-                "file_modified": metadata["info"]['modified'],
-                "chunk_index": metadata["chunk_idx"],
-                "total_chunks": metadata["total_chunks"],
-                "content": metadata["stored_content"],
-                "content_truncated": metadata["content_truncated"],
-                "word_count": len(metadata["chunk"].split()),
-                "char_count": len(metadata["chunk"]),
-                "processed_at": datetime.now().isoformat()
-            }
-        }
-        all_vectors.append(vector)
+        all_vectors.append(build_vector(metadata, embedding))
         successful_embeddings += 1
 
     print(f"✅ Successfully created {successful_embeddings}/{len(all_chunks_for_batch)} embeddings")
+    if embedding_stats:
+        print_embedding_stats(openai_client)
 
     if not all_vectors:
         print("❌ No embeddings were created. Check the files and try again.")
-        return
+        journal.close()
+        return run_result("failed", files=len(files), processed_files=processed_files, chunks=total_chunks)
 
     print("\n" + "=" * 60)
     print("📊 Final Processing Summary:")
     print(f"   📁 Files processed: {processed_files}/{len(files)}")
     print(f"   📄 Total chunks: {total_chunks}")
+    print_dedup_savings(summary)
     print(f"   🧠 Successful embeddings: {len(all_vectors)}")
     print(f"   📐 Vector dimensions: {EMBED_DIMENSIONS}")
+    print_content_store_stats(index_name, namespace)
     if truncated_chunks > 0:
         print(f"   ⚠️  Chunks with truncated content: {truncated_chunks}/{total_chunks}")
         print(f"       (Content was too large for Pinecone metadata limits)")
@@ -504,16 +1530,572 @@ def process_folder(folder_path: str, openai_client: OpenAI, pc: Pinecone, index_
     print("🔎 Example IDs:", [v["id"] for v in all_vectors[:3]])
 
     print(f"\n🔄 Uploading embeddings to Pinecone index '{index_name}'...")
-    ok = upload_to_pinecone(pc, index_name, all_vectors, namespace=namespace)
-    if ok:
+    to_upload = [v for v in all_vectors if v["id"] not in journal.upserted]
+    if len(to_upload) < len(all_vectors):
+        print(f"⏯️  {len(all_vectors) - len(to_upload)} vector(s) were already acknowledged before the interruption")
+    def acknowledge(vectors: List[Dict], ok: bool):
+        if ok:
+            journal.record_upserted([v["id"] for v in vectors])
+
+    try:
+        report = upsert_vectors(pc, index_name, to_upload, namespace=namespace, on_batch_done=acknowledge,
+                                metrics=metrics)
+    except Exception as e:
+        print(f"❌ Error uploading to Pinecone: {e}")
+        print("\n❌ Failed to upload embeddings to Pinecone")
+        journal.close()
+        return run_result("failed", files=len(files), processed_files=processed_files, chunks=total_chunks)
+
+    # Files with a failed batch stay out of the manifest and are retried next run
+    failed_ids = set(report["failed_ids"])
+    for vector in all_vectors:
+        if vector["id"] in failed_ids:
+            pending_files[vector["metadata"]["filepath"]]["failed"] = True
+    fail_orphaned_duplicates(pending_files)
+    sync_manifest(manifest, pc, index_name, namespace, pending_files, removed_paths, metrics, detector)
+    # The journal is only needed until every chunk is safely in Pinecone
+    journal.close(remove=not failed_ids and not any(state["failed"] for state in pending_files.values()))
+
+    if not failed_ids:
         print("\n🎉 Successfully processed and uploaded all files!")
         print(f"   📊 Index '{index_name}' now contains embeddings from {processed_files} files")
         print("   🔍 You can now search and query this knowledge base")
+        status = "partial" if any(state["failed"] for state in pending_files.values()) else "ok"
+    elif len(failed_ids) < len(all_vectors):
+        print(f"\n⚠️  {len(failed_ids)}/{len(all_vectors)} vectors failed to upload - "
+              "the affected files will be retried on the next run")
+        status = "partial"
     else:
         print("\n❌ Failed to upload embeddings to Pinecone")
+        status = "failed"
+    return run_result(status, files=len(files), processed_files=processed_files, chunks=total_chunks,
+                      uploaded=len(all_vectors) - len(failed_ids), removed=len(removed_paths),
+                      failed_files=sum(1 for state in pending_files.values() if state["failed"]))
+
+
+# =========================
+# Streaming pipeline
+# =========================
+
+_END = object()  # End-of-stream marker passed between pipeline stages
+
+
+def _queue_put(q: queue.Queue, item, stop_event: threading.Event) -> bool:
+    """Put into a bounded queue, giving up if the pipeline is being stopped."""
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _queue_iter(q: queue.Queue, stop_event: threading.Event) -> Iterator:
+    """Iterate over queue items until the end marker (or a pipeline stop)."""
+    while True:
+        try:
+            item = q.get(timeout=0.5)
+        except queue.Empty:
+            if stop_event.is_set():
+                return
+            continue
+        if item is _END:
+            return
+        yield item
+
+
+def _run_stage(name: str, target: Callable[[], None], out_queue: queue.Queue,
+               stop_event: threading.Event, errors: List[str]):
+    """Run a pipeline stage, always signalling end-of-stream downstream."""
+    try:
+        target()
+    except Exception as e:
+        print(f"❌ Error in {name} stage: {e}")
+        errors.append(f"{name}: {e}")
+        stop_event.set()
+    finally:
+        _queue_put(out_queue, _END, stop_event)
+
+
+def process_folder_streaming(folder_path: str, openai_client: OpenAI, pc: Pinecone, index_name: str,
+                             namespace: Optional[str], resume: bool = False, paths: Optional[List[str]] = None,
+                             metrics: Optional[RunMetrics] = None, extract_workers: Optional[int] = None,
+                             embedding_stats: bool = True) -> Dict:
+    """
+    Streaming variant of process_folder.
+
+    Extraction, chunking, embedding and upserting run as separate stages connected
+    by bounded queues, so memory stays flat regardless of corpus size and vectors
+    land in Pinecone while later files are still being parsed.
+    """
+    root = Path(folder_path)
+    if not root.exists():
+        print(f"❌ Folder not found: {root}")
+        return run_result("failed")
+
+    print(f"📁 Processing folder (streaming): {root}")
+
+    manifest = open_manifest(index_name, namespace)
+    with timed(metrics, "discover") as counts:
+        files, removed_paths = collect_files(root, manifest, paths)
+        counts.update(items=len(files), removed=len(removed_paths))
+    if not files and not removed_paths:
+        print(f"❌ No supported files found in {root}")
+        print(f"   Supported: {', '.join(sorted(SUPPORTED_EXTENSIONS))}")
+        return run_result("empty")
+
+    print(f"📊 Found {len(files)} file(s) to process")
+    pending_files: Dict[str, Dict] = {}
+
+    summary = {
+        "skipped_files": 0,
+        "processed_files": 0,
+        "total_chunks": 0,
+        "truncated_chunks": 0,
+        "embedded": 0,
+        "uploaded": 0,
+        "failed_batches": 0,
+        "duplicate_chunks": 0,
+        "duplicate_bytes": 0,
+    }
+    errors: List[str] = []
+    stop_event = threading.Event()
+    journal = open_journal(index_name, namespace, resume)
+    detector = create_dedup_detector()
+
+    # Bounded queues: at most PIPELINE_QUEUE_SIZE documents / batches buffered per stage
+    doc_queue: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    chunk_queue: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE * EMBED_BATCH_SIZE)
+    vector_queue: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE * UPSERT_BATCH_SIZE)
+
+    def extract_stage():
+        changed_files = detect_changes(files, manifest, summary, metrics)
+        add_dependent_files(manifest, changed_files, removed_paths, summary)
+        # Before any chunk reaches the chunk stage's duplicate check
+        load_dedup_signatures(detector, manifest, index_name, namespace,
+                              [str(path) for path in changed_files] + removed_paths)
+
+        # Files chunked by an interrupted run skip extraction entirely
+        for file_path, state in list(changed_files.items()):
+            records = journal.resumable_records(str(file_path), state["sha256"])
+            if records is None:
+                continue
+            del changed_files[file_path]
+            pending_files[str(file_path)] = state
+            if not _queue_put(doc_queue, (file_path, None, state, records), stop_event):
+                return
+
+        for file_path, info in extract_changed_files(changed_files, metrics, extract_workers):
+            if stop_event.is_set():
+                return
+            if not info:
+                continue
+            state = changed_files[file_path]
+            pending_files[str(file_path)] = state
+            if not _queue_put(doc_queue, (file_path, info, state, None), stop_event):
+                return
+
+    def chunk_stage():
+        for file_path, info, state, records in _queue_iter(doc_queue, stop_event):
+            streamed = records is None and info.get('page_stream')
+            if streamed:
+                # Chunks flow on while later pages are still being read. The file is not
+                # journaled (that would hold all its chunks); its embeddings and upserts are.
+                records = timed_iter(metrics, "chunk", iter_chunk_records(info, file_path), kind=chunk_kind(info))
+            elif records is None:
+                records = timed_prepare_chunks(info, file_path, metrics)
+                journal.record_file(str(file_path), state, records[0]["info"] if records else {}, records)
+                info = None  # release the document text before the next one is parsed
+            state["uploaded"] = 0
+            summary["processed_files"] += 1
+            for record in records:
+                summary["total_chunks"] += 1
+                if suppress_duplicate(detector, record, state, summary):
+                    continue
+                state["chunk_ids"].append(record["vector_id"])
+                record["file_state"] = state
+                if record["content_truncated"]:
+                    summary["truncated_chunks"] += 1
+                if not _queue_put(chunk_queue, record, stop_event):
+                    return
+            if streamed and info.get('stream_error'):
+                state["failed"] = True  # partially read - retried on the next run
+
+    def embed_batch(batch: List[Dict]) -> bool:
+        embeddings = [journal.embeddings.get(record["vector_id"]) for record in batch]
+        to_embed = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        new_embeddings = create_embeddings_batch(openai_client, [batch[i]["chunk"] for i in to_embed],
+                                                 token_counts=[batch[i].get("token_count") for i in to_embed],
+                                                 metrics=metrics)
+        journal.record_embeddings([batch[i]["vector_id"] for i in to_embed], new_embeddings)
+        for i, embedding in zip(to_embed, new_embeddings):
+            embeddings[i] = embedding
+        store_content(index_name, namespace, [record for record, embedding in zip(batch, embeddings)
+                                              if embedding is not None])
+
+        for record, embedding in zip(batch, embeddings):
+            if embedding is None:
+                record["file_state"]["failed"] = True
+                continue
+            summary["embedded"] += 1
+            if not _queue_put(vector_queue, (build_vector(record, embedding), record["file_state"]), stop_event):
+                return False
+        return True
+
+    def embed_stage():
+        batch: List[Dict] = []
+        for record in _queue_iter(chunk_queue, stop_event):
+            batch.append(record)
+            if len(batch) >= EMBED_BATCH_SIZE * EMBED_CONCURRENCY:
+                if not embed_batch(batch):
+                    return
+                batch = []
+        if batch:
+            embed_batch(batch)
+
+    stages = [
+        threading.Thread(target=_run_stage, args=("extract", extract_stage, doc_queue, stop_event, errors), daemon=True),
+        threading.Thread(target=_run_stage, args=("chunk", chunk_stage, chunk_queue, stop_event, errors), daemon=True),
+        threading.Thread(target=_run_stage, args=("embed", embed_stage, vector_queue, stop_event, errors), daemon=True),
+    ]
+    for stage in stages:
+        stage.start()
+
+    # Upsert stage: the main thread batches vectors for the parallel upserter
+    upserter = create_upserter(pc, index_name, namespace, metrics=metrics)
+    progress_lock = threading.Lock()  # upsert callbacks run on worker threads
+
+    def on_upserted(states: List[Dict], vectors: List[Dict], ok: bool):
+        if ok:
+            journal.record_upserted([vector["id"] for vector in vectors])
+        with progress_lock:
+            count_upserted(states, vectors, ok)
+
+    def count_upserted(states: List[Dict], vectors: List[Dict], ok: bool):
+        for state in states:
+            if ok:
+                state["uploaded"] += 1
+            else:
+                # Isolate the failure: the affected files are retried next run
+                state["failed"] = True
+        if ok:
+            summary["uploaded"] += len(vectors)
+            print(f"📤 Uploaded batch of {len(vectors)} vectors ({summary['uploaded']} total)")
+        else:
+            summary["failed_batches"] += 1
+
+    def submit_batch(batch: List[Tuple[Dict, Dict]]):
+        states = [state for _, state in batch]
+        upserter.submit([vector for vector, _ in batch],
+                        on_done=lambda vectors, ok: on_upserted(states, vectors, ok))
+
+    upsert_report: Optional[Dict] = None
+    try:
+        pending_batch: List[Tuple[Dict, Dict]] = []
+        for item in _queue_iter(vector_queue, stop_event):
+            vector, state = item
+            if vector["id"] in journal.upserted:
+                # Acknowledged before the interruption
+                with progress_lock:
+                    state["uploaded"] += 1
+                    summary["uploaded"] += 1
+                continue
+            pending_batch.append(item)
+            if len(pending_batch) >= UPSERT_BATCH_SIZE:
+                submit_batch(pending_batch)
+                pending_batch = []
+        if pending_batch and not stop_event.is_set():
+            submit_batch(pending_batch)
+        upsert_report = upserter.wait()
+    except KeyboardInterrupt:
+        print("\n⚠️  Interrupted - stopping pipeline...")
+        errors.append("interrupted")
+        stop_event.set()
+    finally:
+        upserter.close()
+        for stage in stages:
+            stage.join(timeout=5)
+
+    if upsert_report and not errors and not upsert_report["failed_batches"]:
+        upserter.progress.clear()
+
+    # A file only counts as indexed once every one of its chunks is in Pinecone
+    for state in pending_files.values():
+        if state.get("uploaded", 0) != len(state["chunk_ids"]):
+            state["failed"] = True
+    fail_orphaned_duplicates(pending_files)
+
+    print("\n" + "=" * 60)
+    print("📊 Final Processing Summary (streaming):")
+    print(f"   📁 Files processed: {summary['processed_files']}/{len(files)}")
+    if summary["skipped_files"]:
+        print(f"   ⏭️  Files unchanged (skipped): {summary['skipped_files']}")
+    if removed_paths:
+        print(f"   🗑️  Files removed since last run: {len(removed_paths)}")
+    print(f"   📄 Total chunks: {summary['total_chunks']}")
+    print_dedup_savings(summary)
+    print(f"   🧠 Successful embeddings: {summary['embedded']}")
+    print(f"   📤 Vectors uploaded: {summary['uploaded']}")
+    if upsert_report:
+        print_upsert_report(upsert_report)
+    if embedding_stats:
+        print_embedding_stats(openai_client)
+    print(f"   📐 Vector dimensions: {EMBED_DIMENSIONS}")
+    print_content_store_stats(index_name, namespace)
+    if summary["truncated_chunks"] > 0:
+        print(f"   ⚠️  Chunks with truncated content: {summary['truncated_chunks']}/{summary['total_chunks']}")
+
+    sync_manifest(manifest, pc, index_name, namespace, pending_files, removed_paths, metrics, detector)
+    journal.close(remove=not errors and not any(state["failed"] for state in pending_files.values()))
+
+    failed_files = sum(1 for state in pending_files.values() if state["failed"])
+    if errors:
+        print(f"\n❌ Pipeline stopped early: {'; '.join(errors)}")
+        status = "failed"
+    elif failed_files:
+        print("\n⚠️  Some files were not fully uploaded - they will be retried on the next run")
+        status = "partial"
+    elif summary["uploaded"]:
+        print("\n🎉 Successfully processed and uploaded all files!")
+        print("   🔍 You can now search and query this knowledge base")
+        status = "ok"
+    elif summary["skipped_files"] or removed_paths or summary["duplicate_chunks"]:
+        print("\n✅ Index is up to date - nothing new to embed")
+        status = "up_to_date"
+    else:
+        print("❌ No embeddings were created. Check the files and try again.")
+        status = "failed"
+    return run_result(status, files=len(files), processed_files=summary["processed_files"],
+                      chunks=summary["total_chunks"], uploaded=summary["uploaded"], removed=len(removed_paths),
+                      failed_files=failed_files)
+
+
+def watch_folder(folder_path: str, openai_client: OpenAI, pc: Pinecone, index_name: str,
+                 namespace: Optional[str], resume: bool = False):
+    """Sync the folder, then keep syncing the files that change until interrupted."""
+    first_sync = [True]
+
+    def sync(paths: Optional[List[str]]):
+        process_folder(folder_path, openai_client, pc, index_name, namespace,
+                       resume=resume and first_sync[0], paths=paths)
+        first_sync[0] = False
+
+    watcher = FolderWatcher(
+        folder_path,
+        sync,
+        extensions=SUPPORTED_EXTENSIONS,
+        debounce=WATCH_DEBOUNCE,
+        max_delay=WATCH_MAX_DELAY,
+        poll_interval=WATCH_POLL_INTERVAL,
+        full_sync_interval=WATCH_FULL_SYNC_MINUTES * 60,
+        backend=WATCH_BACKEND,
+    )
+    watcher.run()
+
+
+# =========================
+# Programmatic / non-interactive ingestion
+# =========================
+
+INGEST_OPTIONS = {"streaming", "resume", "paths", "extract_workers"}
+SUCCESS_STATUSES = {"ok", "up_to_date"}
+
+
+def ingest(folder: str, index_name: str, namespace: Optional[str] = None, options: Optional[Dict] = None,
+           openai_client: Optional[OpenAI] = None, pc: Optional[Pinecone] = None, batch_job: bool = False) -> Dict:
+    """
+    Embed a folder into an index/namespace without any prompt (for scripts and schedulers).
+
+    Args:
+        folder (str): Folder to ingest
+        index_name (str): Target index (local indexes are created on first use)
+        namespace (str, optional): Target namespace
+        options (Dict, optional): "streaming" (bool), "resume" (bool), "paths" (List[str]) and
+            "extract_workers" (int); anything else comes from the environment as usual
+        openai_client (OpenAI, optional): Jobs passing the same client share its embedding
+            thread pool and rate limiter (created from the environment if omitted)
+        pc (Pinecone, optional): Vector store client (created from the environment if omitted)
+        batch_job (bool): Run by ingest_many - the index was already checked, and the shared
+            embedding engine's counters are reported once for all jobs
+
+    Returns:
+        Dict: run_result() of the run with folder, index, namespace and elapsed seconds added
+    """
+    options = dict(options or {})
+    unknown = set(options) - INGEST_OPTIONS
+    if unknown:
+        raise ValueError(f"Unknown ingest option(s): {', '.join(sorted(unknown))}")
+
+    started = time.perf_counter()
+    if openai_client is None or pc is None:
+        clients = initialize_clients()
+        openai_client = openai_client or clients[0]
+        pc = pc or clients[1]
+
+    if not openai_client or not pc or not (batch_job or ensure_index(pc, index_name)):
+        result = run_result("failed")
+    else:
+        result = process_folder(
+            folder, openai_client, pc, index_name, namespace,
+            streaming=options.get("streaming", STREAMING),
+            resume=options.get("resume", False),
+            paths=options.get("paths"),
+            extract_workers=options.get("extract_workers"),
+            embedding_stats=not batch_job,
+        )
+    result.update(folder=str(folder), index=index_name, namespace=namespace or "",
+                  elapsed=time.perf_counter() - started)
+    return result
+
+
+def ingest_many(jobs: List[Dict], max_parallel: int = INGEST_PARALLEL, options: Optional[Dict] = None,
+                openai_client: Optional[OpenAI] = None, pc: Optional[Pinecone] = None) -> List[Dict]:
+    """
+    Run several folder -> index/namespace jobs concurrently.
+
+    All jobs share one OpenAI client, so embedding requests go through one thread pool
+    (OPENAI_EMBED_CONCURRENCY) and one RPM/TPM rate limiter no matter how many jobs run.
+
+    Args:
+        jobs (List[Dict]): {"folder", "index", "namespace", "options"} per job ("options" optional,
+            merged over the shared `options`)
+        max_parallel (int): Jobs running at the same time
+        options (Dict, optional): ingest() options for every job
+
+    Returns:
+        List[Dict]: One ingest() result per job, in job order
+    """
+    targets = [(job["index"], job.get("namespace") or "") for job in jobs]
+    duplicates = sorted({f"{index}/{namespace or '(default)'}" for index, namespace in targets
+                         if targets.count((index, namespace)) > 1})
+    if duplicates:
+        # Two jobs would share one manifest and journal
+        raise ValueError(f"Several jobs target the same index/namespace: {', '.join(duplicates)}")
+
+    if openai_client is None or pc is None:
+        clients = initialize_clients()
+        openai_client = openai_client or clients[0]
+        pc = pc or clients[1]
+    if not openai_client or not pc:
+        return [run_result("failed", folder=job["folder"], index=job["index"], namespace=job.get("namespace") or "")
+                for job in jobs]
+
+    max_parallel = max(1, min(max_parallel, len(jobs)))
+    # Split the extraction processes between the jobs running at the same time
+    extract_workers = max(1, EXTRACT_WORKERS // max_parallel)
+    print(f"🚚 Ingesting {len(jobs)} job(s), {max_parallel} at a time "
+          f"({extract_workers} extraction worker(s) each, shared embedding pool of {EMBED_CONCURRENCY})")
+
+    def run_job(job: Dict) -> Dict:
+        job_options = {"extract_workers": extract_workers, **(options or {}), **job.get("options", {})}
+        try:
+            return ingest(job["folder"], job["index"], job.get("namespace"), job_options,
+                          openai_client=openai_client, pc=pc, batch_job=True)
+        except Exception as e:
+            print(f"❌ Job {job['folder']} -> {job['index']}/{job.get('namespace') or ''} failed: {e}")
+            return run_result("failed", folder=str(job["folder"]), index=job["index"],
+                              namespace=job.get("namespace") or "", error=str(e))
+
+    # Checked once up front, so concurrent jobs never race to create a local index
+    ready = {index: ensure_index(pc, index) for index in dict.fromkeys(job["index"] for job in jobs)}
+    with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="ingest") as executor:
+        futures = [executor.submit(run_job, job) if ready[job["index"]] else None for job in jobs]
+        results = []
+        for job, future in zip(jobs, futures):
+            if future is None:
+                results.append(run_result("failed", folder=str(job["folder"]), index=job["index"],
+                                          namespace=job.get("namespace") or "", error="index not available"))
+            else:
+                results.append(future.result())
+    # The embedding engine (and its counters) is shared by every job
+    print("\n📡 Embedding totals for all jobs:")
+    print_embedding_stats(openai_client)
+    return results
+
+
+def parse_job(spec: str, default_index: Optional[str]) -> Dict:
+    """Parse a --job value: FOLDER=NAMESPACE or FOLDER=INDEX/NAMESPACE (FOLDER alone uses the default namespace)."""
+    folder, _, target = spec.rpartition("=") if "=" in spec else (spec, "", "")
+    index, _, namespace = target.rpartition("/") if "/" in target else (default_index, "", target)
+    if not index:
+        raise ValueError(f"No index for job '{spec}' - use FOLDER=INDEX/NAMESPACE or set --index")
+    return {"folder": folder, "index": index, "namespace": namespace or None}
+
+
+def load_jobs_file(path: str, default_index: Optional[str]) -> List[Dict]:
+    """Read jobs from a JSON list of {"folder", "index", "namespace", "options"} objects."""
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    jobs = []
+    for entry in entries:
+        index = entry.get("index") or default_index
+        if not entry.get("folder") or not index:
+            raise ValueError(f"Job needs a folder and an index (or --index): {entry}")
+        jobs.append({"folder": entry["folder"], "index": index, "namespace": entry.get("namespace"),
+                     "options": entry.get("options", {})})
+    return jobs
+
+
+def print_ingest_summary(results: List[Dict]):
+    """Print one line per ingestion job."""
+    icons = {"ok": "✅", "up_to_date": "✅", "partial": "⚠️ ", "empty": "⚠️ ", "failed": "❌"}
+    print("\n" + "=" * 60)
+    print("📋 Ingestion Summary:")
+    for result in results:
+        target = f"{result['index']}/{result['namespace'] or '(default)'}"
+        counts = (f"{result.get('processed_files', 0)}/{result.get('files', 0)} files, "
+                  f"{result.get('uploaded', 0)} vectors uploaded")
+        print(f"   {icons.get(result['status'], '❓')} {result['folder']} -> {target}: {result['status']} "
+              f"({counts}, {result.get('elapsed', 0):.1f}s)")
+        if result.get("error"):
+            print(f"      {result['error']}")
+    succeeded = sum(1 for result in results if result["status"] in SUCCESS_STATUSES)
+    print(f"   {succeeded}/{len(results)} job(s) succeeded")
+
+
+def run_jobs(args: argparse.Namespace) -> int:
+    """Non-interactive CLI: run the --job / --jobs-file jobs and return the process exit code."""
+    load_environment()
+    default_index = args.index or INDEX_NAME
+    try:
+        jobs = [parse_job(spec, default_index) for spec in args.job]
+        if args.jobs_file:
+            jobs.extend(load_jobs_file(args.jobs_file, default_index))
+    except (OSError, ValueError) as e:
+        print(f"❌ Invalid jobs: {e}")
+        return 2
+
+    options = {"resume": args.resume}
+    if args.streaming is not None:
+        options["streaming"] = args.streaming
+    try:
+        results = ingest_many(jobs, max_parallel=args.parallel, options=options)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    print_ingest_summary(results)
+    return 0 if all(result["status"] in SUCCESS_STATUSES for result in results) else 1
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Embed a folder of documents into a Pinecone index")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run from its checkpoint journal")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and sync files as they are created, modified, moved or deleted")
+    parser.add_argument("--yes", "-y", action="store_true", help="Do not ask for confirmation")
+    parser.add_argument("--job", action="append", default=[], metavar="FOLDER=[INDEX/]NAMESPACE",
+                        help="Ingest a folder into a namespace without prompting (repeatable, jobs run concurrently)")
+    parser.add_argument("--jobs-file", help="JSON list of jobs: {\"folder\", \"index\", \"namespace\", \"options\"}")
+    parser.add_argument("--index", help="Index of --job/--jobs-file entries that name none (default: PINECONE_INDEX_NAME)")
+    parser.add_argument("--parallel", type=int, default=INGEST_PARALLEL, help="Jobs run at the same time")
+    parser.add_argument("--streaming", action="store_true", default=None, help="Use the streaming pipeline for jobs")
+    args = parser.parse_args()
+
+    if args.job or args.jobs_file:
+        sys.exit(run_jobs(args))
+
     print("🧠 Folder Embedding Script for Pinecone")
     print("=" * 60)
     
@@ -561,45 +2143,55 @@ def main():
     print(f"🧠 Embedding configuration:")
     print(f"   Model: {EMBED_MODEL}")
     print(f"   Dimensions: {EMBED_DIMENSIONS}")
-    print(f"   Batch Size: {EMBED_BATCH_SIZE}")
+    print(f"   Batch Size: up to {EMBED_BATCH_SIZE} inputs / {EMBED_BATCH_TOKENS} tokens per request")
     print(f"   Timeout: {EMBED_TIMEOUT}ms")
+    print(f"   Concurrency: {EMBED_CONCURRENCY} requests in flight ({EMBED_RPM} RPM / {EMBED_TPM} TPM budget)")
     
     print(f"📝 Text Splitter configuration:")
-    print(f"   Type: Recursive Character Text Splitter")
-    print(f"   Chunk Size: {CHUNK_SIZE} characters")
-    print(f"   Chunk Overlap: {CHUNK_OVERLAP} characters")
+    if CHUNK_MODE == "tokens":
+        print(f"   Type: Token windows ({EMBED_MODEL} tokenizer, one tokenization per document)")
+        print(f"   Chunk Size: {CHUNK_TOKENS} tokens")
+        print(f"   Chunk Overlap: {CHUNK_TOKEN_OVERLAP} tokens")
+    else:
+        print(f"   Type: Recursive Character Text Splitter (offset-based chunker)")
+        print(f"   Chunk Size: {CHUNK_SIZE} characters")
+        print(f"   Chunk Overlap: {CHUNK_OVERLAP} characters")
+    if PDF_STREAMING and CHUNK_MODE == "tokens":
+        print(f"   ℹ️  PDF page streaming is not used with token-window chunking")
+    elif PDF_STREAMING:
+        print(f"   PDF page streaming: PDFs of {PDF_STREAM_MIN_MB:g} MB or more")
+    print(f"⚙️  Pipeline mode: {'Streaming' if STREAMING else 'Batch'}")
+    print(f"🗄️  Vector backend: {VECTOR_BACKEND}")
+    if CONTENT_STORE:
+        print(f"🗃️  Content store: {content_store_path(CONTENT_STORE_DIR, final_index_name, final_namespace)}")
     print()
 
     openai_client, pc = initialize_clients()
     if not openai_client or not pc:
         sys.exit(1)
 
-    # Verify index exists
-    try:
-        indexes = pc.list_indexes().names()
-        if final_index_name not in indexes:
-            print(f"❌ Index '{final_index_name}' not found!")
-            print(f"Available indexes: {', '.join(indexes) if indexes else 'None'}")
-            print("Please create the index first using create_index.py")
-            sys.exit(1)
-        else:
-            print(f"✅ Found index '{final_index_name}'")
-    except Exception as e:
-        print(f"❌ Error checking indexes: {e}")
+    if not ensure_index(pc, final_index_name):
         sys.exit(1)
 
+    if args.watch:
+        # Long-running and unattended: no confirmation prompt
+        watch_folder(final_folder_path, openai_client, pc, final_index_name, final_namespace, resume=args.resume)
+        return
+
     print("\n⚠️  This will process all supported files in:")
     print(f"   {final_folder_path}")
     print(f"   And upload embeddings to index '{final_index_name}'")
     if final_namespace:
         print(f"   Using namespace: '{final_namespace}'")
     
-    confirmation = input("\nProceed? (y/N): ").strip().lower()
-    if confirmation not in ("y", "yes"):
-        print("❌ Operation cancelled by user.")
-        return
-
-    process_folder(final_folder_path, openai_client, pc, final_index_name, namespace=final_namespace)
+    if not args.yes:
+        confirmation = input("\nProceed? (y/N): ").strip().lower()
+        if confirmation not in ("y", "yes"):
+            print("❌ Operation cancelled by user.")
+            return
+
+    process_folder(final_folder_path, openai_client, pc, final_index_name, namespace=final_namespace,
+                   resume=args.resume)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Persistent content-addressed embedding cache
+
+Embeddings are stored in a local SQLite file keyed by a hash of
+(model, dimensions, text), as raw float32 blobs. The cache is bounded by the
+bytes actually stored (vectors of different dimensions may share one file)
+with least-recently-used eviction, and keeps hit/miss counters so a run can
+report how many OpenAI calls it saved.
+"""
+
+import os
+import sqlite3
+import hashlib
+import threading
+import time
+from typing import List, Dict, Optional
+
+import numpy as np
+
+
+SQLITE_MAX_PARAMS = 900  # Stay below SQLite's bound-parameter limit per statement
+
+
+def cache_key(model: str, dimensions: int, text: str) -> str:
+    """Content address of an embedding."""
+    return hashlib.sha256(f"{model}\x00{dimensions}\x00{text}".encode('utf-8')).hexdigest()
+
+
+def pack_vector(vector) -> bytes:
+    """Serialize a vector (array or list) as raw little-endian float32 bytes."""
+    return np.asarray(vector, dtype='<f4').tobytes()
+
+
+def unpack_vector(blob: bytes) -> np.ndarray:
+    """Read raw float32 bytes as a (read-only) float32 array, without copying."""
+    return np.frombuffer(blob, dtype='<f4')
+
+
+class EmbeddingCache:
+    """SQLite-backed LRU cache of embedding vectors."""
+
+    def __init__(self, path: str, max_bytes: int = 1024 * 1024 * 1024):
+        """
+        Args:
+            path (str): SQLite database file
+            max_bytes (int): Upper bound on stored vector bytes; least recently
+                used entries are evicted beyond it
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        self._count_bytes()
+
+    def _count_bytes(self):
+        """Recount the stored vector bytes (on open, and after another process wrote to the file)."""
+        self._stored_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(length(vector)), 0) FROM embeddings").fetchone()[0]
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def get_many(self, model: str, dimensions: int, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Look up embeddings for texts as read-only float32 arrays (None where not cached)."""
+        keys = [cache_key(model, dimensions, text) for text in texts]
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            unique_keys = list(dict.fromkeys(keys))
+            for start in range(0, len(unique_keys), SQLITE_MAX_PARAMS):
+                batch = unique_keys[start:start + SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+            hits = sum(1 for key in keys if key in found)
+            self.stats["hits"] += hits
+            self.stats["misses"] += len(keys) - hits
+
+        return [unpack_vector(found[key]) if key in found else None for key in keys]
+
+    def put_many(self, model: str, dimensions: int, texts: List[str], embeddings: List[Optional[np.ndarray]]):
+        """Store float32 embeddings (lists are converted; None entries are skipped) and evict if over budget."""
+        now = time.time()
+        rows = [
+            (cache_key(model, dimensions, text), pack_vector(embedding), now)
+            for text, embedding in zip(texts, embeddings)
+            if embedding is not None
+        ]
+        if not rows:
+            return
+        rows = list({row[0]: row for row in rows}.values())
+        with self._lock:
+            if self._conn.execute("PRAGMA data_version").fetchone()[0] != self._data_version:
+                self._count_bytes()
+            # Bytes of the rows about to be replaced
+            replaced = 0
+            keys = [row[0] for row in rows]
+            for start in range(0, len(keys), SQLITE_MAX_PARAMS):
+                batch = keys[start:start + SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                replaced += self._conn.execute(
+                    f"SELECT COALESCE(SUM(length(vector)), 0) FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchone()[0]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+            self._stored_bytes += sum(len(row[1]) for row in rows) - replaced
+            self.stats["writes"] += len(rows)
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used rows until the stored bytes fit max_bytes (caller holds the lock)."""
+        excess = self._stored_bytes - self.max_bytes
+        if excess <= 0:
+            return
+        doomed, freed = [], 0
+        cursor = self._conn.execute("SELECT key, length(vector) FROM embeddings ORDER BY last_used")
+        for key, size in cursor:
+            if freed >= excess:
+                break
+            doomed.append((key,))
+            freed += size
+        cursor.close()
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
+        self._conn.commit()
+        self._stored_bytes -= freed
+        self.stats["evictions"] += len(doomed)
+
+    def stored_bytes(self) -> int:
+        """Vector bytes currently kept in the cache."""
+        with self._lock:
+            return self._stored_bytes
+
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
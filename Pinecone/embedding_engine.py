@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Concurrent, rate-limit-aware OpenAI embedding engine
+
+Keeps several embedding requests in flight on a thread pool while staying under
+a requests-per-minute and tokens-per-minute budget. 429 responses trigger an
+adaptive backoff that pauses every worker (honouring Retry-After when the API
+sends it). Results are always returned in input order.
+
+Embeddings are requested base64-encoded and decoded straight into one
+preallocated float32 array per call; callers get row views of it (~6 KB per
+1536-d vector instead of a list of boxed Python floats).
+"""
+
+import base64
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Callable
+
+import numpy as np
+from openai import OpenAI, RateLimitError, APIStatusError, APIConnectionError, APITimeoutError
+
+from run_metrics import RunMetrics, timed
+
+
+class RateLimiter:
+    """Token-bucket limiter for requests per minute and tokens per minute."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.rpm = max(1, requests_per_minute)
+        self.tpm = max(1, tokens_per_minute)
+        self._request_allowance = float(self.rpm)
+        self._token_allowance = float(self.tpm)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._request_allowance = min(self.rpm, self._request_allowance + elapsed * self.rpm / 60.0)
+        self._token_allowance = min(self.tpm, self._token_allowance + elapsed * self.tpm / 60.0)
+
+    def acquire(self, tokens: int):
+        """Block until one request carrying `tokens` tokens fits in the budget."""
+        tokens = min(max(tokens, 1), self.tpm)  # an oversized request must still be able to run
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._request_allowance >= 1 and self._token_allowance >= tokens:
+                        self._request_allowance -= 1
+                        self._token_allowance -= tokens
+                        return
+                    missing_requests = max(0.0, 1 - self._request_allowance) * 60.0 / self.rpm
+                    missing_tokens = max(0.0, tokens - self._token_allowance) * 60.0 / self.tpm
+                    wait = max(missing_requests, missing_tokens)
+            time.sleep(min(max(wait, 0.01), 5.0))
+
+    def pause(self, seconds: float):
+        """Stop handing out capacity for `seconds` (used after a 429)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            # The server says we are over budget - drain what we thought we had
+            self._request_allowance = 0.0
+            self._token_allowance = 0.0
+
+
+def decode_embeddings(data: List, out: np.ndarray):
+    """
+    Write the embeddings of an API response into the rows of `out` (in input order).
+
+    base64 strings are copied straight from their bytes; float lists (from clients
+    that ignore encoding_format) are converted. Raises ValueError on a size mismatch.
+    """
+    if len(data) != len(out):
+        raise ValueError(f"expected {len(out)} embeddings, got {len(data)}")
+    # The API does not guarantee order - sort by index
+    for row, item in enumerate(sorted(data, key=lambda d: d.index)):
+        if isinstance(item.embedding, str):
+            out[row] = np.frombuffer(base64.b64decode(item.embedding), dtype='<f4')
+        else:
+            out[row] = item.embedding
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the Retry-After header from an OpenAI API error, if present."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    for header in ('retry-after-ms', 'retry-after'):
+        value = headers.get(header)
+        if value:
+            try:
+                seconds = float(value)
+                return seconds / 1000.0 if header == 'retry-after-ms' else seconds
+            except ValueError:
+                continue
+    return None
+
+
+class EmbeddingEngine:
+    """Thread-pool embedding client sharing one rate limiter across all requests."""
+
+    def __init__(
+        self,
+        client: OpenAI,
+        model: str,
+        dimensions: int,
+        max_workers: int = 4,
+        requests_per_minute: int = 3000,
+        tokens_per_minute: int = 1_000_000,
+        max_retries: int = 6,
+        token_counter: Optional[Callable[[str], int]] = None,
+        limiter: Optional[RateLimiter] = None,
+    ):
+        """
+        Args:
+            client (OpenAI): OpenAI client (its own retries are disabled; this engine retries)
+            model (str): Embedding model name
+            dimensions (int): Output vector dimensions
+            max_workers (int): Maximum number of requests in flight
+            requests_per_minute (int): RPM budget
+            tokens_per_minute (int): TPM budget
+            max_retries (int): Attempts per request on 429/5xx/connection errors
+            token_counter (callable, optional): Token estimate for one text (default: len/4)
+            limiter (RateLimiter, optional): Share an existing limiter between engines
+        """
+        self.client = client.with_options(max_retries=0)
+        self.model = model
+        self.dimensions = dimensions
+        self.max_retries = max_retries
+        self.token_counter = token_counter or (lambda text: len(text) // 4 + 1)
+        self.limiter = limiter or RateLimiter(requests_per_minute, tokens_per_minute)
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="embed")
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, float] = {
+            "requests": 0,
+            "texts": 0,
+            "tokens": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "failed_requests": 0,
+        }
+
+    def _bump(self, **counts):
+        with self._stats_lock:
+            for key, value in counts.items():
+                self.stats[key] += value
+
+    def _embed_one_batch(self, texts: List[str], out: np.ndarray, tokens: Optional[int] = None,
+                         metrics: Optional[RunMetrics] = None) -> bool:
+        """Embed one request's worth of texts into the rows of `out`, with rate limiting and adaptive backoff."""
+        with timed(metrics, "embed_request") as counts:
+            if tokens is None:
+                tokens = sum(self.token_counter(text) for text in texts)
+            counts.update(items=len(texts), tokens=tokens)
+            ok = self._request_with_retry(texts, tokens, counts, out)
+            if not ok:
+                counts["failed"] = 1
+            return ok
+
+    def _request_with_retry(self, texts: List[str], tokens: int, counts: Dict, out: np.ndarray) -> bool:
+        delay = 1.0
+        counts.update(waited=0.0, retries=0)
+        for attempt in range(1, self.max_retries + 1):
+            waiting = time.perf_counter()
+            self.limiter.acquire(tokens)
+            counts["waited"] += time.perf_counter() - waiting
+            try:
+                resp = self.client.embeddings.create(
+                    model=self.model,
+                    input=texts,
+                    dimensions=self.dimensions,
+                    encoding_format="base64",
+                )
+                decode_embeddings(resp.data, out)
+                self._bump(requests=1, texts=len(texts), tokens=tokens)
+                return True
+            except (RateLimitError, APIStatusError, APIConnectionError, APITimeoutError) as e:
+                status = getattr(e, 'status_code', None)
+                retryable = isinstance(e, (RateLimitError, APIConnectionError, APITimeoutError)) or (status or 0) >= 500
+                if not retryable or attempt == self.max_retries:
+                    print(f"   ❌ Error creating batch embeddings: {e}")
+                    self._bump(failed_requests=1)
+                    return False
+
+                wait = _retry_after_seconds(e) or delay
+                wait += random.uniform(0, wait * 0.25)  # jitter so workers don't retry in lockstep
+                if isinstance(e, RateLimitError):
+                    self._bump(rate_limited=1)
+                    self.limiter.pause(wait)
+                    print(f"   ⏳ Rate limited (429), backing off {wait:.1f}s...")
+                else:
+                    print(f"   ⚠️  Embedding request failed ({e}), retrying in {wait:.1f}s...")
+                self._bump(retries=1)
+                counts["retries"] += 1
+                counts["waited"] += wait
+                time.sleep(wait)
+                delay = min(delay * 2, 60.0)
+            except Exception as e:
+                print(f"   ❌ Error creating batch embeddings: {e}")
+                self._bump(failed_requests=1)
+                return False
+        return False
+
+    def embed(self, texts: List[str], batch_size: int) -> List[Optional[np.ndarray]]:
+        """Embed texts in concurrent batches; results are in input order (None on failure)."""
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        return self.embed_batches(batches)
+
+    def embed_batches(self, batches: List[List[str]], batch_tokens: Optional[List[int]] = None,
+                      metrics: Optional[RunMetrics] = None) -> List[Optional[np.ndarray]]:
+        """
+        Embed pre-packed batches concurrently; returns the flattened results in order.
+
+        Results are float32 row views of one (texts x dimensions) array, None where a
+        request failed. Each request is recorded in `metrics` (if given) as an
+        "embed_request" event, including the seconds spent waiting for the rate
+        limiter or backing off.
+        """
+        if batch_tokens is None:
+            batch_tokens = [None] * len(batches)
+        buffer = np.empty((sum(len(batch) for batch in batches), self.dimensions), dtype=np.float32)
+        starts = []
+        futures = []
+        start = 0
+        for batch, tokens in zip(batches, batch_tokens):
+            starts.append(start)
+            futures.append(self.executor.submit(self._embed_one_batch, batch, buffer[start:start + len(batch)],
+                                                tokens, metrics))
+            start += len(batch)
+
+        embeddings: List[Optional[np.ndarray]] = []
+        for batch, start, future in zip(batches, starts, futures):
+            if future.result():
+                embeddings.extend(buffer[start:start + len(batch)])
+            else:
+                embeddings.extend([None] * len(batch))
+        return embeddings
+
+    def close(self):
+        """Shut down the worker pool."""
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Incremental Ingestion Manifest for embed_folder.py
+
+Remembers, per source file, the size, mtime and content hash that were last
+embedded together with the Pinecone vector IDs produced for it. A re-run can
+then skip unchanged files, embed only new/changed ones and delete the stale
+vectors of edited or removed files.
+
+The manifest is a small JSON file (one per index/namespace pair) written
+atomically after every successful run.
+"""
+
+import os
+import json
+import hashlib
+from typing import List, Dict, Optional
+from datetime import datetime
+
+
+MANIFEST_VERSION = 1
+HASH_BLOCK_SIZE = 1024 * 1024  # Read files in 1 MB blocks when hashing
+
+
+def file_content_hash(file_path: str) -> str:
+    """Return the SHA-256 hex digest of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """Persistent record of what has already been embedded and uploaded."""
+
+    def __init__(self, path: str, settings: Optional[Dict] = None, reset: bool = False):
+        """
+        Args:
+            path (str): Location of the manifest JSON file
+            settings (dict, optional): Ingestion settings (model, dimensions, chunking...).
+                If they differ from the stored ones, the manifest is discarded so that
+                every file is re-embedded with the new settings.
+            reset (bool): Ignore any existing manifest (full rebuild)
+        """
+        self.path = path
+        self.settings = settings or {}
+        self.files: Dict[str, Dict] = {}
+        if not reset:
+            self.load()
+
+    def load(self):
+        """Load the manifest from disk if present and compatible."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️  Could not read manifest {self.path}: {e} (starting fresh)")
+            return
+
+        if data.get('version') != MANIFEST_VERSION:
+            print("ℹ️  Manifest version changed, re-indexing all files")
+            return
+        if data.get('settings') != self.settings:
+            print("ℹ️  Embedding/chunking settings changed, re-indexing all files")
+            # Keep the chunk IDs so the old vectors can still be cleaned up
+            self.files = {
+                path: {'chunk_ids': entry.get('chunk_ids', []), 'sha256': None, 'size': -1, 'mtime': -1}
+                for path, entry in data.get('files', {}).items()
+            }
+            return
+        self.files = data.get('files', {})
+
+    def save(self):
+        """Write the manifest atomically (temp file + rename)."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        data = {
+            'version': MANIFEST_VERSION,
+            'settings': self.settings,
+            'updated_at': datetime.now().isoformat(),
+            'files': self.files,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def tracked_files(self) -> List[str]:
+        """Return the paths of all files recorded in the manifest."""
+        return list(self.files.keys())
+
+    def get_chunk_ids(self, file_path: str) -> List[str]:
+        """Return the vector IDs previously uploaded for a file."""
+        return list(self.files.get(file_path, {}).get('chunk_ids', []))
+
+    def check_file(self, file_path: str, size: int, mtime: float) -> Optional[str]:
+        """
+        Decide whether a file needs to be (re-)embedded.
+
+        Returns:
+            Optional[str]: None if the file is unchanged, otherwise its content hash.
+                Size and mtime are compared first so unchanged files are never read.
+        """
+        entry = self.files.get(file_path)
+        if entry and entry.get('size') == size and entry.get('mtime') == mtime:
+            return None
+
+        sha256 = file_content_hash(file_path)
+        if entry and entry.get('sha256') == sha256:
+            # Touched but identical content - just refresh the stat fields
+            entry['size'] = size
+            entry['mtime'] = mtime
+            return None
+        return sha256
+
+    def update(self, file_path: str, size: int, mtime: float, sha256: str, chunk_ids: List[str],
+               duplicates: Optional[Dict[str, str]] = None):
+        """
+        Record a file as successfully embedded and uploaded.
+
+        `duplicates` maps the IDs of near-duplicate chunks that were not uploaded
+        to the ID of the canonical vector they point at.
+        """
+        self.files[file_path] = {
+            'size': size,
+            'mtime': mtime,
+            'sha256': sha256,
+            'chunk_ids': list(chunk_ids),
+            'indexed_at': datetime.now().isoformat(),
+        }
+        if duplicates:
+            self.files[file_path]['duplicates'] = dict(duplicates)
+
+    def dependent_files(self, file_paths: List[str]) -> List[str]:
+        """
+        Return the other files with duplicate chunks pointing at vectors of `file_paths`,
+        directly or through another dependent file.
+        """
+        affected = set(file_paths)
+        ids = {cid for path in affected for cid in self.get_chunk_ids(path)}
+        dependents: List[str] = []
+        changed = True
+        while changed:
+            changed = False
+            for path, entry in self.files.items():
+                if path in affected or not ids.intersection(entry.get('duplicates', {}).values()):
+                    continue
+                affected.add(path)
+                dependents.append(path)
+                ids.update(entry.get('chunk_ids', []))
+                changed = True
+        return dependents
+
+    def remove(self, file_path: str):
+        """Forget a file (after its vectors have been deleted)."""
+        self.files.pop(file_path, None)
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Process-pool document extraction for embed_folder.py
+
+Fans files out to a ProcessPoolExecutor so PDF/DOCX parsing uses every core.
+- Results are yielded as they complete
+- A per-task timeout stops a pathological file from stalling the run (the
+  stuck worker is killed and the pool restarted)
+- A crashed worker breaks the whole pool: the tasks it took down are rerun one
+  at a time in a fresh pool, so only the file that crashes is failed
+- Very large PDFs are split into page ranges extracted by different workers
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple, Iterator
+
+import pypdf
+
+
+def _extract_file(file_path: str) -> Optional[Dict]:
+    """Worker: run the normal single-file extraction."""
+    from embed_folder import process_file
+    return process_file(file_path)
+
+
+def _extract_pdf_pages(file_path: str, start_page: int, end_page: int) -> Tuple[str, float, float]:
+    """Worker: extract the text of one page range of a PDF (with the wall/CPU seconds it took)."""
+    from embed_folder import read_pdf_pages
+    started, cpu_started = time.perf_counter(), time.thread_time()
+    text = read_pdf_pages(file_path, start_page, end_page)
+    return text, time.perf_counter() - started, time.thread_time() - cpu_started
+
+
+def _pdf_page_count(file_path: Path) -> int:
+    """Number of pages in a PDF (0 if it cannot be read)."""
+    try:
+        with open(file_path, 'rb') as f:
+            return len(pypdf.PdfReader(f).pages)
+    except Exception:
+        return 0
+
+
+def _terminate_pool(executor: ProcessPoolExecutor):
+    """Kill all worker processes (used when a task hangs past its timeout)."""
+    if hasattr(executor, 'terminate_workers'):  # Python 3.14+
+        executor.terminate_workers()
+        return
+    for process in list((getattr(executor, '_processes', None) or {}).values()):
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def build_tasks(file_paths: List[Path], pages_per_task: int, split_min_bytes: int) -> List[Tuple]:
+    """
+    Turn files into extraction tasks.
+
+    Returns:
+        List of ("file", path) or ("pages", path, start, end, part, total_parts) tuples
+    """
+    tasks: List[Tuple] = []
+    for path in file_paths:
+        if path.suffix.lower() == '.pdf' and pages_per_task > 0 and path.stat().st_size >= split_min_bytes:
+            page_count = _pdf_page_count(path)
+            if page_count > pages_per_task:
+                ranges = list(range(0, page_count, pages_per_task))
+                for part, start in enumerate(ranges):
+                    tasks.append(("pages", path, start, min(start + pages_per_task, page_count), part, len(ranges)))
+                continue
+        tasks.append(("file", path))
+    return tasks
+
+
+def extract_files(
+    file_paths: List[Path],
+    max_workers: int = 4,
+    timeout: float = 300.0,
+    pages_per_task: int = 100,
+    split_min_bytes: int = 2 * 1024 * 1024,
+) -> Iterator[Tuple[Path, Optional[Dict]]]:
+    """
+    Extract files in parallel, yielding (path, info) as each one completes.
+
+    Args:
+        file_paths (List[Path]): Files to extract
+        max_workers (int): Worker processes (1 = extract in this process)
+        timeout (float): Seconds a single task may run before it is abandoned
+        pages_per_task (int): PDF pages per task when splitting large PDFs (0 = never split)
+        split_min_bytes (int): Only PDFs at least this large are considered for splitting
+
+    Yields:
+        (path, info): info is the process_file() dict, or None on failure/timeout
+    """
+    if max_workers <= 1:
+        from embed_folder import process_file
+        for path in file_paths:
+            yield path, process_file(str(path))
+        return
+
+    pending = deque(build_tasks(file_paths, pages_per_task, split_min_bytes))
+    in_flight: Dict[Future, Tuple[Tuple, float]] = {}
+    pdf_parts: Dict[Path, List[Optional[str]]] = {}
+    pdf_timings: Dict[Path, List[float]] = {}  # wall/CPU seconds summed over a PDF's page ranges
+    failed: set = set()
+    suspects: deque = deque()  # tasks caught in a pool crash, rerun alone to find the culprit
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    def submit(task: Tuple):
+        if task[0] == "file":
+            future = executor.submit(_extract_file, str(task[1]))
+        else:
+            future = executor.submit(_extract_pdf_pages, str(task[1]), task[2], task[3])
+        # Never more tasks in flight than workers, so submit time ~ start time
+        in_flight[future] = (task, time.monotonic())
+
+    def fail(task: Tuple, reason: str) -> Optional[Tuple[Path, None]]:
+        path = task[1]
+        if path in failed:
+            return None
+        failed.add(path)
+        pdf_parts.pop(path, None)
+        pdf_timings.pop(path, None)
+        print(f"❌ Extraction failed for {path.name}: {reason}")
+        return path, None
+
+    try:
+        while pending or suspects or in_flight:
+            if suspects:
+                if not in_flight:
+                    task = suspects.popleft()
+                    if task[1] not in failed:
+                        submit(task)
+            else:
+                while pending and len(in_flight) < max_workers:
+                    task = pending.popleft()
+                    if task[1] not in failed:
+                        submit(task)
+            if not in_flight:
+                continue
+
+            done, _ = wait(list(in_flight), timeout=0.5, return_when=FIRST_COMPLETED)
+            broken = False
+            running_alone = len(in_flight) == 1
+            crashed: List[Tuple] = []
+            for future in done:
+                task, _ = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    broken = True
+                    if running_alone:
+                        outcome = fail(task, "worker process crashed")
+                        if outcome:
+                            yield outcome
+                    else:
+                        # Every task of the pool fails with it - any of them may be the culprit
+                        crashed.append(task)
+                    continue
+                except Exception as e:
+                    outcome = fail(task, str(e))
+                    if outcome:
+                        yield outcome
+                    continue
+
+                path = task[1]
+                if task[0] == "file":
+                    yield path, result
+                elif path not in failed:
+                    parts = pdf_parts.setdefault(path, [None] * task[5])
+                    parts[task[4]], wall, cpu = result
+                    timings = pdf_timings.setdefault(path, [0.0, 0.0])
+                    timings[0] += wall
+                    timings[1] += cpu
+                    if all(part is not None for part in parts):
+                        del pdf_parts[path]
+                        wall, cpu = pdf_timings.pop(path)
+                        from embed_folder import process_file
+                        print(f"📚 Joined {len(parts)} page ranges of {path.name}")
+                        info = process_file(str(path), content="\n".join(parts).strip())
+                        if info:
+                            # Count the page-range extraction done by the workers
+                            joined_wall, joined_cpu = info['timings']['extract']
+                            info['timings']['extract'] = (joined_wall + wall, joined_cpu + cpu)
+                        yield path, info
+
+            now = time.monotonic()
+            expired = [future for future, (_, started) in in_flight.items() if now - started > timeout]
+            if expired or broken:
+                for future in expired:
+                    task, _ = in_flight.pop(future)
+                    outcome = fail(task, f"timed out after {timeout:.0f}s")
+                    if outcome:
+                        yield outcome
+                # A running task cannot be cancelled - restart the pool and requeue the rest
+                requeue = [task for task, _ in in_flight.values()]
+                in_flight.clear()
+                _terminate_pool(executor)
+                executor = ProcessPoolExecutor(max_workers=max_workers)
+                if broken:
+                    suspects.extend(crashed + requeue)
+                else:
+                    pending.extendleft(reversed(requeue))
+    finally:
+        if in_flight:
+            _terminate_pool(executor)
+        else:
+            executor.shutdown(wait=True)
+
+
+def default_worker_count() -> int:
+    """Default number of extraction processes (one per CPU core)."""
+    return os.cpu_count() or 1
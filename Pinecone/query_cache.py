@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Two-tier cache of query embeddings for query_interface.py
+
+Repeat questions (and Streamlit reruns of the same prompt) should not pay for
+another embedding round-trip:
+- tier 1: an in-process LRU shared by every session of the Streamlit server
+- tier 2: an on-disk SQLite store (embedding_cache.EmbeddingCache) shared by
+  server processes and kept across restarts
+
+Entries are keyed by embedding model, dimensions and the normalized query
+(Unicode NFKC, case-folded, whitespace collapsed), so "What is n8n?" and
+"what is  N8N?" share one embedding. The first spelling seen is the one embedded.
+"""
+
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import List, Dict, Optional, Callable, Tuple
+
+from embedding_cache import EmbeddingCache
+
+
+def normalize_query(query: str) -> str:
+    """Cache key form of a query: NFKC, case-folded, single spaces, trimmed."""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', query)).strip().casefold()
+
+
+class QueryEmbeddingCache:
+    """In-process LRU in front of an optional on-disk embedding store."""
+
+    def __init__(self, max_entries: int = 1024, disk_path: Optional[str] = None,
+                 disk_max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            max_entries (int): Query embeddings kept in memory
+            disk_path (str, optional): SQLite file of the shared on-disk tier (None = memory only)
+            disk_max_bytes (int): Size bound of the on-disk tier (LRU eviction beyond it)
+        """
+        self.max_entries = max(1, max_entries)
+        self.stats: Dict[str, int] = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._memory: "OrderedDict[Tuple[str, int, str], List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.disk: Optional[EmbeddingCache] = None
+        if disk_path:
+            try:
+                self.disk = EmbeddingCache(disk_path, max_bytes=disk_max_bytes)
+            except Exception as e:
+                print(f"⚠️  Query embedding cache on disk unavailable ({e}), keeping it in memory only")
+
+    def get(self, model: str, dimensions: int, query: str) -> Optional[List[float]]:
+        """Cached embedding of a query (memory first, then disk), or None."""
+        key = (model, dimensions, normalize_query(query))
+        with self._lock:
+            embedding = self._memory.get(key)
+            if embedding is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return embedding
+
+        if self.disk:
+            found = self.disk.get_many(model, dimensions, [key[2]])[0]
+            if found is not None:
+                embedding = found.tolist()
+                self._remember(key, embedding)
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                return embedding
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, model: str, dimensions: int, query: str, embedding: List[float]):
+        """Store a query embedding in both tiers."""
+        key = (model, dimensions, normalize_query(query))
+        self._remember(key, embedding)
+        if self.disk:
+            self.disk.put_many(model, dimensions, [key[2]], [embedding])
+
+    def get_or_create(self, model: str, dimensions: int, query: str,
+                      create: Callable[[str], Optional[List[float]]]) -> Optional[List[float]]:
+        """Return the cached embedding, or call `create(query)` and cache its result."""
+        embedding = self.get(model, dimensions, query)
+        if embedding is None:
+            embedding = create(query)
+            if embedding is not None:
+                self.put(model, dimensions, query, embedding)
+        return embedding
+
+    def _remember(self, key: Tuple[str, int, str], embedding: List[float]):
+        with self._lock:
+            self._memory[key] = embedding
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def hit_rates(self) -> Dict[str, float]:
+        """Share of lookups served from memory, from disk and overall."""
+        with self._lock:
+            total = sum(self.stats.values())
+            if not total:
+                return {"memory": 0.0, "disk": 0.0, "overall": 0.0, "lookups": 0}
+            return {
+                "memory": self.stats["memory_hits"] / total,
+                "disk": self.stats["disk_hits"] / total,
+                "overall": (self.stats["memory_hits"] + self.stats["disk_hits"]) / total,
+                "lookups": total,
+            }
@@ -9,7 +9,9 @@ using Retrieval Augmented Generation (RAG) with OpenAI's language models.
 import os
 import sys
 import json
+import time
 from typing import List, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 import re
 
@@ -21,6 +23,21 @@ import tiktoken
 from openai import OpenAI
 from pinecone import Pinecone
 
+# Pluggable vector store (Pinecone or local memory-mapped index)
+from vector_store import get_vector_client
+
+# Chunk text kept outside the vector metadata (PINECONE_CONTENT_STORE)
+from content_store import ContentStore, content_store_path
+
+# In-process + on-disk cache of query embeddings
+from query_cache import QueryEmbeddingCache
+
+# Semantic cache of generated answers (per index/namespace, invalidated by embed_folder.py)
+from answer_cache import AnswerCache, sources_cache_path
+
+# Merging results of several indexes/namespaces
+from result_fusion import parse_search_sources, source_label, fuse_results, FUSION_METHODS
+
 
 # =========================
 # Configuration
@@ -35,12 +52,51 @@ NAMESPACE  = os.getenv("PINECONE_NAMESPACE", "tesla")
 INFO = "Tesla N8N Course"
 # INFO = "BiWeekly Meeting Notes"
 EMBED_MODEL = "text-embedding-3-small"
+EMBED_DIMENSIONS = int(os.getenv("OPENAI_EMBED_DIMENSIONS", "1536"))  # must match the index (see embed_folder.py)
 CHAT_MODEL = "gpt-4o-mini"  # or "gpt-3.5-turbo" for cheaper option
 MAX_CONTEXT_LENGTH = 8000  # Max tokens for context
 
 
 TOP_K = 5  # Number of similar chunks to retrieve
 
+# Corpora to search: "INDEX/NAMESPACE,..." (a bare name is a namespace of INDEX_NAME).
+# Empty = INDEX_NAME/NAMESPACE only. Several sources are queried concurrently and merged.
+# e.g. PINECONE_SEARCH_SOURCES="n8n-course-tsla/n8n-tsla,biweekly-meeting/biweekly-meeting"
+SEARCH_SOURCES = parse_search_sources(os.getenv("PINECONE_SEARCH_SOURCES", ""), INDEX_NAME, NAMESPACE)
+SEARCH_FUSION = os.getenv("PINECONE_SEARCH_FUSION", "rrf").strip().lower()  # "rrf" (rank fusion) or "score" (cosine scores)
+SEARCH_TIMEOUT = float(os.getenv("PINECONE_SEARCH_TIMEOUT", "5"))  # Seconds to wait for each source
+if SEARCH_FUSION not in FUSION_METHODS:
+    print(f"⚠️  Unknown PINECONE_SEARCH_FUSION '{SEARCH_FUSION}', using rrf")
+    SEARCH_FUSION = "rrf"
+
+# Render answers token by token as they are generated (default for the sidebar toggle)
+ANSWER_STREAMING = os.getenv("ANSWER_STREAMING", "true").strip().lower() in ("1", "true", "yes")
+
+# Vector store backend: "pinecone" (hosted) or "local" (memory-mapped NumPy index on disk)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone").strip().lower()
+LOCAL_VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".vectors"))
+
+# Warm connection layer: one index handle (and HTTP connection pool) per server process,
+# control-plane results (index list, index stats) cached for this many seconds
+INDEX_CHECK_TTL = int(os.getenv("PINECONE_INDEX_CHECK_TTL", "300"))
+POOL_THREADS = int(os.getenv("PINECONE_POOL_THREADS", "4"))  # Connections kept open to the index host
+
+# Content store written by embed_folder.py when PINECONE_CONTENT_STORE is on
+CONTENT_STORE_DIR = os.getenv("PINECONE_CONTENT_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".content"))
+
+# Query embedding cache: in-process LRU shared by all sessions + SQLite file shared by server processes
+QUERY_CACHE = os.getenv("OPENAI_QUERY_CACHE", "true").strip().lower() in ("1", "true", "yes")
+QUERY_CACHE_SIZE = int(os.getenv("OPENAI_QUERY_CACHE_SIZE", "1024"))  # Query embeddings kept in memory
+QUERY_CACHE_PATH = os.getenv("OPENAI_QUERY_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "query_embeddings.sqlite"))
+QUERY_CACHE_MAX_MB = int(os.getenv("OPENAI_QUERY_CACHE_MAX_MB", "64"))  # LRU eviction beyond this size (0 = memory only)
+
+# Answer cache: reuse an answer for a similar question (cosine >= threshold) that retrieved the same chunks
+ANSWER_CACHE = os.getenv("ANSWER_CACHE", "true").strip().lower() in ("1", "true", "yes")
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL_HOURS = float(os.getenv("ANSWER_CACHE_TTL_HOURS", "24"))  # 0 = answers never expire
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))  # LRU eviction beyond this count
+ANSWER_CACHE_DIR = os.getenv("ANSWER_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "answers"))
+
 
 def load_environment():
     """Load environment variables from .env file."""
@@ -53,16 +109,16 @@ def load_environment():
 
 @st.cache_resource
 def initialize_clients():
-    """Initialize and cache OpenAI and Pinecone clients."""
+    """Initialize and cache OpenAI and vector store (Pinecone or local) clients."""
     try:
         openai_api_key = os.getenv('OPENAI_API_KEY')
         pinecone_api_key = os.getenv('PINECONE_API_KEY')
         
-        if not openai_api_key or not pinecone_api_key:
+        if not openai_api_key or (VECTOR_BACKEND == "pinecone" and not pinecone_api_key):
             return None, None, "Missing API keys"
         
         openai_client = OpenAI(api_key=openai_api_key)
-        pinecone_client = Pinecone(api_key=pinecone_api_key)
+        pinecone_client = get_vector_client(VECTOR_BACKEND, pinecone_api_key, LOCAL_VECTOR_STORE_PATH)
         
         return openai_client, pinecone_client, "success"
         
@@ -70,6 +126,123 @@ def initialize_clients():
         return None, None, str(e)
 
 
+@st.cache_resource
+def get_index(_pc: Pinecone, index_name: str):
+    """
+    Index handle shared by every rerun and session of this server.
+
+    The host lookup happens once, and the handle keeps its HTTP connections open
+    (keep-alive pool), so a question only pays for the query request itself.
+    Local handles reload vectors written by embed_folder.py on their own.
+    """
+    if VECTOR_BACKEND == "pinecone":
+        return _pc.Index(index_name, pool_threads=POOL_THREADS)
+    return _pc.Index(index_name)
+
+
+@st.cache_data(ttl=INDEX_CHECK_TTL, show_spinner=False)
+def list_index_names(_pc: Pinecone) -> List[str]:
+    """Names of the available indexes (control-plane call, cached for INDEX_CHECK_TTL seconds)."""
+    return list(_pc.list_indexes().names())
+
+
+def index_version(pc: Pinecone, index_name: str) -> Optional[float]:
+    """Change marker of a local index (newest write); None for Pinecone, whose stats rely on the TTL."""
+    index = get_index(pc, index_name)
+    return index.last_modified() if hasattr(index, "last_modified") else None
+
+
+def get_index_stats(pc: Pinecone, index_name: str) -> Dict:
+    """
+    describe_index_stats of an index as a plain dict.
+
+    Cached for INDEX_CHECK_TTL seconds; local indexes are re-read as soon as they change.
+    """
+    return _cached_index_stats(pc, index_name, index_version(pc, index_name))
+
+
+@st.cache_data(ttl=INDEX_CHECK_TTL, show_spinner=False)
+def _cached_index_stats(_pc: Pinecone, index_name: str, version: Optional[float]) -> Dict:
+    """
+    describe_index_stats of an index as a plain dict (`version` only keys the cache).
+
+    Returns:
+        {"dimension", "total_vector_count", "namespaces": {name: vector count}}
+    """
+    stats = get_index(_pc, index_name).describe_index_stats()
+    if not isinstance(stats, dict):
+        stats = stats.to_dict() if hasattr(stats, "to_dict") else vars(stats)
+    namespaces = {}
+    for name, summary in (stats.get("namespaces") or {}).items():
+        namespaces[name] = summary.get("vector_count", 0) if isinstance(summary, dict) else getattr(summary, "vector_count", 0)
+    return {
+        "dimension": stats.get("dimension"),
+        "total_vector_count": stats.get("total_vector_count", sum(namespaces.values())),
+        "namespaces": namespaces,
+    }
+
+
+@st.cache_resource(show_spinner="🔌 Connecting to the index...")
+def prewarm(_pc: Pinecone, sources: Tuple[Tuple[str, Optional[str]], ...]) -> bool:
+    """
+    Open everything a question needs once per server process, before the first question.
+
+    Resolves the index handles and makes one data-plane call through each (index stats),
+    so their connections are established, and opens the query/answer caches and content stores.
+    """
+    warmed = True
+    for index_name in dict.fromkeys(index_name for index_name, _ in sources):
+        try:
+            get_index_stats(_pc, index_name)
+        except Exception as e:
+            print(f"⚠️  Could not pre-warm index '{index_name}': {e}")
+            warmed = False
+    for index_name, namespace in sources:
+        get_content_store(index_name, namespace)
+    get_query_cache()
+    get_answer_cache(sources)
+    if len(sources) > 1:
+        get_search_executor()
+    return warmed
+
+
+@st.cache_resource
+def get_content_store(index_name: str, namespace: Optional[str]) -> Optional[ContentStore]:
+    """Open the content store of an index/namespace, if ingestion created one."""
+    path = content_store_path(CONTENT_STORE_DIR, index_name, namespace)
+    return ContentStore(path) if os.path.exists(path) else None
+
+
+@st.cache_resource
+def get_search_executor() -> ThreadPoolExecutor:
+    """Threads querying the search sources concurrently (shared by all sessions)."""
+    # Headroom for queries still running after their source timed out
+    return ThreadPoolExecutor(max_workers=max(4, len(SEARCH_SOURCES) * 4), thread_name_prefix="search")
+
+
+@st.cache_resource
+def get_query_cache() -> Optional[QueryEmbeddingCache]:
+    """Query embedding cache shared by every session of this server (None if disabled)."""
+    if not QUERY_CACHE:
+        return None
+    return QueryEmbeddingCache(QUERY_CACHE_SIZE, QUERY_CACHE_PATH if QUERY_CACHE_MAX_MB > 0 else None,
+                               QUERY_CACHE_MAX_MB * 1024 * 1024)
+
+
+@st.cache_resource
+def get_answer_cache(sources: Tuple[Tuple[str, Optional[str]], ...]) -> Optional[AnswerCache]:
+    """Semantic answer cache of the searched indexes/namespaces (None if disabled or unavailable)."""
+    if not ANSWER_CACHE:
+        return None
+    try:
+        return AnswerCache(sources_cache_path(ANSWER_CACHE_DIR, list(sources)),
+                           threshold=ANSWER_CACHE_THRESHOLD, ttl_seconds=ANSWER_CACHE_TTL_HOURS * 3600,
+                           max_entries=ANSWER_CACHE_MAX_ENTRIES)
+    except Exception as e:
+        print(f"⚠️  Answer cache unavailable ({e}), continuing without it")
+        return None
+
+
 def count_tokens(text: str, model: str = CHAT_MODEL) -> int:
     """Count tokens in text."""
     try:
@@ -80,54 +253,181 @@ def count_tokens(text: str, model: str = CHAT_MODEL) -> int:
 
 
 def create_query_embedding(openai_client: OpenAI, query: str) -> Optional[List[float]]:
-    """Create embedding for the user query."""
-    try:
-        response = openai_client.embeddings.create(
-            model=EMBED_MODEL,
-            input=query
-        )
-        return response.data[0].embedding
-    except Exception as e:
-        st.error(f"Error creating query embedding: {e}")
+    """Create embedding for the user query (served from the query cache for repeat questions)."""
+    def embed(text: str) -> Optional[List[float]]:
+        try:
+            response = openai_client.embeddings.create(
+                model=EMBED_MODEL,
+                input=text,
+                dimensions=EMBED_DIMENSIONS
+            )
+            return response.data[0].embedding
+        except Exception as e:
+            st.error(f"Error creating query embedding: {e}")
+            return None
+
+    query_cache = get_query_cache()
+    if query_cache is None:
+        return embed(query)
+    return query_cache.get_or_create(EMBED_MODEL, EMBED_DIMENSIONS, query, embed)
+
+
+def answer_with_cache(openai_client: OpenAI, query: str, query_embedding: List[float],
+                      search_results: List[Dict], context: str, model: str,
+                      sources: List[Tuple[str, Optional[str]]], context_key: str,
+                      placeholder=None) -> Tuple[Optional[str], bool, Dict[str, float]]:
+    """
+    Answer from the semantic cache when a similar question retrieved the same chunks, else generate.
+
+    Answers are cached per set of searched `sources`, and only reused for the same
+    `context_key` (the settings the context was built with).
+    With a `placeholder`, a generated answer is streamed into it as it arrives.
+
+    Returns:
+        (answer, cached, timings): the answer (None on error), whether it came from the
+        cache, and the generation timings ("first_token" when streamed, "total")
+    """
+    answer_cache = get_answer_cache(tuple(sources))
+    chunk_ids = [result["id"] for result in search_results]
+    if answer_cache:
+        cached = answer_cache.lookup(query_embedding, chunk_ids, model, context_key)
+        if cached is not None:
+            return cached, True, {}
+
+    if placeholder is not None:
+        answer, timings = stream_answer(openai_client, query, context, placeholder, model)
+    else:
+        started = time.perf_counter()
+        with st.spinner("✍️ Generating answer..."):
+            answer = generate_answer(openai_client, query, context, model)
+        timings = {"total": time.perf_counter() - started}
+    if answer and answer_cache:
+        answer_cache.store(query_embedding, chunk_ids, model, answer, context_key)
+    return answer, False, timings
+
+
+def answer_caption(message: Dict) -> Optional[str]:
+    """One-line note on how an answer was produced (cache reuse or generation timings)."""
+    if message.get("cached"):
+        return "⚡ Answer reused from a similar earlier question"
+    timings = message.get("timings") or {}
+    if "total" not in timings:
         return None
+    if "first_token" in timings:
+        return f"⏱️ First token after {timings['first_token']:.2f}s · complete after {timings['total']:.2f}s"
+    return f"⏱️ Generated in {timings['total']:.2f}s"
 
 
-def search_pinecone(pc: Pinecone, query_embedding: List[float], top_k: int = TOP_K) -> List[Dict]:
-    """Search Pinecone index for similar content."""
-    try:
-        index = pc.Index(INDEX_NAME)
-        
-        search_kwargs = {
-            "vector": query_embedding,
-            "top_k": top_k,
-            "include_metadata": True,
-            "include_values": False
-        }
-        
-        if NAMESPACE:
-            search_kwargs["namespace"] = NAMESPACE
-            
-        results = index.query(**search_kwargs)
-        
-        # Format results
-        formatted_results = []
-        for match in results.matches:
-            formatted_results.append({
-                "id": match.id,
-                "score": match.score,
-                "metadata": match.metadata,
-                "content": match.metadata.get("content", ""),
-                "filename": match.metadata.get("filename", "Unknown"),
-                "chunk_index": match.metadata.get("chunk_index", 0),
-                "file_type": match.metadata.get("file_type", "unknown")
-            })
-        
-        return formatted_results
+def show_query_cache_stats(container, sources: List[Tuple[str, Optional[str]]]):
+    """Render the query embedding and answer cache hit rates into a sidebar container."""
+    query_cache = get_query_cache()
+    answer_cache = get_answer_cache(tuple(sources))
+    if query_cache is None and answer_cache is None:
+        return
+    with container.container():
+        st.header("💾 Query Cache")
+        rates = query_cache.hit_rates() if query_cache else {"lookups": 0}
+        answer_lookups = answer_cache.stats["hits"] + answer_cache.stats["misses"] if answer_cache else 0
+        if not rates["lookups"] and not answer_lookups:
+            st.caption("No queries yet")
+            return
+        if rates["lookups"]:
+            st.metric("Embedding hit rate", f"{rates['overall']:.0%}", help="Queries embedded without an API request")
+            st.caption(f"Memory {rates['memory']:.0%} · Disk {rates['disk']:.0%} · "
+                       f"{query_cache.stats['misses']} embedded of {rates['lookups']} lookups")
+        if answer_lookups:
+            st.metric("Answer hit rate", f"{answer_cache.hit_rate():.0%}",
+                      help="Answers reused for a similar question over the same sources")
+            st.caption(f"{answer_cache.stats['hits']} of {answer_lookups} answers served from cache")
+
+
+def query_source(index, content_store: Optional[ContentStore], namespace: Optional[str], label: str,
+                 query_embedding: List[float], top_k: int) -> List[Dict]:
+    """Query one index/namespace and format its matches (errors are raised to the caller)."""
+    search_kwargs = {
+        "vector": query_embedding,
+        "top_k": top_k,
+        "include_metadata": True,
+        "include_values": False
+    }
+    
+    if namespace:
+        search_kwargs["namespace"] = namespace
         
+    results = index.query(**search_kwargs)
+    
+    # Format results
+    formatted_results = []
+    for match in results.matches:
+        formatted_results.append({
+            "id": match.id,
+            "score": match.score,
+            "metadata": match.metadata,
+            "content": match.metadata.get("content", ""),
+            "filename": match.metadata.get("filename", "Unknown"),
+            "chunk_index": match.metadata.get("chunk_index", 0),
+            "page": match.metadata.get("page"),
+            "file_type": match.metadata.get("file_type", "unknown"),
+            "source": label
+        })
+
+    # Vectors ingested with the content store carry no text - fetch it in one lookup
+    missing = [result["id"] for result in formatted_results if "content" not in result["metadata"]]
+    if missing and content_store:
+        texts = content_store.get_many(missing)
+        for result in formatted_results:
+            result["content"] = result["content"] or texts.get(result["id"], "")
+    
+    return formatted_results
+
+
+def search_pinecone(pc: Pinecone, query_embedding: List[float], top_k: int = TOP_K,
+                    sources: Optional[List[Tuple[str, Optional[str]]]] = None) -> List[Dict]:
+    """
+    Search the configured indexes/namespaces for similar content.
+
+    Several sources are queried concurrently and merged with SEARCH_FUSION; a source
+    that has not answered within SEARCH_TIMEOUT seconds is left out of this answer.
+    """
+    sources = sources or SEARCH_SOURCES
+    # Handles are resolved here (cached), so the worker threads only run the queries
+    try:
+        targets = [(get_index(pc, index_name), get_content_store(index_name, namespace), namespace,
+                    source_label(index_name, namespace)) for index_name, namespace in sources]
     except Exception as e:
-        st.error(f"Error searching Pinecone: {e}")
+        st.error(f"Error opening Pinecone index: {e}")
         return []
 
+    if len(targets) == 1:
+        try:
+            return query_source(*targets[0], query_embedding, top_k)
+        except Exception as e:
+            st.error(f"Error searching Pinecone: {e}")
+            return []
+
+    executor = get_search_executor()
+    futures = [executor.submit(query_source, *target, query_embedding, top_k) for target in targets]
+    done, _ = wait(futures, timeout=SEARCH_TIMEOUT)
+
+    result_lists = []
+    for target, future in zip(targets, futures):
+        label = target[3]
+        if future not in done:
+            st.warning(f"⏳ {label} did not answer within {SEARCH_TIMEOUT:g}s - answering without it")
+            continue
+        try:
+            result_lists.append(future.result())
+        except Exception as e:
+            st.warning(f"⚠️ Error searching {label}: {e}")
+    return fuse_results(result_lists, top_k, SEARCH_FUSION)
+
+
+def chunk_label(result: Dict) -> str:
+    """Position of a result in its file: chunk index, plus the page for page-streamed PDFs."""
+    if result.get("page") is not None:
+        return f"page {int(result['page'])}, chunk {result['chunk_index']}"
+    return f"chunk {result['chunk_index']}"
+
 
 def build_context(search_results: List[Dict], max_tokens: int = MAX_CONTEXT_LENGTH) -> Tuple[str, List[str]]:
     """Build context string from search results while respecting token limits."""
@@ -138,29 +438,28 @@ def build_context(search_results: List[Dict], max_tokens: int = MAX_CONTEXT_LENG
     for i, result in enumerate(search_results):
         content = result["content"]
         filename = result["filename"]
-        chunk_idx = result["chunk_index"]
+        label = chunk_label(result)
         
         # Create a context entry
-        context_entry = f"\n--- Source {i+1}: {filename} (chunk {chunk_idx}) ---\n{content}\n"
+        context_entry = f"\n--- Source {i+1}: {filename} ({label}) ---\n{content}\n"
         entry_tokens = count_tokens(context_entry)
         
         if current_tokens + entry_tokens > max_tokens:
             if i == 0:  # Always include at least one result
                 context_parts.append(context_entry[:max_tokens])
-                sources.append(f"{filename} (chunk {chunk_idx})")
+                sources.append(f"{filename} ({label})")
             break
             
         context_parts.append(context_entry)
-        sources.append(f"{filename} (chunk {chunk_idx})")
+        sources.append(f"{filename} ({label})")
         current_tokens += entry_tokens
     
     return "".join(context_parts), sources
 
 
-def generate_answer(openai_client: OpenAI, query: str, context: str) -> Optional[str]:
-    """Generate answer using OpenAI chat model with retrieved context."""
-    try:
-        system_prompt = f"""You are a helpful assistant that answers questions based on provided context from {INFO} and documents.
+def answer_messages(query: str, context: str) -> List[Dict]:
+    """Chat messages asking the model to answer the query from the retrieved context."""
+    system_prompt = f"""You are a helpful assistant that answers questions based on provided context from {INFO} and documents.
 
 Instructions:
 - Answer the question based ONLY on the provided context
@@ -170,19 +469,25 @@ Instructions:
 - Keep your answers concise but comprehensive
 - Use bullet points or numbered lists when appropriate for clarity"""
 
-        user_prompt = f"""Context from {INFO} documents:
+    user_prompt = f"""Context from {INFO} documents:
 {context}
 
 Question: {query}
 
 Please answer the question based on the context provided above."""
 
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def generate_answer(openai_client: OpenAI, query: str, context: str, model: str = CHAT_MODEL) -> Optional[str]:
+    """Generate answer using OpenAI chat model with retrieved context."""
+    try:
         response = openai_client.chat.completions.create(
-            model=CHAT_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+            model=model,
+            messages=answer_messages(query, context),
             temperature=0.1,
             max_tokens=1000
         )
@@ -194,6 +499,45 @@ Please answer the question based on the context provided above."""
         return None
 
 
+def stream_answer(openai_client: OpenAI, query: str, context: str, placeholder,
+                  model: str = CHAT_MODEL) -> Tuple[Optional[str], Dict[str, float]]:
+    """
+    Generate an answer as a stream, rendering the text into `placeholder` as tokens arrive.
+
+    Returns:
+        (answer, timings): the full answer (None on error) and the seconds until the
+        first token ("first_token") and until the answer was complete ("total")
+    """
+    timings: Dict[str, float] = {}
+    parts: List[str] = []
+    started = time.perf_counter()
+    try:
+        stream = openai_client.chat.completions.create(
+            model=model,
+            messages=answer_messages(query, context),
+            temperature=0.1,
+            max_tokens=1000,
+            stream=True
+        )
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            if not parts:
+                timings["first_token"] = time.perf_counter() - started
+            parts.append(delta)
+            placeholder.markdown("".join(parts) + "▌")
+        timings["total"] = time.perf_counter() - started
+    except Exception as e:
+        placeholder.empty()
+        st.error(f"Error generating answer: {e}")
+        return None, timings
+
+    answer = "".join(parts)
+    placeholder.markdown(answer)
+    return answer or None, timings
+
+
 def format_search_results(results: List[Dict]) -> str:
     """Format search results for display."""
     if not results:
@@ -202,7 +546,7 @@ def format_search_results(results: List[Dict]) -> str:
     formatted = []
     for i, result in enumerate(results, 1):
         filename = result["filename"]
-        chunk_idx = result["chunk_index"]
+        label = chunk_label(result)
         score = result["score"]
         content = result["content"]
         
@@ -217,8 +561,11 @@ def format_search_results(results: List[Dict]) -> str:
         if was_truncated:
             truncation_note = " ⚠️ *Content was truncated during storage*"
         
+        # Results merged from several sources name their index/namespace
+        origin = f" [{result['source']}]" if "fused_score" in result else ""
+        
         formatted.append(f"""
-**{i}. {filename}** (chunk {chunk_idx}) - Relevance: {score:.3f}{truncation_note}
+**{i}. {filename}** ({label}){origin} - Relevance: {score:.3f}{truncation_note}
 ```
 {content_preview}
 ```
@@ -265,16 +612,23 @@ def main():
             """)
         return
     
-    # Verify index exists
+    # Verify the indexes exist (cached - reruns don't call the control plane)
     try:
-        indexes = pc.list_indexes().names()
-        if INDEX_NAME not in indexes:
-            st.error(f"Pinecone index '{INDEX_NAME}' not found!")
+        indexes = list_index_names(pc)
+        search_sources = [source for source in SEARCH_SOURCES if source[0] in indexes]
+        missing = sorted({index_name for index_name, _ in SEARCH_SOURCES if index_name not in indexes})
+        if missing:
+            list_index_names.clear()  # Check again on the next rerun instead of caching the miss
+        if not search_sources:
+            st.error(f"Pinecone index '{', '.join(missing)}' not found!")
             st.info(f"Available indexes: {', '.join(indexes) if indexes else 'None'}")
             return
+        if missing:
+            st.warning(f"Index '{', '.join(missing)}' not found - searching {len(search_sources)} other source(s)")
     except Exception as e:
         st.error(f"Error checking Pinecone indexes: {e}")
         return
+    prewarm(pc, tuple(search_sources))
     
     # Sidebar configuration
     with st.sidebar:
@@ -290,14 +644,39 @@ def main():
             ["gpt-4o-mini", "gpt-4o", "gpt-3.5-turbo"],
             index=0
         )
+        stream_answers = st.toggle("Stream answers", value=ANSWER_STREAMING,
+                                   help="Show the answer while it is being generated")
         
         # Show index info
         st.header("📊 Index Info")
-        st.info(f"""
-        **Index:** {INDEX_NAME}
-        **Namespace:** {NAMESPACE or "Default"}
-        **Embed Model:** {EMBED_MODEL}
-        """)
+        if len(search_sources) == 1:
+            st.info(f"""
+            **Index:** {search_sources[0][0]}
+            **Namespace:** {search_sources[0][1] or "Default"}
+            **Embed Model:** {EMBED_MODEL}
+            """)
+        else:
+            st.info(f"""
+            **Sources:** {', '.join(source_label(*source) for source in search_sources)}
+            **Fusion:** {SEARCH_FUSION} (timeout {SEARCH_TIMEOUT:g}s per source)
+            **Embed Model:** {EMBED_MODEL}
+            """)
+        for index_name, namespace in search_sources:
+            try:
+                stats = get_index_stats(pc, index_name)
+                count = stats['namespaces'].get(namespace or '', 0)
+                if len(search_sources) == 1:
+                    st.caption(f"{count:,} vectors in this namespace · {stats['total_vector_count']:,} in the index")
+                else:
+                    st.caption(f"{source_label(index_name, namespace)}: {count:,} vectors")
+                if stats["dimension"] and stats["dimension"] != EMBED_DIMENSIONS:
+                    st.warning(f"Index '{index_name}' has dimension {stats['dimension']}, which does not match "
+                               f"OPENAI_EMBED_DIMENSIONS={EMBED_DIMENSIONS}")
+            except Exception as e:
+                st.caption(f"Index stats of '{index_name}' unavailable: {e}")
+
+        # Filled in at the end of the run, after this rerun's query has been counted
+        query_cache_stats = st.empty()
         
         # Clear chat button
         if st.button("🗑️ Clear Chat History"):
@@ -320,6 +699,9 @@ def main():
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
+            caption = answer_caption(message)
+            if caption:
+                st.caption(caption)
             
             # Show sources if available
             if message.get("sources"):
@@ -351,40 +733,55 @@ def main():
                     return
                 
                 # Search Pinecone
-                search_results = search_pinecone(pc, query_embedding, top_k=search_top_k)
-                if not search_results:
-                    response = f"I couldn't find any relevant information in your {INFO} for this question."
-                    sources = []
-                else:
-                    # Build context and generate answer
-                    context, sources = build_context(search_results, max_context_tokens)
-                    response = generate_answer(openai_client, prompt, context)
-                    
-                    if not response:
-                        response = "I encountered an error while generating the response. Please try again."
-                
-                # Display response
-                st.markdown(response)
-                
-                # Show sources
-                if sources:
-                    with st.expander(f"📚 Sources ({len(sources)})"):
-                        for i, source in enumerate(sources, 1):
-                            st.markdown(f"{i}. {source}")
+                search_results = search_pinecone(pc, query_embedding, top_k=search_top_k, sources=search_sources)
+
+            cached = False
+            timings: Dict[str, float] = {}
+            answer_slot = st.empty()
+            if not search_results:
+                response = f"I couldn't find any relevant information in your {INFO} for this question."
+                sources = []
+            else:
+                # Build context and generate (or stream) the answer
+                context, sources = build_context(search_results, max_context_tokens)
+                response, cached, timings = answer_with_cache(openai_client, prompt, query_embedding,
+                                                              search_results, context, chat_model,
+                                                              search_sources,
+                                                              f"top_k={search_top_k};max_tokens={max_context_tokens}",
+                                                              placeholder=answer_slot if stream_answers else None)
                 
-                # Show detailed search results
-                if search_results:
-                    with st.expander("🔍 Detailed Search Results"):
-                        st.markdown(format_search_results(search_results))
-                
-                # Add to chat history
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": response,
-                    "sources": sources,
-                    "search_results": search_results
-                })
+                if not response:
+                    response = "I encountered an error while generating the response. Please try again."
+            
+            # Display response (a streamed answer is already shown - this replaces it with the final text)
+            answer_slot.markdown(response)
+            caption = answer_caption({"cached": cached, "timings": timings})
+            if caption:
+                st.caption(caption)
+            
+            # Show sources
+            if sources:
+                with st.expander(f"📚 Sources ({len(sources)})"):
+                    for i, source in enumerate(sources, 1):
+                        st.markdown(f"{i}. {source}")
+            
+            # Show detailed search results
+            if search_results:
+                with st.expander("🔍 Detailed Search Results"):
+                    st.markdown(format_search_results(search_results))
+            
+            # Add to chat history
+            st.session_state.messages.append({
+                "role": "assistant",
+                "content": response,
+                "sources": sources,
+                "search_results": search_results,
+                "cached": cached,
+                "timings": timings
+            })
     
+    show_query_cache_stats(query_cache_stats, search_sources)
+
     # Footer
     st.markdown("---")
     st.markdown(f"*Powered by OpenAI {EMBED_MODEL} embeddings and {chat_model} chat model*")
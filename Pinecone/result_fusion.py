@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Merging search results from several indexes/namespaces
+
+query_interface.py can search several corpora at once (PINECONE_SEARCH_SOURCES,
+e.g. the Tesla course and the meeting notes). The per-source result lists are
+merged with one of
+- "rrf": reciprocal-rank fusion - each result scores sum(1 / (k + rank)) over
+  the lists it appears in; only ranks matter
+- "score": cosine scores mapped from their fixed range [-1, 1] to [0, 1], then
+  the best score wins. The scale is the same for every source, so a source
+  whose best match is weak is not stretched to look as good as a strong one
+
+Results are dicts as built by search_pinecone ("id", "score", "source",
+"content", ...). Vector IDs are only unique within an index/namespace, so a
+result is identified by its source and ID - or by its text, when two sources
+return the same chunk. The fused score is stored as "fused_score"; "score"
+keeps the original similarity.
+"""
+
+import hashlib
+from typing import List, Dict, Optional, Tuple, Hashable
+
+
+RRF_K = 60  # Rank offset of reciprocal-rank fusion (the value from the original RRF paper)
+FUSION_METHODS = ("rrf", "score")
+
+
+def parse_search_sources(spec: str, default_index: str, default_namespace: Optional[str]) -> List[Tuple[str, Optional[str]]]:
+    """
+    Parse "INDEX/NAMESPACE,INDEX/NAMESPACE,..." into (index, namespace) pairs.
+
+    A bare name is a namespace of the default index; "INDEX/" is the index's default
+    namespace. An empty spec gives the default index/namespace only.
+    """
+    sources: List[Tuple[str, Optional[str]]] = []
+    for item in (part.strip() for part in spec.split(",")):
+        if not item:
+            continue
+        index_name, _, namespace = item.rpartition("/")
+        source = (index_name or default_index, namespace or None)
+        if source not in sources:
+            sources.append(source)
+    return sources or [(default_index, default_namespace)]
+
+
+def source_label(index_name: str, namespace: Optional[str]) -> str:
+    """Display name of a search source."""
+    return f"{index_name}/{namespace or 'default'}"
+
+
+def normalize_scores(results: List[Dict]) -> List[float]:
+    """Map the cosine scores of one source from [-1, 1] to [0, 1] (independent of the other results)."""
+    return [(min(max(result["score"], -1.0), 1.0) + 1.0) / 2.0 for result in results]
+
+
+def result_key(result: Dict) -> Hashable:
+    """Identity of a result across sources: its text if known, otherwise its source and vector ID."""
+    content = result.get("content")
+    if content:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return (result.get("source"), result["id"])
+
+
+def fuse_results(result_lists: List[List[Dict]], top_k: int, method: str = "rrf", rrf_k: int = RRF_K) -> List[Dict]:
+    """
+    Merge per-source result lists (each sorted best first) into one top-k list.
+
+    A chunk returned by several sources (same text, see result_key) appears once:
+    its RRF contributions are summed, or its best normalized score is kept.
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method '{method}' (expected one of {', '.join(FUSION_METHODS)})")
+
+    fused: Dict[Hashable, Dict] = {}
+    for results in result_lists:
+        if method == "rrf":
+            contributions = [1.0 / (rrf_k + rank) for rank in range(1, len(results) + 1)]
+        else:
+            contributions = normalize_scores(results)
+        seen = set()
+        for result, contribution in zip(results, contributions):
+            key = result_key(result)
+            if key in seen:
+                continue  # The same text twice in one source counts once, at its best rank
+            seen.add(key)
+            existing = fused.get(key)
+            if existing is None:
+                fused[key] = {**result, "fused_score": contribution}
+            elif method == "rrf":
+                existing["fused_score"] += contribution
+            elif contribution > existing["fused_score"]:
+                fused[key] = {**result, "fused_score": contribution}
+
+    return sorted(fused.values(), key=lambda result: (-result["fused_score"], -result["score"]))[:top_k]
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Per-stage ingestion metrics for embed_folder.py
+
+Each run of process_folder records where its time goes:
+- stage events (discovery, change detection, extraction per file type,
+  tokenization, chunking, embedding requests, upsert batches, manifest sync)
+  with wall time, CPU time, item and byte counts, appended as JSON lines to
+  .metrics/<index>__<namespace>.events.jsonl
+- one summary line per run (per-stage totals, run wall/CPU time, peak RSS)
+  appended to .metrics/<index>__<namespace>.runs.jsonl
+- an end-of-run table comparing every stage with the previous run
+
+A RunMetrics object is passed to the code doing the work; every helper accepts
+None (metrics off) so call sites need no checks. Stages may be recorded from any
+thread. Extraction runs in worker processes, so process_file measures itself and
+its timings travel back with the document.
+
+Wall times of concurrent work (embedding requests, upsert batches, streaming
+stages) are summed, so stages can add up to more than the run's wall time.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
+
+try:
+    import resource  # Unix only - peak RSS and worker-process CPU time
+except ImportError:
+    resource = None
+
+
+# Pipeline order of the stages in the summary table (unknown stages go last)
+STAGE_ORDER = ["discover", "change_detection", "extract", "tokenize", "chunk",
+               "embed_cache", "embed_request", "upsert_batch", "manifest_sync"]
+
+
+def metrics_paths(root: str, index_name: str, namespace: Optional[str]) -> Tuple[str, str]:
+    """(events file, runs file) for an index/namespace pair."""
+    def slug(name: str) -> str:
+        return re.sub(r'[^A-Za-z0-9._-]+', '-', name).strip('-.') or 'default'
+    base = os.path.join(root, f"{slug(index_name)}__{slug(namespace or 'default')}")
+    return base + ".events.jsonl", base + ".runs.jsonl"
+
+
+def _stage_key(stage: str, kind: Optional[str]) -> str:
+    return f"{stage}.{kind}" if kind else stage
+
+
+def _sort_key(key: str) -> Tuple[int, str]:
+    stage = key.split(".", 1)[0]
+    return (STAGE_ORDER.index(stage) if stage in STAGE_ORDER else len(STAGE_ORDER), key)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KiB elsewhere
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor
+
+
+def _children_cpu() -> float:
+    """CPU seconds of finished child processes (the extraction pool)."""
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class RunMetrics:
+    """Collects stage events of one ingestion run."""
+
+    def __init__(self, events_path: Optional[str] = None, runs_path: Optional[str] = None,
+                 compare_on: Iterable[str] = (), **context):
+        """
+        Args:
+            events_path (str, optional): JSON lines file for individual stage events
+            runs_path (str, optional): JSON lines file for run summaries (also read for the previous run)
+            compare_on (Iterable[str]): Context keys the previous run must share to be compared with
+            **context: Run attributes saved with the summary (index, namespace, mode, ...)
+        """
+        self.run_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        self.context = context
+        self.events_path = events_path
+        self.runs_path = runs_path
+        self.totals: Dict[str, Dict[str, float]] = {}
+        self.previous = self._previous_run(list(compare_on))
+        self._lock = threading.Lock()
+        self._events = None
+        if events_path:
+            os.makedirs(os.path.dirname(events_path) or '.', exist_ok=True)
+            self._events = open(events_path, 'a', encoding='utf-8')
+        self._started_at = datetime.now().isoformat(timespec='seconds')
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self._children_cpu_started = _children_cpu()
+
+    def _previous_run(self, compare_on: List[str]) -> Optional[Dict]:
+        """Summary of the last comparable run recorded in the runs file."""
+        if not self.runs_path or not os.path.exists(self.runs_path):
+            return None
+        last = None
+        with open(self.runs_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    run = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # e.g. a line cut short by a crash
+                if all(run.get(key) == self.context.get(key) for key in compare_on):
+                    last = run
+        return last
+
+    def record(self, stage: str, wall: float, cpu: float = 0.0, items: int = 0, nbytes: int = 0,
+               kind: Optional[str] = None, **counts):
+        """
+        Record one stage event.
+
+        Args:
+            stage (str): Stage name (see STAGE_ORDER)
+            wall (float): Wall-clock seconds
+            cpu (float): CPU seconds
+            items (int): Items handled (files, chunks, texts, vectors)
+            nbytes (int): Bytes handled
+            kind (str, optional): Sub-stage, e.g. the file type of an extraction
+            **counts: Extra numbers summed per stage (tokens, retries, ...)
+        """
+        key = _stage_key(stage, kind)
+        with self._lock:
+            totals = self.totals.setdefault(key, {"calls": 0, "wall": 0.0, "cpu": 0.0, "items": 0, "bytes": 0})
+            totals["calls"] += 1
+            totals["wall"] += wall
+            totals["cpu"] += cpu
+            totals["items"] += items
+            totals["bytes"] += nbytes
+            for name, value in counts.items():
+                totals[name] = totals.get(name, 0) + value
+            if self._events:
+                event = {
+                    "run": self.run_id,
+                    "t": round(time.perf_counter() - self._started, 4),
+                    "stage": key,
+                    "wall": round(wall, 6),
+                    "cpu": round(cpu, 6),
+                    "items": items,
+                    "bytes": nbytes,
+                    "thread": threading.current_thread().name,
+                    **counts,
+                }
+                self._events.write(json.dumps(event) + "\n")
+
+    def finish(self) -> Dict:
+        """Close the events file, append the run summary and return it."""
+        summary = {
+            "run": self.run_id,
+            "started_at": self._started_at,
+            **self.context,
+            "wall": time.perf_counter() - self._started,
+            "cpu": time.process_time() - self._cpu_started,
+            "worker_cpu": _children_cpu() - self._children_cpu_started,
+            "peak_rss_mb": _peak_rss_mb(),
+            "stages": {key: self.totals[key] for key in sorted(self.totals, key=_sort_key)},
+        }
+        with self._lock:
+            if self._events:
+                self._events.close()
+                self._events = None
+        if self.runs_path:
+            try:
+                os.makedirs(os.path.dirname(self.runs_path) or '.', exist_ok=True)
+                with open(self.runs_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(summary) + "\n")
+            except OSError as e:
+                print(f"⚠️  Could not save run metrics {self.runs_path}: {e}")
+        return summary
+
+
+@contextmanager
+def timed(metrics: Optional[RunMetrics], stage: str, kind: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Time a block as one stage event on the current thread.
+
+    Yields a dict the block may fill with "items", "nbytes" and extra counts.
+    """
+    counts: Dict = {}
+    started, cpu_started = time.perf_counter(), time.thread_time()
+    try:
+        yield counts
+    finally:
+        if metrics:
+            metrics.record(stage, time.perf_counter() - started, time.thread_time() - cpu_started,
+                           kind=kind, **counts)
+
+
+def timed_iter(metrics: Optional[RunMetrics], stage: str, items: Iterable, kind: Optional[str] = None) -> Iterator:
+    """Pass items through, recording the time spent producing them (not consuming them) as one event."""
+    if not metrics:
+        yield from items
+        return
+    wall = cpu = 0.0
+    count = 0
+    iterator = iter(items)
+    try:
+        while True:
+            started, cpu_started = time.perf_counter(), time.thread_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                wall += time.perf_counter() - started
+                cpu += time.thread_time() - cpu_started
+            count += 1
+            yield item
+    finally:
+        metrics.record(stage, wall, cpu, items=count, kind=kind)
+
+
+def _format_mb(nbytes: float) -> str:
+    return f"{nbytes / (1024 * 1024):.2f}" if nbytes else "-"
+
+
+def _change(current: float, previous: Optional[float]) -> str:
+    if previous is None:
+        return "new"
+    if previous < 0.0005:
+        return "-"
+    return f"{(current - previous) / previous:+.0%}"
+
+
+def print_run_summary(summary: Dict, previous: Optional[Dict] = None, events_path: Optional[str] = None):
+    """Print the per-stage table of a run, with the wall-time change since the previous run."""
+    previous_stages = previous["stages"] if previous else {}
+    print(f"\n📈 Stage metrics (run {summary['run']}):")
+    print(f"   {'Stage':<24}{'Calls':>7}{'Wall s':>10}{'CPU s':>9}{'Items':>9}{'MB':>9}"
+          f"{'vs last' if previous else '':>9}")
+    for key, totals in summary["stages"].items():
+        change = _change(totals["wall"], previous_stages.get(key, {}).get("wall")) if previous else ""
+        print(f"   {key:<24}{totals['calls']:>7}{totals['wall']:>10.2f}{totals['cpu']:>9.2f}"
+              f"{totals['items']:>9}{_format_mb(totals['bytes']):>9}{change:>9}")
+    for key in sorted(set(previous_stages) - set(summary["stages"]), key=_sort_key):
+        print(f"   {key:<24}{'-':>7}{'-':>10}{'-':>9}{'-':>9}{'-':>9}{'not run':>9}")
+    run_change = _change(summary["wall"], previous.get("wall")) if previous else ""
+    print(f"   {'run (wall / process CPU)':<24}{'':>7}{summary['wall']:>10.2f}{summary['cpu']:>9.2f}"
+          f"{'':>9}{'':>9}{run_change:>9}")
+    if summary.get("worker_cpu"):
+        print(f"   ⚙️  Extraction worker CPU: {summary['worker_cpu']:.2f}s")
+    if summary.get("peak_rss_mb"):
+        print(f"   🧮 Peak RSS: {summary['peak_rss_mb']:.0f} MB")
+    if previous:
+        print(f"   ↔️  Compared with run {previous['run']} ({previous.get('mode', '?')} mode, "
+              f"{previous.get('scope', '?')} sync)")
+    print("   (Concurrent requests and streaming stages overlap - their wall times are summed)")
+    if events_path:
+        print(f"   📝 Events: {events_path}")
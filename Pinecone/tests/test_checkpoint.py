@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+import pytest
+
+from checkpoint import CheckpointJournal
+
+STATE = {"size": 10, "mtime": 1.0, "sha256": "abc"}
+
+
+def write_journal(path: str) -> int:
+    """Journal one file, two embeddings and an acknowledgement; returns the clean size."""
+    journal = CheckpointJournal(path)
+    journal.record_file("docs/a.md", STATE, {"filename": "a.md"}, [{"vector_id": "a_0", "chunk": "hello"}])
+    journal.record_embeddings(["a_0", "a_1"], [np.ones(4, dtype=np.float32), np.full(4, 2, dtype=np.float32)])
+    journal.record_upserted(["a_0"])
+    journal.close()
+    return os.path.getsize(path)
+
+
+@pytest.mark.parametrize("torn", [b"E", b"E\x40\x00\x00\x00" + b"\x01" * 10])
+def test_torn_tail_is_dropped_and_truncated(tmp_path, torn):
+    path = str(tmp_path / "run.journal")
+    clean_size = write_journal(path)
+    with open(path, "ab") as f:
+        f.write(torn)  # crash in the middle of the next record (header or payload)
+
+    journal = CheckpointJournal(path, resume=True)
+    assert os.path.getsize(path) == clean_size
+    assert set(journal.files) == {"docs/a.md"}
+    assert np.array_equal(journal.embeddings["a_1"], np.full(4, 2, dtype=np.float32))
+    assert journal.upserted == {"a_0"}
+
+    # New records start on a clean boundary and are read back by the next resume
+    journal.record_upserted(["a_1"])
+    journal.close()
+    assert CheckpointJournal(path, resume=True).upserted == {"a_0", "a_1"}
+
+
+def test_resumable_records_require_unchanged_file(tmp_path):
+    path = str(tmp_path / "run.journal")
+    write_journal(path)
+    journal = CheckpointJournal(path, resume=True)
+    records = journal.resumable_records("docs/a.md", "abc")
+    assert records == [{"vector_id": "a_0", "chunk": "hello", "info": {"filename": "a.md"}}]
+    assert journal.resumable_records("docs/a.md", "changed") is None
+
+
+def test_fresh_journal_discards_previous_run(tmp_path):
+    path = str(tmp_path / "run.journal")
+    write_journal(path)
+    journal = CheckpointJournal(path)
+    assert not journal.files and not journal.embeddings
+    journal.close(remove=True)
+    assert not os.path.exists(path)
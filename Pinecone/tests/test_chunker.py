@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from chunker import TextChunker, SEPARATORS
+
+text_splitters = pytest.importorskip("langchain_text_splitters")
+
+
+def langchain_chunks(text: str, chunk_size: int, chunk_overlap: int, separators=SEPARATORS):
+    splitter = text_splitters.RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=list(separators),
+        keep_separator=True,
+    )
+    return [chunk.strip() for chunk in splitter.split_text(text) if chunk.strip()]
+
+
+def mixed_text(rng: random.Random) -> str:
+    """Words of varied length joined by paragraph breaks, line breaks, spaces and punctuation."""
+    joiners = ["\n\n", "\n", " ", " ", " ", "  ", "\n\n\n", ". ", ", ", "。"]
+    parts = []
+    for _ in range(rng.randrange(0, 80)):
+        parts.append("".join(rng.choice("abcdefghij") for _ in range(rng.choice([0, 1, 3, 8, 30, 150]))))
+        parts.append(rng.choice(joiners))
+    return "".join(parts)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_identical_to_langchain(seed):
+    rng = random.Random(seed)
+    for _ in range(300):
+        chunk_size = rng.choice([1, 2, 5, 10, 40, 100, 400])
+        chunk_overlap = rng.randrange(0, chunk_size)
+        text = mixed_text(rng)
+        assert TextChunker(chunk_size, chunk_overlap).split(text) == langchain_chunks(text, chunk_size, chunk_overlap)
+
+
+def test_identical_to_langchain_with_custom_separators():
+    rng = random.Random(7)
+    separators = ["\n\n", "\n", " "]
+    for _ in range(300):
+        chunk_size = rng.choice([3, 10, 40, 100])
+        chunk_overlap = rng.randrange(0, chunk_size)
+        text = mixed_text(rng)
+        chunker = TextChunker(chunk_size, chunk_overlap, separators)
+        assert chunker.split(text) == langchain_chunks(text, chunk_size, chunk_overlap, separators)
+
+
+def test_offsets_point_at_chunks():
+    text = mixed_text(random.Random(11))
+    chunker = TextChunker(100, 20)
+    offsets = chunker.split_offsets(text)
+    assert [text[start:end] for start, end in offsets] == chunker.split(text)
+    assert all(a[0] < b[0] for a, b in zip(offsets, offsets[1:]))
+
+
+@pytest.mark.parametrize("joiner", ["\n", ""])
+def test_stream_matches_whole_text(joiner):
+    rng = random.Random(3)
+    for _ in range(100):
+        pages = [mixed_text(rng) for _ in range(rng.randrange(1, 5))]
+        text = joiner.join(pages)
+        chunker = TextChunker(rng.choice([10, 100, 400]), 5)
+        streamed = list(chunker.split_stream(pages, joiner))
+        assert [chunk for _, _, chunk in streamed] == chunker.split(text)
+        assert [(start, end) for start, end, _ in streamed] == chunker.split_offsets(text)
@@ -0,0 +1,37 @@
+from dedup import NearDuplicateDetector
+
+TEXT = ("the quarterly report covers revenue growth in the northern region, the new hiring plan for "
+        "the support team, the budget for the office move and the timeline agreed with the board for "
+        "the launch of the second product line next spring")
+EDITED = TEXT.replace("next spring", "next summer")
+OTHER = "meeting notes about the office move, parking permits and the holiday schedule for staff"
+
+
+def test_near_duplicate_points_at_canonical():
+    detector = NearDuplicateDetector(0.7)
+    assert detector.check("a_0", TEXT) is None
+    assert detector.check("b_0", EDITED) == "a_0"
+    assert detector.check("c_0", OTHER) is None
+    assert detector.duplicates == 1
+
+
+def test_saved_signatures_match_in_next_run(tmp_path):
+    path = str(tmp_path / "ns.dedup.npz")
+    first = NearDuplicateDetector(0.7)
+    first.check("a_0", TEXT)
+    first.check("c_0", OTHER)
+    first.save(path, ["a_0", "c_0"])
+
+    second = NearDuplicateDetector(0.7)
+    assert second.load(path, ["a_0"]) == 1  # c_0 belongs to a file this run replaces
+    assert second.check("b_0", EDITED) == "a_0"
+    assert second.check("c_1", OTHER) is None
+
+
+def test_signatures_of_other_settings_are_ignored(tmp_path):
+    path = str(tmp_path / "ns.dedup.npz")
+    first = NearDuplicateDetector(0.7)
+    first.check("a_0", TEXT)
+    first.save(path, ["a_0"])
+    assert NearDuplicateDetector(0.9).load(path, ["a_0"]) == 0
+    assert NearDuplicateDetector(0.7).load(str(tmp_path / "missing.npz"), ["a_0"]) == 0
@@ -0,0 +1,48 @@
+import ast
+import re
+import sys
+import tomllib
+from pathlib import Path
+
+PROJECT = Path(__file__).resolve().parent.parent
+
+# Import name -> distribution name where they differ
+DISTRIBUTIONS = {
+    "docx": "python-docx",
+    "dotenv": "python-dotenv",
+    "langchain_text_splitters": "langchain-text-splitters",
+}
+
+
+def declared_dependencies() -> set:
+    with open(PROJECT / "pyproject.toml", "rb") as f:
+        requirements = tomllib.load(f)["project"]["dependencies"]
+    return {re.split(r"[<>=!~;\[ ]", requirement, maxsplit=1)[0].lower() for requirement in requirements}
+
+
+def required_imports(tree: ast.AST) -> set:
+    """Top-level packages imported outside try/except blocks (those are optional)."""
+    optional = {id(node) for block in ast.walk(tree) if isinstance(block, ast.Try)
+                for statement in block.body for node in ast.walk(statement)}
+    names = set()
+    for node in ast.walk(tree):
+        if id(node) in optional:
+            continue
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split(".")[0])
+    return names
+
+
+def test_third_party_imports_are_declared():
+    local_modules = {path.stem for path in PROJECT.glob("*.py")}
+    declared = declared_dependencies()
+    missing = {}
+    for path in sorted(PROJECT.glob("*.py")):
+        for name in required_imports(ast.parse(path.read_text(encoding="utf-8"))):
+            if name in sys.stdlib_module_names or name in local_modules:
+                continue
+            if DISTRIBUTIONS.get(name, name).lower() not in declared:
+                missing.setdefault(name, []).append(path.name)
+    assert not missing, f"Imported but not in pyproject.toml dependencies: {missing}"
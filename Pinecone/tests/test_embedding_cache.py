@@ -0,0 +1,65 @@
+import numpy as np
+
+from embedding_cache import EmbeddingCache
+
+
+def vector(dimensions: int, seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).random(dimensions, dtype=np.float32)
+
+
+def stored_bytes(cache: EmbeddingCache) -> int:
+    return cache._conn.execute("SELECT COALESCE(SUM(length(vector)), 0) FROM embeddings").fetchone()[0]
+
+
+def test_round_trip(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+    cache.put_many("model", 4, ["a", "b"], [vector(4, 0), None])
+    found = cache.get_many("model", 4, ["a", "b", "a"])
+    assert np.array_equal(found[0], vector(4, 0))
+    assert found[1] is None
+    assert found[2].dtype == np.float32
+    assert cache.stats["hits"] == 2 and cache.stats["misses"] == 1
+
+
+def test_byte_bound_with_mixed_dimensions(tmp_path):
+    max_bytes = 64 * 1024
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), max_bytes=max_bytes)
+    # Large vectors first, then many small ones: the bound is on bytes, not rows
+    for i in range(10):
+        cache.put_many("model", 3072, [f"large-{i}"], [vector(3072, i)])
+        assert stored_bytes(cache) <= max_bytes
+    for i in range(200):
+        cache.put_many("model", 256, [f"small-{i}"], [vector(256, i)])
+        assert stored_bytes(cache) <= max_bytes
+    for i in range(10, 20):
+        cache.put_many("model", 3072, [f"large-{i}"], [vector(3072, i)])
+        assert stored_bytes(cache) <= max_bytes
+    assert cache.stored_bytes() == stored_bytes(cache)
+    assert cache.stats["evictions"] > 0
+
+
+def test_eviction_is_least_recently_used(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), max_bytes=3 * 256 * 4)
+    cache.put_many("model", 256, ["a", "b", "c"], [vector(256, 0), vector(256, 1), vector(256, 2)])
+    cache._conn.execute("UPDATE embeddings SET last_used = 0")  # make "a" the most recently used below
+    cache.get_many("model", 256, ["a"])
+    cache.put_many("model", 512, ["d"], [vector(512, 3)])
+    kept = [embedding is not None for embedding in cache.get_many("model", 256, ["a", "b", "c"])]
+    assert kept[0] and kept.count(True) == 1
+    assert stored_bytes(cache) <= cache.max_bytes
+
+
+def test_replacing_a_key_counts_its_bytes_once(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+    cache.put_many("model", 512, ["a"], [vector(512, 0)])
+    cache.put_many("model", 512, ["a", "a"], [vector(512, 1), vector(512, 2)])
+    assert cache.stored_bytes() == stored_bytes(cache) == 512 * 4
+
+
+def test_writes_from_another_connection_are_counted(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    first = EmbeddingCache(path, max_bytes=4 * 1024 * 4)
+    second = EmbeddingCache(path, max_bytes=4 * 1024 * 4)
+    second.put_many("model", 1024, ["x", "y", "z"], [vector(1024, i) for i in range(3)])
+    first.put_many("model", 1024, ["a", "b"], [vector(1024, 3), vector(1024, 4)])
+    assert stored_bytes(first) <= first.max_bytes
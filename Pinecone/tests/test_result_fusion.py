@@ -0,0 +1,39 @@
+import pytest
+
+from result_fusion import fuse_results, normalize_scores
+
+
+def result(source: str, vector_id: str, score: float, content: str = "") -> dict:
+    return {"id": vector_id, "score": score, "source": source, "content": content}
+
+
+def test_score_fusion_keeps_sources_on_one_scale():
+    strong = [result("a/x", "a1", 0.82, "alpha"), result("a/x", "a2", 0.74, "beta")]
+    weak = [result("b/y", "b1", 0.31, "gamma")]  # a single, poor match is not promoted to 1.0
+    fused = fuse_results([weak, strong], top_k=3, method="score")
+    assert [r["id"] for r in fused] == ["a1", "a2", "b1"]
+    assert fused[2]["fused_score"] == pytest.approx(0.655)
+
+
+def test_equal_scores_are_not_promoted():
+    assert normalize_scores([result("a/x", "a1", 0.4), result("a/x", "a2", 0.4)]) == pytest.approx([0.7, 0.7])
+
+
+def test_rrf_orders_by_rank_and_sums_shared_chunks():
+    first = [result("a/x", "a1", 0.9, "shared text"), result("a/x", "a2", 0.8, "only in a")]
+    second = [result("b/y", "b1", 0.5, "only in b"), result("b/y", "b2", 0.4, "shared text")]
+    fused = fuse_results([first, second], top_k=3, method="rrf")
+    assert [r["id"] for r in fused] == ["a1", "b1", "a2"]
+    assert fused[0]["fused_score"] == pytest.approx(1 / 61 + 1 / 62)
+
+
+def test_same_id_in_different_sources_is_not_merged():
+    first = [result("a/x", "notes_0_abc", 0.9, "text from index a")]
+    second = [result("b/y", "notes_0_abc", 0.8, "text from index b")]
+    fused = fuse_results([first, second], top_k=5, method="rrf")
+    assert [r["source"] for r in fused] == ["a/x", "b/y"]
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        fuse_results([], top_k=1, method="max")
@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+from vector_store import LocalVectorClient
+
+
+def make_index(tmp_path):
+    client = LocalVectorClient(str(tmp_path))
+    client.create_index("docs", dimension=3)
+    return client.Index("docs")
+
+
+def test_reads_do_not_create_namespaces(tmp_path):
+    index = make_index(tmp_path)
+    assert index.query(vector=[1, 0, 0], top_k=3, namespace="typo").matches == []
+    assert index.query(vector=[1, 0, 0], top_k=3).matches == []
+    index.delete(ids=["a"], namespace="typo")
+    assert index.describe_index_stats()["namespaces"] == {}
+    assert not os.path.exists(tmp_path / "docs" / "typo")
+
+
+def test_upsert_creates_namespace(tmp_path):
+    index = make_index(tmp_path)
+    index.upsert(vectors=[{"id": "a", "values": [1, 0, 0], "metadata": {}}], namespace="notes")
+    index.upsert(vectors=[{"id": "b", "values": [0, 1, 0], "metadata": {}}])
+    stats = index.describe_index_stats()
+    assert stats["namespaces"] == {"notes": {"vector_count": 1}, "": {"vector_count": 1}}
+    assert [match.id for match in index.query(vector=[1, 0, 0], top_k=1, namespace="notes").matches] == ["a"]
+
+
+def test_reserved_namespace_is_rejected(tmp_path):
+    index = make_index(tmp_path)
+    with pytest.raises(ValueError):
+        index.upsert(vectors=[{"id": "a", "values": [1, 0, 0], "metadata": {}}], namespace="__default__")
+    with pytest.raises(ValueError):
+        index.query(vector=[1, 0, 0], namespace="__default__")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Parallel, retrying, resumable Pinecone upserts
+
+Batches are upserted by a bounded thread pool. Each batch is retried with
+jittered exponential backoff, and a failing batch never takes the others down.
+Every acknowledged batch is appended to a small progress file, so a restarted
+run skips the batches that already landed.
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Dict, Optional, Callable, Set
+
+from run_metrics import RunMetrics, timed
+
+
+def batch_fingerprint(vectors: List[Dict]) -> str:
+    """Stable identifier of a batch (vector IDs are content-addressed)."""
+    digest = hashlib.sha1()
+    for vector in vectors:
+        digest.update(vector["id"].encode('utf-8'))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def to_payload(vectors: List[Dict]) -> List[Dict]:
+    """
+    Copy of a batch with array values converted to lists of floats.
+
+    Embeddings stay float32 arrays through the pipeline; the JSON/gRPC request
+    is the first place that needs Python floats.
+    """
+    return [{**vector, "values": vector["values"].tolist()} if hasattr(vector["values"], "tolist") else vector
+            for vector in vectors]
+
+
+def payload_bytes(vectors: List[Dict]) -> int:
+    """Approximate request size of a batch: float32 values plus JSON metadata."""
+    return sum(len(v["values"]) * 4 + len(json.dumps(v.get("metadata") or {})) for v in vectors)
+
+
+class UpsertProgress:
+    """Append-only record of acknowledged upsert batches."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.completed: Set[str] = set()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.completed = {line.strip() for line in f if line.strip()}
+
+    def is_done(self, fingerprint: str) -> bool:
+        return fingerprint in self.completed
+
+    def mark_done(self, fingerprint: str):
+        with self._lock:
+            self.completed.add(fingerprint)
+            if self.path:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(fingerprint + "\n")
+
+    def clear(self):
+        """Forget progress once a whole upload has succeeded."""
+        with self._lock:
+            self.completed.clear()
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class ParallelUpserter:
+    """Bounded worker pool for Pinecone upserts with retries and failure isolation."""
+
+    def __init__(self, index, namespace: Optional[str] = None, max_workers: int = 4, max_retries: int = 5,
+                 progress_path: Optional[str] = None, metrics: Optional[RunMetrics] = None):
+        """
+        Args:
+            index: Pinecone Index handle
+            namespace (str, optional): Target namespace
+            max_workers (int): Upsert requests in flight
+            max_retries (int): Attempts per batch before it is reported as failed
+            progress_path (str, optional): Progress file for resuming interrupted uploads
+            metrics (RunMetrics, optional): Records every batch as an "upsert_batch" event
+        """
+        self.index = index
+        self.metrics = metrics
+        self.namespace = namespace
+        self.max_retries = max(1, max_retries)
+        self.progress = UpsertProgress(progress_path)
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="upsert")
+        # Bound queued batches so callers can't buffer the whole corpus in the pool
+        self._slots = threading.BoundedSemaphore(max(1, max_workers) * 2)
+        self._lock = threading.Lock()
+        self._futures: List[Future] = []
+        self._started = time.monotonic()
+        self.failed_ids: List[str] = []
+        self.stats: Dict[str, int] = {
+            "batches": 0,
+            "vectors": 0,
+            "skipped_batches": 0,
+            "skipped_vectors": 0,
+            "failed_batches": 0,
+            "retries": 0,
+        }
+
+    def _upsert_with_retry(self, vectors: List[Dict], counts: Dict) -> bool:
+        vectors = to_payload(vectors)
+        delay = 1.0
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                if self.namespace:
+                    self.index.upsert(vectors=vectors, namespace=self.namespace)
+                else:
+                    self.index.upsert(vectors=vectors)
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"❌ Upsert batch failed after {attempt} attempts: {e}")
+                    return False
+                wait = delay + random.uniform(0, delay)
+                print(f"⚠️  Upsert failed ({e}), retrying in {wait:.1f}s...")
+                with self._lock:
+                    self.stats["retries"] += 1
+                counts["retries"] = counts.get("retries", 0) + 1
+                time.sleep(wait)
+                delay = min(delay * 2, 30.0)
+        return False
+
+    def _run(self, vectors: List[Dict], fingerprint: str, on_done: Optional[Callable[[List[Dict], bool], None]]):
+        try:
+            with timed(self.metrics, "upsert_batch") as counts:
+                counts.update(items=len(vectors), nbytes=payload_bytes(vectors) if self.metrics else 0)
+                ok = self._upsert_with_retry(vectors, counts)
+                if not ok:
+                    counts["failed"] = 1
+            if ok:
+                self.progress.mark_done(fingerprint)
+            with self._lock:
+                if ok:
+                    self.stats["batches"] += 1
+                    self.stats["vectors"] += len(vectors)
+                else:
+                    self.stats["failed_batches"] += 1
+                    self.failed_ids.extend(v["id"] for v in vectors)
+                if on_done:
+                    on_done(vectors, ok)
+            return ok
+        finally:
+            self._slots.release()
+
+    def submit(self, vectors: List[Dict], on_done: Optional[Callable[[List[Dict], bool], None]] = None):
+        """
+        Queue one batch (blocks while the pool is saturated).
+
+        `on_done(vectors, ok)` is called once the batch is acknowledged or has failed;
+        calls are serialized so callbacks may update shared state without locking.
+        """
+        fingerprint = batch_fingerprint(vectors)
+        if self.progress.is_done(fingerprint):
+            with self._lock:
+                self.stats["skipped_batches"] += 1
+                self.stats["skipped_vectors"] += len(vectors)
+                if on_done:
+                    on_done(vectors, True)
+            return
+        self._slots.acquire()
+        self._futures.append(self.executor.submit(self._run, vectors, fingerprint, on_done))
+
+    def wait(self) -> Dict:
+        """Wait for all queued batches and return a report (including vectors/s)."""
+        for future in self._futures:
+            future.result()
+        self._futures = []
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        report = dict(self.stats)
+        report["elapsed"] = elapsed
+        report["vectors_per_second"] = self.stats["vectors"] / elapsed
+        report["failed_ids"] = list(self.failed_ids)
+        return report
+
+    def close(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Pluggable vector store backends
+
+embed_folder.py and query_interface.py talk to a vector store through the
+small interface the Pinecone client already exposes:
+
+    client.list_indexes().names()
+    client.create_index(name, dimension, ...)
+    index = client.Index(name)
+    index.upsert(vectors=[...], namespace=...)
+    index.delete(ids=[...], namespace=...)
+    index.query(vector=..., top_k=..., namespace=..., include_metadata=True)
+    index.describe_index_stats()
+
+`LocalVectorClient` implements the same interface on local disk: vectors live in
+a memory-mapped float32 matrix per namespace with an SQLite metadata sidecar,
+and top-k cosine queries are answered with vectorized NumPy. This gives
+sub-millisecond retrieval for small and medium corpora and lets the whole
+pipeline run offline. Handles notice writes from other processes (e.g.
+embed_folder.py while the Streamlit UI is open) through SQLite's data_version
+and reload before their next operation; run one writer per namespace at a time.
+
+Select the backend with VECTOR_BACKEND=pinecone|local (see get_vector_client).
+"""
+
+import os
+import json
+import shutil
+import sqlite3
+import threading
+from typing import List, Dict, Optional, Any
+
+import numpy as np
+
+
+DEFAULT_NAMESPACE = "__default__"
+INITIAL_CAPACITY = 1024  # Rows allocated when a namespace is created (doubles as needed)
+
+
+class QueryMatch:
+    """One query result (same attributes as a Pinecone match)."""
+
+    def __init__(self, id: str, score: float, metadata: Optional[Dict] = None, values: Optional[List[float]] = None):
+        self.id = id
+        self.score = score
+        self.metadata = metadata or {}
+        self.values = values or []
+
+
+class QueryResult:
+    """Query response with a Pinecone-compatible `matches` list."""
+
+    def __init__(self, matches: List[QueryMatch], namespace: str = ""):
+        self.matches = matches
+        self.namespace = namespace
+
+
+class IndexList:
+    """Mimics the object returned by Pinecone.list_indexes()."""
+
+    def __init__(self, names: List[str]):
+        self._names = names
+
+    def names(self) -> List[str]:
+        return list(self._names)
+
+
+class LocalNamespace:
+    """Vectors of one namespace: mmap'd float32 rows + SQLite id/metadata sidecar."""
+
+    def __init__(self, path: str, dimension: int):
+        self.path = path
+        self.dimension = dimension
+        self._lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+
+        self._db = sqlite3.connect(os.path.join(path, "metadata.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            " row INTEGER PRIMARY KEY,"
+            " id TEXT UNIQUE NOT NULL,"
+            " metadata TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+        self._matrix_path = os.path.join(path, "vectors.f32")
+        self._matrix = None
+        self._capacity = 0
+        self._load()
+
+    def _load(self):
+        """(Re)build the in-memory row maps from the sidecar and map the matrix file."""
+        # id -> row and row -> id, plus a validity mask for vectorized queries
+        rows = self._db.execute("SELECT row, id FROM vectors").fetchall()
+        self._row_of: Dict[str, int] = {vector_id: row for row, vector_id in rows}
+        self._high_water = max((row for row, _ in rows), default=-1) + 1
+        self._free_rows: List[int] = sorted(set(range(self._high_water)) - set(self._row_of.values()), reverse=True)
+
+        file_rows = os.path.getsize(self._matrix_path) // (self.dimension * 4) if os.path.exists(self._matrix_path) else 0
+        capacity = max(INITIAL_CAPACITY, self._high_water, file_rows)
+        if self._matrix is None or capacity != self._capacity:
+            if self._matrix is not None:
+                self._matrix.flush()
+                self._matrix = None
+            self._open_matrix(capacity)
+        self._valid = np.zeros(self._capacity, dtype=bool)
+        if self._row_of:
+            self._valid[list(self._row_of.values())] = True
+        # Changes whenever another connection (e.g. another process) commits to the sidecar
+        self._data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+
+    def _refresh(self):
+        """Pick up vectors written or deleted by another process since the last load (caller holds the lock)."""
+        if self._db.execute("PRAGMA data_version").fetchone()[0] != self._data_version:
+            self._load()
+
+    def _open_matrix(self, capacity: int):
+        """(Re)map the matrix file, growing it to `capacity` rows if needed."""
+        needed = capacity * self.dimension * 4
+        if not os.path.exists(self._matrix_path) or os.path.getsize(self._matrix_path) < needed:
+            with open(self._matrix_path, 'ab') as f:
+                f.truncate(needed)
+        self._capacity = capacity
+        self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode='r+', shape=(capacity, self.dimension))
+
+    def _grow(self, min_capacity: int):
+        capacity = self._capacity
+        while capacity < min_capacity:
+            capacity *= 2
+        self._matrix.flush()
+        del self._matrix
+        self._open_matrix(capacity)
+        valid = np.zeros(capacity, dtype=bool)
+        valid[:len(self._valid)] = self._valid
+        self._valid = valid
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._row_of)
+
+    def upsert(self, vectors: List[Dict]) -> int:
+        if not vectors:
+            return 0
+        # Validate the whole batch before any row is assigned, so a rejected batch leaves no trace
+        values = np.asarray([v["values"] for v in vectors], dtype=np.float32)
+        if values.ndim != 2 or values.shape[1] != self.dimension:
+            got = values.shape[1] if values.ndim == 2 else "mixed"
+            raise ValueError(f"Vector dimension {got} does not match index dimension {self.dimension}")
+
+        with self._lock:
+            self._refresh()
+            new_ids = [v["id"] for v in vectors if v["id"] not in self._row_of]
+            new_ids = list(dict.fromkeys(new_ids))
+            needed = self._high_water + max(0, len(new_ids) - len(self._free_rows))
+            if needed > self._capacity:
+                self._grow(needed)
+
+            for vector_id in new_ids:
+                if self._free_rows:
+                    self._row_of[vector_id] = self._free_rows.pop()
+                else:
+                    self._row_of[vector_id] = self._high_water
+                    self._high_water += 1
+
+            rows = np.fromiter((self._row_of[v["id"]] for v in vectors), dtype=np.int64, count=len(vectors))
+            # Store unit vectors so cosine similarity is a single matrix-vector product
+            norms = np.linalg.norm(values, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._matrix[rows] = values / norms
+            self._valid[rows] = True
+            # Vectors reach the file before their rows are committed, so readers never see empty rows
+            self._matrix.flush()
+
+            self._db.executemany(
+                "INSERT OR REPLACE INTO vectors (row, id, metadata) VALUES (?, ?, ?)",
+                [(int(row), v["id"], json.dumps(v.get("metadata") or {}, ensure_ascii=False))
+                 for row, v in zip(rows, vectors)]
+            )
+            self._db.commit()
+            return len(vectors)
+
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False):
+        with self._lock:
+            self._refresh()
+            if delete_all:
+                ids = list(self._row_of)
+            rows = [self._row_of.pop(vector_id) for vector_id in (ids or []) if vector_id in self._row_of]
+            if not rows:
+                return
+            self._valid[rows] = False
+            self._free_rows.extend(rows)
+            self._db.executemany("DELETE FROM vectors WHERE row = ?", [(row,) for row in rows])
+            self._db.commit()
+
+    def query(self, vector: List[float], top_k: int, include_metadata: bool, include_values: bool) -> List[QueryMatch]:
+        with self._lock:
+            self._refresh()
+            n = self._high_water
+            if n == 0 or not self._row_of:
+                return []
+            q = np.asarray(vector, dtype=np.float32)
+            q_norm = np.linalg.norm(q)
+            if q_norm == 0:
+                return []
+            scores = self._matrix[:n] @ (q / q_norm)
+            scores[~self._valid[:n]] = -np.inf
+
+            k = min(top_k, len(self._row_of))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+
+            placeholders = ",".join("?" * len(top))
+            rows = self._db.execute(
+                f"SELECT row, id, metadata FROM vectors WHERE row IN ({placeholders})", [int(r) for r in top]
+            ).fetchall()
+            by_row = {row: (vector_id, metadata) for row, vector_id, metadata in rows}
+            matches = []
+            for row in top:
+                vector_id, metadata = by_row[int(row)]
+                matches.append(QueryMatch(
+                    id=vector_id,
+                    score=float(scores[row]),
+                    metadata=json.loads(metadata) if include_metadata else None,
+                    values=self._matrix[row].tolist() if include_values else None,
+                ))
+            return matches
+
+    def close(self):
+        with self._lock:
+            self._matrix.flush()
+            self._db.close()
+
+
+class LocalVectorIndex:
+    """Pinecone Index look-alike backed by local memory-mapped namespaces."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "index.json"), 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+        self.dimension = self.config["dimension"]
+        self._namespaces: Dict[str, LocalNamespace] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _directory_name(namespace: Optional[str]) -> str:
+        """Directory holding a namespace ("" / None is the default namespace)."""
+        if not namespace:
+            return DEFAULT_NAMESPACE
+        # Namespaces are directories - never let a name leave or nest inside the index directory
+        if namespace in (".", "..") or any(sep and sep in namespace for sep in ("/", "\\", os.sep, os.altsep, "\0")):
+            raise ValueError(f"Invalid namespace name {namespace!r} (path separators and '.'/'..' are not allowed)")
+        if namespace == DEFAULT_NAMESPACE:
+            raise ValueError(f"Invalid namespace name {namespace!r} (reserved for the default namespace, use '')")
+        return namespace
+
+    def _open(self, name: str, create: bool) -> Optional[LocalNamespace]:
+        """Namespace stored in directory `name`; None if it does not exist and `create` is False."""
+        with self._lock:
+            if name not in self._namespaces:
+                path = os.path.join(self.path, name)
+                if not create and not os.path.isdir(path):
+                    return None  # Reads never create storage
+                self._namespaces[name] = LocalNamespace(path, self.dimension)
+            return self._namespaces[name]
+
+    def _namespace(self, namespace: Optional[str], create: bool = False) -> Optional[LocalNamespace]:
+        return self._open(self._directory_name(namespace), create)
+
+    def _existing_namespaces(self) -> List[str]:
+        return sorted(
+            entry for entry in os.listdir(self.path)
+            if os.path.isdir(os.path.join(self.path, entry))
+        )
+
+    def upsert(self, vectors: List[Dict], namespace: Optional[str] = None, **kwargs) -> Dict:
+        return {"upserted_count": self._namespace(namespace, create=True).upsert(vectors)}
+
+    def delete(self, ids: Optional[List[str]] = None, namespace: Optional[str] = None,
+               delete_all: bool = False, **kwargs) -> Dict:
+        store = self._namespace(namespace)
+        if store is not None:
+            store.delete(ids, delete_all=delete_all)
+        return {}
+
+    def query(self, vector: List[float], top_k: int = 10, namespace: Optional[str] = None,
+              include_metadata: bool = False, include_values: bool = False, **kwargs) -> QueryResult:
+        store = self._namespace(namespace)
+        matches = store.query(vector, top_k, include_metadata, include_values) if store is not None else []
+        return QueryResult(matches, namespace=namespace or "")
+
+    def last_modified(self) -> float:
+        """Newest modification time of the namespace sidecars - changes with every committed write."""
+        newest = 0.0
+        for name in self._existing_namespaces():
+            for filename in ("metadata.sqlite", "metadata.sqlite-wal"):
+                path = os.path.join(self.path, name, filename)
+                if os.path.exists(path):
+                    newest = max(newest, os.path.getmtime(path))
+        return newest
+
+    def describe_index_stats(self, **kwargs) -> Dict[str, Any]:
+        namespaces = {}
+        for name in self._existing_namespaces():
+            store = self._open(name, create=False)
+            if store is None:
+                continue  # Removed since it was listed
+            count = store.count()
+            namespaces["" if name == DEFAULT_NAMESPACE else name] = {"vector_count": count}
+        return {
+            "dimension": self.dimension,
+            "namespaces": namespaces,
+            "total_vector_count": sum(ns["vector_count"] for ns in namespaces.values()),
+        }
+
+
+class LocalVectorClient:
+    """Pinecone client look-alike managing local indexes under one directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._indexes: Dict[str, LocalVectorIndex] = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def list_indexes(self) -> IndexList:
+        return IndexList(sorted(
+            entry for entry in os.listdir(self.root)
+            if os.path.exists(os.path.join(self.root, entry, "index.json"))
+        ))
+
+    def create_index(self, name: str, dimension: int, metric: str = "cosine", **kwargs):
+        if metric != "cosine":
+            raise ValueError("The local vector store only supports the cosine metric")
+        path = os.path.join(self.root, name)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "index.json"), 'w', encoding='utf-8') as f:
+            json.dump({"name": name, "dimension": dimension, "metric": metric}, f)
+
+    def delete_index(self, name: str):
+        with self._lock:
+            self._indexes.pop(name, None)
+        shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+    def Index(self, name: str) -> LocalVectorIndex:
+        with self._lock:
+            if name not in self._indexes:
+                if not os.path.exists(os.path.join(self.root, name, "index.json")):
+                    raise ValueError(f"Local index '{name}' not found under {self.root}")
+                self._indexes[name] = LocalVectorIndex(os.path.join(self.root, name))
+            return self._indexes[name]
+
+
+def get_vector_client(backend: str, pinecone_api_key: Optional[str] = None, local_path: Optional[str] = None):
+    """
+    Create the vector store client for a backend.
+
+    Args:
+        backend (str): "pinecone" or "local"
+        pinecone_api_key (str, optional): Required for the Pinecone backend
+        local_path (str, optional): Root directory of the local backend
+    """
+    if backend == "local":
+        return LocalVectorClient(local_path or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".vectors"))
+    if backend == "pinecone":
+        from pinecone import Pinecone
+        return Pinecone(api_key=pinecone_api_key)
+    raise ValueError(f"Unknown vector backend '{backend}' (expected 'pinecone' or 'local')")
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Watch mode for embed_folder.py
+
+Keeps an index in sync with a folder while it runs:
+- file system events come from watchdog (inotify on Linux, FSEvents on macOS,
+  ReadDirectoryChangesW on Windows); if it is missing from the environment the
+  folder is polled by comparing size/mtime snapshots, and a warning says so
+- bursts of events (an editor saving, a copy of many files) are debounced into
+  one batch of changed paths
+- each batch is handed to a sync callback - embed_folder passes process_folder
+  restricted to those paths, so only the deltas are extracted, embedded,
+  upserted or deleted
+- a periodic full sync catches anything the events missed and retries files
+  that failed before
+
+watchdog is a project dependency (uv sync installs it); pip install watchdog
+when running outside the uv environment.
+"""
+
+import os
+import time
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional, Callable, Iterable, Set, Tuple
+
+
+class ChangeSet:
+    """Thread-safe set of changed paths with the timing needed for debouncing."""
+
+    def __init__(self):
+        self._paths: Set[str] = set()
+        self._first_event = 0.0
+        self._last_event = 0.0
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+
+    def add(self, paths: Iterable[str]):
+        now = time.monotonic()
+        with self._lock:
+            if not self._paths:
+                self._first_event = now
+            self._paths.update(paths)
+            self._last_event = now
+            if self._paths:
+                self._event.set()
+
+    def wait(self, timeout: float) -> bool:
+        """Block until a change arrives (or the timeout passes)."""
+        return self._event.wait(timeout)
+
+    def ready(self, debounce: float, max_delay: float) -> bool:
+        """True once changes have been quiet for `debounce` seconds, or waited `max_delay` in total."""
+        now = time.monotonic()
+        with self._lock:
+            if not self._paths:
+                return False
+            return now - self._last_event >= debounce or now - self._first_event >= max_delay
+
+    def drain(self) -> List[str]:
+        with self._lock:
+            paths = sorted(self._paths)
+            self._paths.clear()
+            self._event.clear()
+            return paths
+
+
+def _snapshot(root: Path, extensions: Set[str]) -> Dict[str, Tuple[int, int]]:
+    """(size, mtime_ns) of every supported file under root."""
+    snapshot: Dict[str, Tuple[int, int]] = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if os.path.splitext(filename)[1].lower() not in extensions:
+                continue
+            path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+class PollingObserver:
+    """Fallback watcher: rescans the folder every `interval` seconds and reports differences."""
+
+    def __init__(self, root: Path, extensions: Set[str], changes: ChangeSet, interval: float):
+        self.root = root
+        self.extensions = extensions
+        self.changes = changes
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="folder-poller", daemon=True)
+        self._previous = _snapshot(root, extensions)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            current = _snapshot(self.root, self.extensions)
+            changed = [path for path, stat in current.items() if self._previous.get(path) != stat]
+            removed = [path for path in self._previous if path not in current]
+            self._previous = current
+            if changed or removed:
+                self.changes.add(changed + removed)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self, timeout: Optional[float] = None):
+        self._thread.join(timeout)
+
+
+def _watchdog_observer(root: Path, extensions: Set[str], changes: ChangeSet):
+    """Event-based observer from watchdog, or None if watchdog is not installed."""
+    try:
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+    except ImportError:
+        return None
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.event_type not in ("created", "modified", "moved", "deleted"):
+                return  # opened / closed without writing
+            if event.is_directory and event.event_type == "modified":
+                return  # the file events inside it are reported on their own
+            paths = [event.src_path, getattr(event, 'dest_path', '')]
+            # Directory events are kept whole: embed_folder expands them to the files they hold
+            relevant = [os.fsdecode(path) for path in paths if path and (
+                event.is_directory or os.path.splitext(os.fsdecode(path))[1].lower() in extensions)]
+            if relevant:
+                changes.add(relevant)
+
+    observer = Observer()
+    observer.schedule(Handler(), str(root), recursive=True)
+    return observer
+
+
+class FolderWatcher:
+    """Runs the sync callback for debounced batches of changes under a folder."""
+
+    def __init__(
+        self,
+        root: str,
+        sync: Callable[[Optional[List[str]]], None],
+        extensions: Iterable[str],
+        debounce: float = 2.0,
+        max_delay: float = 30.0,
+        poll_interval: float = 5.0,
+        full_sync_interval: float = 3600.0,
+        backend: str = "auto",
+    ):
+        """
+        Args:
+            root (str): Folder to watch (recursively)
+            sync (Callable): Called with the changed paths, or None for a full sync
+            extensions (Iterable[str]): File extensions to watch (".pdf", ...)
+            debounce (float): Seconds without new events before a batch is synced
+            max_delay (float): Longest a change waits while events keep arriving
+            poll_interval (float): Seconds between scans of the polling fallback
+            full_sync_interval (float): Seconds between full syncs (0 = never)
+            backend (str): "auto" (watchdog if installed), "watchdog" or "polling"
+        """
+        self.root = Path(root).resolve()
+        self.sync = sync
+        self.extensions = {ext.lower() for ext in extensions}
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.full_sync_interval = full_sync_interval
+        self.changes = ChangeSet()
+
+        self.observer = None
+        if backend in ("auto", "watchdog"):
+            self.observer = _watchdog_observer(self.root, self.extensions, self.changes)
+            if self.observer is None and backend == "watchdog":
+                raise RuntimeError("watchdog is not installed (uv sync or pip install watchdog)")
+        self.backend = "watchdog" if self.observer is not None else "polling"
+        if self.observer is None:
+            if backend == "auto":
+                print(f"⚠️  watchdog is not installed - falling back to polling every {poll_interval:g}s (uv sync installs it)")
+            self.observer = PollingObserver(self.root, self.extensions, self.changes, poll_interval)
+
+    def _run_sync(self, paths: Optional[List[str]]):
+        try:
+            self.sync(paths)
+        except Exception as e:
+            # Keep watching - failed files are picked up again by the next full sync
+            print(f"❌ Sync failed: {e}")
+
+    def run(self, stop_event: Optional[threading.Event] = None):
+        """Initial full sync, then sync debounced changes until Ctrl+C (or `stop_event`)."""
+        stop_event = stop_event or threading.Event()
+        self.observer.start()
+        print(f"👀 Watching {self.root} ({self.backend}, debounce {self.debounce:g}s)")
+        self._run_sync(None)
+        last_full_sync = time.monotonic()
+        try:
+            while not stop_event.is_set():
+                self.changes.wait(timeout=min(self.debounce, 1.0))
+                if self.changes.ready(self.debounce, self.max_delay):
+                    paths = self.changes.drain()
+                    print(f"\n🔔 {len(paths)} change(s) detected - syncing")
+                    started = time.monotonic()
+                    self._run_sync(paths)
+                    print(f"⏱️  Synced in {time.monotonic() - started:.1f}s - watching for changes...")
+                elif self.full_sync_interval and time.monotonic() - last_full_sync >= self.full_sync_interval:
+                    print("\n🔄 Periodic full sync")
+                    self._run_sync(None)
+                    last_full_sync = time.monotonic()
+                elif self.changes.wait(timeout=0):
+                    time.sleep(0.2)  # changes pending - wait for the burst to settle
+        except KeyboardInterrupt:
+            print("\n👋 Watch mode stopped")
+        finally:
+            self.observer.stop()
+            self.observer.join(timeout=5)